@@ -1,16 +1,13 @@
-from app import create_app, db
-from app.models import Property, PropertyImage
+from app import create_app
+from config import FastStartupConfig
+from app.models import Property
+from app.utils.importer import import_properties
 import json
 
 def add_sample_properties():
-    app = create_app()
+    app = create_app(FastStartupConfig)
     
     with app.app_context():
-        Property.query.delete()
-        PropertyImage.query.delete()
-        db.session.commit()
-        print("Cleared existing properties")
-        
         properties_data = [
             {
                 "name": "Campus Africa- Park Mews",
@@ -645,14 +642,13 @@ def add_sample_properties():
         
         all_properties = properties_data + uj_properties
         
-        # Add properties to database
-        for prop_data in all_properties:
-            property = Property(**prop_data)
-
-            db.session.add(property)
-        
-        db.session.commit()
-        print(f"✅ Added {len(all_properties)} properties to database!")
+        # Sync with the database: existing listings (matched on name and
+        # address) keep their ids and reviews, only changed ones are updated
+        summary = import_properties(all_properties)
+        print(f"✅ Synced {len(all_properties)} properties: {summary.inserted} added, "
+              f"{summary.updated} updated, {summary.unchanged} unchanged, {summary.rejected} rejected")
+        for error in summary.errors:
+            print(f"   row {error['line']}: {error['error']}")
         
         # Verify properties were added
         count = Property.query.count()
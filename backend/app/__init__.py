@@ -1,33 +1,61 @@
 # backend/app/__init__.py - Fixed version with proper db export
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request, Response
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
+from app.utils.cache import ResponseCache
+from app.utils.compression import Compression
+from app.utils.identity import IdentityCache
+from app.utils.images import ImageStore
+from app.utils.jsonprovider import FastJSONProvider
+from app.utils.sqlite import SQLiteProfile, sqlite_engine_options
+from app.utils.log import StructuredLogging
+from app.utils.metrics import Metrics
+from app.utils.passwords import PasswordHasher
+from app.utils.profiling import SQLProfiler
+from app.utils.ratelimit import RateLimiter
+from app.utils.startup import BASELINE_REVISION, LazyBlueprints, database_revisions, \
+    migration_heads, migrations_directory, predates_migrations, stamp, stamp_heads
+from app.routes import register_blueprints
 import os
 
 # Initialize extensions
 db = SQLAlchemy()
 migrate = Migrate()
 jwt = JWTManager()
+response_cache = ResponseCache()
+identity_cache = IdentityCache()
+sqlite_profile = SQLiteProfile()
+sql_profiler = SQLProfiler()
+metrics = Metrics()
+structured_logging = StructuredLogging()
+password_hasher = PasswordHasher()
+rate_limiter = RateLimiter()
+image_store = ImageStore()
+compression = Compression()
 
 def create_app(config_class=None):
     app = Flask(__name__)
 
-    # Configuration
-    app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY", "dev-secret")
-    app.config["JWT_SECRET_KEY"] = os.environ.get("JWT_SECRET_KEY", "dev-jwt")
+    # Configuration: Config (or a subclass / import path like
+    # 'config.TestingConfig'), which reads DATABASE_URL etc. from the environment
+    if config_class is None:
+        from config import Config
+        config_class = Config
+    app.config.from_object(config_class)
 
-    # SQLite Database configuration
-    if os.environ.get('RAILWAY_ENVIRONMENT'):
-        # Railway production - use persistent path
-        db_path = os.path.join("/app", "studentstay.db")
-    else:
-        # Local development
-        db_path = "studentstay.db"
-    
-    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
-    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    # orjson when installed; unsorted keys, datetimes written as ISO 8601
+    app.json = FastJSONProvider(app)
+
+    # JSON log lines written from a background thread, tagged with the
+    # request id; set up first so startup messages use it too
+    structured_logging.init_app(app)
+
+    # Bigger statement cache and lock wait for SQLite connections
+    if app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite") and \
+            not app.config.get("SQLALCHEMY_ENGINE_OPTIONS"):
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = sqlite_engine_options(app)
 
     allowed_origins = [
     "http://localhost:3000",  # Local development
@@ -62,26 +90,64 @@ def create_app(config_class=None):
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
+    # Role claims in tokens and a cached user lookup for protected routes
+    identity_cache.init_app(app, jwt)
+    response_cache.init_app(app)
+    password_hasher.init_app(app)
+    rate_limiter.init_app(app)
+    image_store.init_app(app)
+    with app.app_context():
+        # WAL, busy_timeout etc. on every new SQLite connection
+        sqlite_profile.init_app(app, db.engine)
+        # Query count / DB time per request in a Server-Timing header
+        sql_profiler.init_app(app, db.engine)
+        # Latency histograms, status counts and pool stats for /api/metrics
+        metrics.init_app(app, db.engine)
+
+    # gzip/brotli by Accept-Encoding; registered after the profiler and
+    # metrics so its after_request runs first and is counted in their timings
+    compression.init_app(app)
 
     # Import models (needed for migrations)
-    from app.models import User, Property, Review, PropertyImage
+    from app.models import User, Property, Review, PropertyImage, TableVersion
+    
+    # Registers the full-text search and change-marker DDL hooks that run
+    # with create_all
+    from app.utils import search, conditional
 
-    # Create tables if they don't exist
+    # Create tables only for a database migrations don't manage yet; one
+    # with an alembic_version is left to `flask db upgrade` (see
+    # app.utils.startup). A new, empty database is stamped at the head,
+    # one create_all built at the baseline at BASELINE_REVISION.
     with app.app_context():
-        try:
-            db.create_all()
-            print("Database tables created successfully")
-        except Exception as e:
-            print(f"Database initialization error: {e}")
-
-    # Register blueprints
-    from app.routes.auth import auth_bp
-    from app.routes.properties import properties_bp
-    from app.routes.reviews import reviews_bp
+        revisions = database_revisions(db.engine)
+        if not revisions and predates_migrations(db.engine):
+            stamp(db.engine, {BASELINE_REVISION})
+            revisions = {BASELINE_REVISION}
+            app.logger.warning("Database predates migrations, stamped at %s", BASELINE_REVISION)
+        if revisions:
+            heads = migration_heads(migrations_directory(app))
+            if revisions == heads:
+                app.logger.info("Database at migration head, skipping create_all")
+            else:
+                app.logger.warning("Database at revision %s, migrations head is %s; run flask db upgrade",
+                                   ', '.join(sorted(revisions)), ', '.join(sorted(heads)))
+        else:
+            try:
+                empty = not db.inspect(db.engine).get_table_names()
+                db.create_all()
+                if empty:
+                    stamp_heads(app, db.engine)
+                app.logger.info("Database tables created successfully")
+            except Exception as e:
+                app.logger.error(f"Database initialization error: {e}")
 
-    app.register_blueprint(auth_bp, url_prefix="/api/auth")
-    app.register_blueprint(properties_bp, url_prefix="/api/properties")
-    app.register_blueprint(reviews_bp, url_prefix="/api/reviews")
+    # Register blueprints; in fast startup mode the route modules are only
+    # imported once the first request comes in
+    if app.config.get("FAST_STARTUP"):
+        app.wsgi_app = LazyBlueprints(app, register_blueprints)
+    else:
+        register_blueprints(app)
 
     # Health check endpoints
     @app.route('/')
@@ -101,9 +167,33 @@ def create_app(config_class=None):
             "status": "ok",
             "message": "oneApplyHub API is healthy",
             "database": db_status,
+            "response_cache": response_cache.stats(),
+            "identity_cache": identity_cache.stats(),
             "environment": os.environ.get("RAILWAY_ENVIRONMENT", "development")
         }), 200
 
+    @app.route('/api/diagnostics/database')
+    def database_diagnostics():
+        try:
+            return jsonify({
+                "dialect": db.engine.dialect.name,
+                "sqlite": sqlite_profile.diagnostics()
+            }), 200
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    @app.route('/api/metrics')
+    def metrics_endpoint():
+        token = app.config.get("METRICS_TOKEN")
+        if token and request.headers.get("Authorization") != f"Bearer {token}":
+            return jsonify(error="Unauthorized"), 401
+        if not metrics.enabled:
+            return jsonify(error="Metrics are disabled"), 404
+
+        if request.args.get("format") == "json":
+            return jsonify(metrics.summary()), 200
+        return Response(metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
     # Error handlers
     @app.errorhandler(404)
     def not_found(error):
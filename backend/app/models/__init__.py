@@ -1,3 +1,4 @@
 from .user import User
 from .property import Property, PropertyImage
-from .review import Review
\ No newline at end of file
+from .review import Review, HelpfulVote
+from .table_version import TableVersion
@@ -1,7 +1,23 @@
-from app import db
+from app import db, image_store
 from datetime import datetime
 
+# Per-category ratings on Review that get a running sum/count on Property
+RATING_CATEGORIES = ('value', 'location', 'safety', 'cleanliness', 'management', 'facilities')
+
 class Property(db.Model):
+    __table_args__ = (
+        # Public listing: approved rows filtered by university/type/price,
+        # newest first when paging by cursor
+        db.Index('ix_property_approved_created', 'approved', 'created_at', 'id'),
+        db.Index('ix_property_approved_university', 'approved', 'university'),
+        db.Index('ix_property_approved_type', 'approved', 'property_type'),
+        db.Index('ix_property_approved_price', 'approved', 'price_min', 'price_max'),
+        # Admin listing and dashboard: all rows newest first
+        db.Index('ix_property_created', 'created_at', 'id'),
+        # Bulk import matches listings on their natural key
+        db.Index('ix_property_name_address', 'name', 'address'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
     address = db.Column(db.Text, nullable=False)
@@ -16,42 +32,183 @@ class Property(db.Model):
     nsfas_accredited = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Denormalized rating aggregates, kept in step with the review table by
+    # apply_review_ratings() so serialization never has to touch reviews
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    value_rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    value_rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    location_rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    location_rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    safety_rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    safety_rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    cleanliness_rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    cleanliness_rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    management_rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    management_rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    facilities_rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    facilities_rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
     # Relationships
     reviews = db.relationship('Review', backref='property', lazy='dynamic')
     images = db.relationship('PropertyImage', backref='property', lazy='dynamic')
     
     def average_rating(self):
-        reviews = self.reviews.all()
-        if not reviews:
+        if not self.rating_count:
             return 0
-        return sum(review.overall_rating for review in reviews) / len(reviews)
+        return self.rating_sum / self.rating_count
     
     def review_count(self):
-        return self.reviews.count()
+        return self.rating_count or 0
+    
+    def category_averages(self):
+        """Average of each category rating, None where nobody rated it"""
+        averages = {}
+        for category in RATING_CATEGORIES:
+            count = getattr(self, f'{category}_rating_count')
+            total = getattr(self, f'{category}_rating_sum')
+            averages[category] = round(total / count, 1) if count else None
+        return averages
+    
+    @classmethod
+    def apply_review_ratings(cls, review, sign=1):
+        """Add (sign=1) or remove (sign=-1) a review's ratings from its property.
+
+        Issues a single UPDATE with in-SQL arithmetic so concurrent writers
+        can't lose each other's increments. Runs inside the caller's
+        transaction; the caller commits.
+        """
+        values = {
+            cls.rating_sum: cls.rating_sum + sign * review.overall_rating,
+            cls.rating_count: cls.rating_count + sign,
+        }
+        for category in RATING_CATEGORIES:
+            rating = getattr(review, f'{category}_rating')
+            if rating:
+                sum_col = getattr(cls, f'{category}_rating_sum')
+                count_col = getattr(cls, f'{category}_rating_count')
+                values[sum_col] = sum_col + sign * rating
+                values[count_col] = count_col + sign
+        
+        db.session.query(cls).filter(cls.id == review.property_id).update(
+            values, synchronize_session=False
+        )
+    
+    @classmethod
+    def recalculate_ratings(cls, property_ids=None):
+        """Rebuild the rating aggregates from the review table.
+
+        Used to backfill existing data and to repair drift. Returns the
+        number of properties updated.
+        """
+        from app.models.review import Review
+        
+        columns = [
+            Review.property_id,
+            db.func.sum(Review.overall_rating),
+            db.func.count(Review.id),
+        ]
+        for category in RATING_CATEGORIES:
+            rating = getattr(Review, f'{category}_rating')
+            columns.append(db.func.sum(rating))
+            columns.append(db.func.count(rating))
+        
+        totals_query = db.session.query(*columns).group_by(Review.property_id)
+        properties_query = db.session.query(cls)
+        if property_ids is not None:
+            totals_query = totals_query.filter(Review.property_id.in_(property_ids))
+            properties_query = properties_query.filter(cls.id.in_(property_ids))
+        
+        totals = {row[0]: row[1:] for row in totals_query}
+        
+        updated = 0
+        for prop in properties_query:
+            row = totals.get(prop.id)
+            if row is None:
+                row = (0, 0) + (0, 0) * len(RATING_CATEGORIES)
+            prop.rating_sum = row[0] or 0
+            prop.rating_count = row[1] or 0
+            for index, category in enumerate(RATING_CATEGORIES):
+                setattr(prop, f'{category}_rating_sum', row[2 + index * 2] or 0)
+                setattr(prop, f'{category}_rating_count', row[3 + index * 2] or 0)
+            updated += 1
+        
+        return updated
     
-    def to_dict(self):
+    # to_dict() field -> columns it reads, so a query can load just those
+    FIELD_COLUMNS = {
+        'id': ('id',),
+        'name': ('name',),
+        'address': ('address',),
+        'property_type': ('property_type',),
+        'price_min': ('price_min',),
+        'price_max': ('price_max',),
+        'description': ('description',),
+        'amenities': ('amenities',),
+        'contact_info': ('contact_info',),
+        'university': ('university',),
+        'approved': ('approved',),
+        'nsfas_accredited': ('nsfas_accredited',),
+        'average_rating': ('rating_sum', 'rating_count'),
+        'review_count': ('rating_count',),
+        'created_at': ('created_at',),
+    }
+    
+    def to_dict(self, fields=None):
+        """All of FIELD_COLUMNS, or just `fields` (which then only touches
+        the columns those need)"""
+        data = {}
+        for field in fields or self.FIELD_COLUMNS:
+            if field == 'average_rating':
+                data[field] = round(self.average_rating(), 1)
+            elif field == 'review_count':
+                data[field] = self.review_count()
+            else:
+                data[field] = getattr(self, field)
+        return data
+    
+    def rating_summary(self):
         return {
-            'id': self.id,
-            'name': self.name,
-            'address': self.address,
-            'property_type': self.property_type,
-            'price_min': self.price_min,
-            'price_max': self.price_max,
-            'description': self.description,
-            'amenities': self.amenities,
-            'contact_info': self.contact_info,
-            'university': self.university,
-            'approved': self.approved,
-            'nsfas_accredited': self.nsfas_accredited,
             'average_rating': round(self.average_rating(), 1),
             'review_count': self.review_count(),
-            'created_at': self.created_at.isoformat()
+            'categories': self.category_averages(),
         }
 
 class PropertyImage(db.Model):
+    __table_args__ = (
+        db.Index('ix_property_image_property_primary', 'property_id', 'is_primary'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     property_id = db.Column(db.Integer, db.ForeignKey('property.id'), nullable=False)
     image_url = db.Column(db.String(500), nullable=False)
     caption = db.Column(db.String(200))
     is_primary = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Uploaded images (see app.utils.images); rows that only link to an
+    # external image_url leave these empty
+    content_hash = db.Column(db.String(64), index=True)
+    extension = db.Column(db.String(8))
+    status = db.Column(db.String(16))  # 'processing', 'ready' or 'failed'
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    
+    def to_dict(self, rendition='full'):
+        data = {
+            'id': self.id,
+            'property_id': self.property_id,
+            'image_url': self.image_url,
+            'caption': self.caption,
+            'is_primary': self.is_primary
+        }
+        if self.content_hash:
+            original = image_store.url(image_store.relative_path(self.content_hash, self.extension))
+            renditions = image_store.renditions_for(self.content_hash, self.extension) \
+                if self.status == 'ready' else {}
+            data['image_url'] = renditions.get(rendition, original)
+            data['renditions'] = renditions
+            data['status'] = self.status
+            data['width'] = self.width
+            data['height'] = self.height
+        return data
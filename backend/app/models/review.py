@@ -2,6 +2,15 @@ from app import db
 from datetime import datetime
 
 class Review(db.Model):
+    __table_args__ = (
+        # Review feed and admin list, newest first
+        db.Index('ix_review_created', 'created_at', 'id'),
+        # Reviews of one property, newest first
+        db.Index('ix_review_property_created', 'property_id', 'created_at', 'id'),
+        # Duplicate-review check and per-user stats
+        db.Index('ix_review_user_property', 'user_id', 'property_id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     property_id = db.Column(db.Integer, db.ForeignKey('property.id'), nullable=False)
@@ -49,6 +58,18 @@ class Review(db.Model):
             'author': self.author.name if not self.anonymous else 'Anonymous',
             'author_university': self.author.university if not self.anonymous else None,
             'author_year': self.author.year_of_study if not self.anonymous else None,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
-        }
\ No newline at end of file
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
+        }
+
+class HelpfulVote(db.Model):
+    """One user's "helpful" vote on one review; the unique key stops repeat votes"""
+    __tablename__ = 'helpful_vote'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'review_id', name='uq_helpful_vote_user_review'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    review_id = db.Column(db.Integer, db.ForeignKey('review.id'), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
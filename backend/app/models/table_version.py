@@ -0,0 +1,14 @@
+from app import db
+from datetime import datetime
+
+class TableVersion(db.Model):
+    """Change marker per table, bumped by database triggers on every write.
+
+    Lets read endpoints tell whether anything they depend on changed
+    without looking at the data itself (see app.utils.conditional).
+    """
+    __tablename__ = 'table_version'
+    
+    table_name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -1,11 +1,15 @@
-from app import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from app import db, password_hasher
 from datetime import datetime
 
 class User(db.Model):
+    __table_args__ = (
+        # Admin user list: non-admins newest first
+        db.Index('ix_user_admin_created', 'is_admin', 'created_at', 'id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128))
+    password_hash = db.Column(db.String(256))
     name = db.Column(db.String(100), nullable=False)
     university = db.Column(db.String(50), nullable=False)  # 'wits' or 'uj'
     year_of_study = db.Column(db.String(20))
@@ -13,17 +17,21 @@ class User(db.Model):
     verified = db.Column(db.Boolean, default=False)
     is_admin = db.Column(db.Boolean, default=False)  
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    reset_token = db.Column(db.String(100), nullable=True)
+    reset_token = db.Column(db.String(100), nullable=True, index=True)
     reset_token_expires = db.Column(db.DateTime, nullable=True)
     
     # Relationships
     reviews = db.relationship('Review', backref='author', lazy='dynamic')
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
         
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        matches, new_hash = password_hasher.verify(password, self.password_hash)
+        if new_hash:
+            # Stored with outdated parameters; saved with the caller's commit
+            self.password_hash = new_hash
+        return matches
     
     def to_dict(self):
         return {
@@ -35,5 +43,5 @@ class User(db.Model):
             'faculty': self.faculty,
             'verified': self.verified,
             'is_admin': self.is_admin, 
-            'created_at': self.created_at.isoformat()
+            'created_at': self.created_at
         }
\ No newline at end of file
@@ -0,0 +1,16 @@
+from importlib import import_module
+
+# (module, blueprint, url prefix) for every blueprint create_app serves
+BLUEPRINTS = [
+    ('app.routes.auth', 'auth_bp', '/api/auth'),
+    ('app.routes.properties', 'properties_bp', '/api/properties'),
+    ('app.routes.reviews', 'reviews_bp', '/api/reviews'),
+    ('app.routes.images', 'images_bp', '/api/images'),
+    ('app.routes.admin', 'admin_bp', '/api/admin'),
+]
+
+
+def register_blueprints(app):
+    for module, name, url_prefix in BLUEPRINTS:
+        blueprint = getattr(import_module(module), name)
+        app.register_blueprint(blueprint, url_prefix=url_prefix)
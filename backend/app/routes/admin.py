@@ -1,27 +1,41 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity, create_access_token
-from app import db
-from app.models import User, Property, Review, PropertyImage
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from flask_jwt_extended import jwt_required, create_access_token, current_user
+from app import db, image_store, rate_limiter, response_cache
+from app.models import User, Property, Review, PropertyImage, HelpfulVote
+from app.utils.cache import property_tags
+from app.utils.exporter import EXPORTS, FORMATS, ExportError, export_chunks
+from app.utils.images import ImageTooLarge, ImageUploadError
+from app.utils.importer import (
+    ImportFormatError, format_for, import_properties, read_rows, text_stream
+)
+from app.utils.passwords import PasswordHasherBusy
+from app.utils.pagination import (
+    InvalidCursor, cursor_meta, cursor_requested, include_total, keyset_paginate
+)
+from app.utils.serializers import serialize_properties
 from functools import wraps
+import io
 import json
+import logging
 
 admin_bp = Blueprint('admin', __name__)
+logger = logging.getLogger(__name__)
 
 def admin_required(f):
     """Decorator to require admin access"""
     @wraps(f)
     @jwt_required()
     def decorated_function(*args, **kwargs):
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user or not user.is_admin:
+        # The cached identity rather than the token's is_admin claim, so
+        # revoking admin rights takes effect before the token expires
+        if not current_user.is_admin:
             return jsonify({'error': 'Admin access required'}), 403
         
         return f(*args, **kwargs)
     return decorated_function
 
 @admin_bp.route('/login', methods=['POST'])
+@rate_limiter.limit('login')
 def admin_login():
     try:
         data = request.get_json()
@@ -33,7 +47,8 @@ def admin_login():
         user = User.query.filter_by(email=email).first()
         
         if user and user.check_password(data['password']) and user.is_admin:
-            access_token = create_access_token(identity=user.id)
+            access_token = create_access_token(identity=user)
+            db.session.commit()
             return jsonify({
                 'access_token': access_token,
                 'user': user.to_dict()
@@ -41,8 +56,10 @@ def admin_login():
         
         return jsonify({'error': 'Invalid admin credentials'}), 401
         
-    except Exception as e:
-        print(f"Admin login error: {e}")
+    except PasswordHasherBusy:
+        return jsonify({'error': 'Too many login attempts right now, please try again'}), 503
+    except Exception:
+        logger.exception("admin_login failed")
         return jsonify({'error': 'Login failed'}), 500
 
 @admin_bp.route('/dashboard', methods=['GET'])
@@ -65,11 +82,11 @@ def dashboard():
         
         return jsonify({
             'stats': stats,
-            'recent_properties': [prop.to_dict() for prop in recent_properties]
+            'recent_properties': serialize_properties(recent_properties)
         }), 200
         
-    except Exception as e:
-        print(f"Admin dashboard error: {e}")
+    except Exception:
+        logger.exception("dashboard failed")
         return jsonify({'error': 'Failed to load dashboard'}), 500
 
 # Property Management Routes
@@ -88,19 +105,33 @@ def get_all_properties():
         elif status == 'pending':
             query = query.filter_by(approved=False)
         
-        properties = query.order_by(Property.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
+        if cursor_requested():
+            properties = keyset_paginate(
+                query, Property.created_at, Property.id,
+                cursor=request.args.get('cursor'), per_page=per_page,
+                with_total=include_total()
+            )
+            return jsonify({
+                'properties': serialize_properties(properties.items),
+                **cursor_meta(properties)
+            }), 200
+        
+        properties = query.order_by(Property.created_at.desc(), Property.id.desc()).paginate(
+            page=page, per_page=per_page, error_out=False,
+            count=include_total(default=True)
         )
         
         return jsonify({
-            'properties': [prop.to_dict() for prop in properties.items],
+            'properties': serialize_properties(properties.items),
             'total': properties.total,
             'pages': properties.pages,
             'current_page': page
         }), 200
         
-    except Exception as e:
-        print(f"Admin get properties error: {e}")
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception:
+        logger.exception("get_all_properties failed")
         return jsonify({'error': 'Failed to fetch properties'}), 500
 
 @admin_bp.route('/properties', methods=['POST'])
@@ -134,14 +165,15 @@ def create_property():
         
         db.session.add(property)
         db.session.commit()
+        response_cache.invalidate('properties')
         
         return jsonify({
             'message': 'Property created successfully',
             'property': property.to_dict()
         }), 201
         
-    except Exception as e:
-        print(f"Admin create property error: {e}")
+    except Exception:
+        logger.exception("create_property failed")
         db.session.rollback()
         return jsonify({'error': 'Failed to create property'}), 500
 
@@ -149,7 +181,7 @@ def create_property():
 @admin_required
 def update_property(property_id):
     try:
-        property = Property.query.get_or_404(property_id)
+        property = db.get_or_404(Property, property_id)
         data = request.get_json()
         
         if not data:
@@ -178,14 +210,15 @@ def update_property(property_id):
             property.approved = bool(data['approved'])
         
         db.session.commit()
+        response_cache.invalidate(*property_tags(property_id))
         
         return jsonify({
             'message': 'Property updated successfully',
             'property': property.to_dict()
         }), 200
         
-    except Exception as e:
-        print(f"Admin update property error: {e}")
+    except Exception:
+        logger.exception("update_property failed")
         db.session.rollback()
         return jsonify({'error': 'Failed to update property'}), 500
 
@@ -193,20 +226,24 @@ def update_property(property_id):
 @admin_required
 def delete_property(property_id):
     try:
-        property = Property.query.get_or_404(property_id)
+        property = db.get_or_404(Property, property_id)
         
-        # Delete associated reviews and images
+        # Delete associated votes, reviews and images (the rating aggregates
+        # live on the property row itself, so they go with it)
+        review_ids = db.session.query(Review.id).filter_by(property_id=property_id)
+        HelpfulVote.query.filter(HelpfulVote.review_id.in_(review_ids)).delete(synchronize_session=False)
         Review.query.filter_by(property_id=property_id).delete()
         PropertyImage.query.filter_by(property_id=property_id).delete()
         
         # Delete property
         db.session.delete(property)
         db.session.commit()
+        response_cache.invalidate(*property_tags(property_id))
         
         return jsonify({'message': 'Property deleted successfully'}), 200
         
-    except Exception as e:
-        print(f"Admin delete property error: {e}")
+    except Exception:
+        logger.exception("delete_property failed")
         db.session.rollback()
         return jsonify({'error': 'Failed to delete property'}), 500
 
@@ -214,20 +251,117 @@ def delete_property(property_id):
 @admin_required
 def approve_property(property_id):
     try:
-        property = Property.query.get_or_404(property_id)
+        property = db.get_or_404(Property, property_id)
         property.approved = True
         db.session.commit()
+        response_cache.invalidate(*property_tags(property_id))
         
         return jsonify({
             'message': 'Property approved successfully',
             'property': property.to_dict()
         }), 200
         
-    except Exception as e:
-        print(f"Admin approve property error: {e}")
+    except Exception:
+        logger.exception("approve_property failed")
         db.session.rollback()
         return jsonify({'error': 'Failed to approve property'}), 500
 
+@admin_bp.route('/properties/<int:property_id>/images', methods=['POST'])
+@admin_required
+def upload_property_image(property_id):
+    """Store a photo (multipart 'file', optional 'caption' and 'is_primary')
+    and queue its renditions; answers 202 while they are being made"""
+    db.get_or_404(Property, property_id)
+    try:
+        upload = request.files.get('file')
+        if upload is None:
+            return jsonify({'error': 'No file provided'}), 400
+        
+        content_hash, extension = image_store.save(upload.stream)
+        is_primary = request.form.get('is_primary', '').lower() in ['true', '1'] or \
+            not PropertyImage.query.filter_by(property_id=property_id).first()
+        if is_primary:
+            PropertyImage.query.filter_by(property_id=property_id, is_primary=True).update(
+                {PropertyImage.is_primary: False}, synchronize_session=False
+            )
+        
+        image = PropertyImage(
+            property_id=property_id,
+            image_url='/api/images/' + image_store.relative_path(content_hash, extension),
+            caption=request.form.get('caption') or None,
+            is_primary=is_primary,
+            content_hash=content_hash,
+            extension=extension,
+            status='processing'
+        )
+        db.session.add(image)
+        db.session.commit()
+        response_cache.invalidate(*property_tags(property_id))
+        
+        image_store.submit(image.id)
+        db.session.refresh(image)
+        return jsonify({'image': image.to_dict()}), 202 if image.status == 'processing' else 201
+        
+    except ImageTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+    except ImageUploadError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception:
+        logger.exception("upload_property_image failed")
+        db.session.rollback()
+        return jsonify({'error': 'Failed to upload image'}), 500
+
+@admin_bp.route('/properties/import', methods=['POST'])
+@admin_required
+def import_properties_file():
+    """Upsert listings from a CSV/JSONL upload (multipart 'file') or a raw
+    text/csv or application/x-ndjson body; ?dry_run=1 reports without saving"""
+    try:
+        dry_run = request.args.get('dry_run', '').lower() in ['true', '1']
+        chunk_size = min(max(request.args.get('chunk_size', 500, type=int), 1), 5000)
+        
+        upload = request.files.get('file')
+        if upload is not None:
+            fmt = request.args.get('format') or format_for(upload.filename)
+            stream = text_stream(upload.stream)
+        elif request.content_length:
+            default = 'jsonl' if 'json' in request.mimetype else 'csv'
+            fmt = request.args.get('format') or default
+            stream = text_stream(io.BufferedReader(request.stream))
+        else:
+            return jsonify({'error': 'No file provided'}), 400
+        
+        summary = import_properties(read_rows(stream, fmt), chunk_size=chunk_size, dry_run=dry_run)
+        return jsonify(summary.to_dict()), 200
+        
+    except (ImportFormatError, UnicodeDecodeError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception:
+        logger.exception("import_properties_file failed")
+        return jsonify({'error': 'Failed to import properties'}), 500
+
+@admin_bp.route('/export/<kind>', methods=['GET'])
+@admin_required
+def export_data(kind):
+    """Stream every property, user or review as ?format=ndjson (default)
+    or csv; memory use doesn't grow with the table"""
+    fmt = request.args.get('format', 'ndjson').lower()
+    chunk_rows = min(max(request.args.get('chunk_rows', 1000, type=int), 1), 10000)
+    try:
+        chunks = export_chunks(kind, fmt, chunk_rows=chunk_rows)
+    except ExportError as e:
+        return jsonify({'error': str(e)}), 400 if kind in EXPORTS else 404
+    
+    extension = 'csv' if fmt == 'csv' else 'ndjson'
+    return Response(
+        stream_with_context(chunks),
+        mimetype=FORMATS[fmt],
+        headers={
+            'Content-Disposition': f'attachment; filename="{kind}.{extension}"',
+            'Cache-Control': 'no-store',
+        }
+    )
+
 # User Management Routes
 @admin_bp.route('/users', methods=['GET'])
 @admin_required
@@ -236,8 +370,22 @@ def get_all_users():
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 12, type=int)
         
-        users = User.query.filter_by(is_admin=False).order_by(User.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
+        query = User.query.filter_by(is_admin=False)
+        
+        if cursor_requested():
+            users = keyset_paginate(
+                query, User.created_at, User.id,
+                cursor=request.args.get('cursor'), per_page=per_page,
+                with_total=include_total()
+            )
+            return jsonify({
+                'users': [user.to_dict() for user in users.items],
+                **cursor_meta(users)
+            }), 200
+        
+        users = query.order_by(User.created_at.desc(), User.id.desc()).paginate(
+            page=page, per_page=per_page, error_out=False,
+            count=include_total(default=True)
         )
         
         return jsonify({
@@ -247,15 +395,17 @@ def get_all_users():
             'current_page': page
         }), 200
         
-    except Exception as e:
-        print(f"Admin get users error: {e}")
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception:
+        logger.exception("get_all_users failed")
         return jsonify({'error': 'Failed to fetch users'}), 500
 
 @admin_bp.route('/users/<int:user_id>/verify', methods=['POST'])
 @admin_required
 def verify_user(user_id):
     try:
-        user = User.query.get_or_404(user_id)
+        user = db.get_or_404(User, user_id)
         user.verified = True
         db.session.commit()
         
@@ -264,8 +414,8 @@ def verify_user(user_id):
             'user': user.to_dict()
         }), 200
         
-    except Exception as e:
-        print(f"Admin verify user error: {e}")
+    except Exception:
+        logger.exception("verify_user failed")
         db.session.rollback()
         return jsonify({'error': 'Failed to verify user'}), 500
 
@@ -282,9 +432,19 @@ def get_all_reviews_admin():
             Property, Review.property_id == Property.id
         ).join(
             User, Review.user_id == User.id
-        ).order_by(Review.created_at.desc())
+        )
         
-        results = query.paginate(page=page, per_page=per_page, error_out=False)
+        if cursor_requested():
+            results = keyset_paginate(
+                query, Review.created_at, Review.id,
+                cursor=request.args.get('cursor'), per_page=per_page,
+                with_total=include_total(), key=lambda row: (row[0].created_at, row[0].id)
+            )
+        else:
+            results = query.order_by(Review.created_at.desc(), Review.id.desc()).paginate(
+                page=page, per_page=per_page, error_out=False,
+                count=include_total(default=True)
+            )
         
         # Format response
         reviews = []
@@ -296,6 +456,9 @@ def get_all_reviews_admin():
             review_dict['user_email'] = user.email
             reviews.append(review_dict)
         
+        if cursor_requested():
+            return jsonify({'reviews': reviews, **cursor_meta(results)}), 200
+        
         return jsonify({
             'reviews': reviews,
             'total': results.total,
@@ -303,21 +466,26 @@ def get_all_reviews_admin():
             'current_page': page
         }), 200
         
-    except Exception as e:
-        print(f"Admin get reviews error: {e}")
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception:
+        logger.exception("get_all_reviews_admin failed")
         return jsonify({'error': 'Failed to fetch reviews'}), 500
 
 @admin_bp.route('/reviews/<int:review_id>', methods=['DELETE'])
 @admin_required
 def delete_review(review_id):
     try:
-        review = Review.query.get_or_404(review_id)
+        review = db.get_or_404(Review, review_id)
+        Property.apply_review_ratings(review, sign=-1)
+        HelpfulVote.query.filter_by(review_id=review_id).delete()
         db.session.delete(review)
         db.session.commit()
+        response_cache.invalidate(*property_tags(review.property_id))
         
         return jsonify({'message': 'Review deleted successfully'}), 200
         
-    except Exception as e:
-        print(f"Admin delete review error: {e}")
+    except Exception:
+        logger.exception("delete_review failed")
         db.session.rollback()
         return jsonify({'error': 'Failed to delete review'}), 500
\ No newline at end of file
@@ -1,13 +1,16 @@
+import logging
 from flask import Blueprint, request, jsonify
 from flask_mail import Mail, Message
 import secrets
 from datetime import datetime, timedelta
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from app import db
+from flask_jwt_extended import create_access_token, jwt_required, current_user
+from app import db, rate_limiter
 from app.models import User
+from app.utils.passwords import PasswordHasherBusy
 import re
 
 auth_bp = Blueprint('auth', __name__)
+logger = logging.getLogger(__name__)
 
 def is_valid_university_email(email):
     """Check if email is from Wits or UJ with proper student number format"""
@@ -28,6 +31,7 @@ def is_valid_university_email(email):
     return True
 
 @auth_bp.route('/login', methods=['POST', 'OPTIONS'])
+@rate_limiter.limit('login')
 def login():
     if request.method == 'OPTIONS':
         return '', 200
@@ -42,11 +46,10 @@ def login():
         user = User.query.filter_by(email=email).first()
         
         if user and user.check_password(data['password']):
-            # Create JWT token with proper subject (sub) field
-            access_token = create_access_token(
-                identity=str(user.id),  # Convert to string
-                additional_claims={'sub': str(user.id)}  # Add subject explicitly
-            )
+            # Subject is str(user.id), with is_admin/university/verified claims
+            access_token = create_access_token(identity=user)
+            # Saves a hash upgraded by check_password
+            db.session.commit()
             return jsonify({
                 'access_token': access_token,
                 'user': user.to_dict()
@@ -54,18 +57,22 @@ def login():
         
         return jsonify({'error': 'Invalid credentials'}), 401
         
-    except Exception as e:
-        print(f"Login error: {e}")
+    except PasswordHasherBusy:
+        return jsonify({'error': 'Too many login attempts right now, please try again'}), 503
+    except Exception:
+        logger.exception("login failed")
         return jsonify({'error': 'Login failed'}), 500
 
 @auth_bp.route('/register', methods=['POST', 'OPTIONS'])
+@rate_limiter.limit('register')
 def register():
     if request.method == 'OPTIONS':
         return '', 200
         
     try:
         data = request.get_json()
-        print(f"Register attempt with data: {data}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Register attempt", extra={'data': data})
         
         # Validation
         if not data.get('email') or not data.get('password') or not data.get('name'):
@@ -100,24 +107,25 @@ def register():
         
         return jsonify({'message': 'Registration successful.'}), 201
         
-    except Exception as e:
-        print(f"Registration error: {e}")
+    except PasswordHasherBusy:
+        return jsonify({'error': 'Too many registrations right now, please try again'}), 503
+    except Exception:
+        logger.exception("register failed")
         return jsonify({'error': 'Registration failed'}), 500
 
 @auth_bp.route('/profile', methods=['GET'])
 @jwt_required()
 def get_profile():
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = db.session.get(User, current_user.id)
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
         return jsonify({'user': user.to_dict()}), 200
         
-    except Exception as e:
-        print(f"Profile error: {e}")
+    except Exception:
+        logger.exception("get_profile failed")
         return jsonify({'error': 'Failed to get profile'}), 500
     
     @auth_bp.route('/forgot-password', methods=['POST'])
@@ -151,8 +159,8 @@ def get_profile():
             
             return jsonify({'message': 'Password reset email sent'}), 200
             
-        except Exception as e:
-            print(f"Forgot password error: {e}")
+        except Exception:
+            logger.exception("forgot_password failed")
             return jsonify({'error': 'Failed to process request'}), 500
 
     @auth_bp.route('/reset-password', methods=['POST'])
@@ -178,6 +186,6 @@ def get_profile():
             
             return jsonify({'message': 'Password reset successful'}), 200
             
-        except Exception as e:
-            print(f"Reset password error: {e}")
+        except Exception:
+            logger.exception("reset_password failed")
             return jsonify({'error': 'Failed to reset password'}), 500
\ No newline at end of file
@@ -0,0 +1,20 @@
+import re
+from flask import Blueprint, abort, send_from_directory
+from app import image_store
+
+images_bp = Blueprint('images', __name__)
+
+# Stored originals and finished renditions only, never a partial write
+_NAME_RE = re.compile(r'^(?P<hash>[0-9a-f]{64})(-\w+)?\.(jpg|jpeg|png|gif|webp)$')
+
+@images_bp.route('/<prefix>/<filename>', methods=['GET'])
+def serve_image(prefix, filename):
+    match = _NAME_RE.match(filename)
+    if not match or match.group('hash')[:2] != prefix:
+        abort(404)
+    
+    # The name is the content hash, so a given URL never changes
+    response = send_from_directory(image_store.root, f'{prefix}/{filename}', max_age=31536000)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
@@ -1,15 +1,24 @@
+import logging
 from flask import Blueprint, request, jsonify
-from app import db
+from app import db, response_cache
 from app.models import Property
+from app.utils.conditional import conditional
+from app.utils.pagination import (
+    InvalidCursor, cursor_meta, cursor_requested, include_total, keyset_paginate
+)
+from app.utils.search import search_properties
+from app.utils.serializers import Fieldset, InvalidFieldset, serialize_properties
 
 properties_bp = Blueprint('properties', __name__)
+logger = logging.getLogger(__name__)
 
 # Handle both with and without trailing slash
 @properties_bp.route('', methods=['GET'])
 @properties_bp.route('/', methods=['GET'])
+@response_cache.cached('properties', tables=('property', 'property_image'))
+@conditional('property', 'property_image')
 def get_properties():
     try:
-        print("=== Properties API Called ===")
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 12, type=int)
         university = request.args.get('university')
@@ -17,22 +26,22 @@ def get_properties():
         min_price = request.args.get('min_price', type=int)
         max_price = request.args.get('max_price', type=int)
         search = request.args.get('search')
+        # ?fields=id,name&include=images,rating_summary
+        fieldset = Fieldset.from_args(request.args)
         
-        print(f"Filters received: university={university}, type={property_type}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Properties requested", extra={'filters': request.args.to_dict()})
         
-        # Start with approved properties only
-        query = Property.query.filter_by(approved=True)
-        initial_count = query.count()
-        print(f"Initial approved properties: {initial_count}")
+        # Start with approved properties only, reading just the columns the
+        # response needs (created_at is the cursor key)
+        query = Property.query.filter_by(approved=True).options(fieldset.load_only('created_at'))
         
         # Apply filters
         if university and university != 'all':
             query = query.filter((Property.university == university) | (Property.university == 'both'))
-            print(f"After university filter ({university}): {query.count()}")
         
         if property_type and property_type != 'all':
             query = query.filter(Property.property_type == property_type)
-            print(f"After type filter ({property_type}): {query.count()}")
         
         if min_price:
             query = query.filter(Property.price_min >= min_price)
@@ -41,32 +50,40 @@ def get_properties():
             query = query.filter(Property.price_max <= max_price)
         
         if search:
-            search_term = f"%{search}%"
-            query = query.filter(
-                (Property.name.ilike(search_term)) | 
-                (Property.address.ilike(search_term))
+            # Full-text match, ordered by relevance
+            query = search_properties(query, search)
+        
+        if cursor_requested():
+            # Keyset pagination, newest first; total only on request
+            properties = keyset_paginate(
+                query, Property.created_at, Property.id,
+                cursor=request.args.get('cursor'), per_page=per_page,
+                with_total=include_total()
             )
-        
-        final_count = query.count()
-        print(f"Final query count: {final_count}")
-        
-        # Get paginated results
-        properties = query.paginate(page=page, per_page=per_page, error_out=False)
-        
-        result = {
-            'properties': [prop.to_dict() for prop in properties.items],
-            'total': properties.total,
-            'pages': properties.pages,
-            'current_page': page
-        }
-        
-        print(f"Returning {len(result['properties'])} properties")
+            result = {
+                'properties': serialize_properties(properties.items, fieldset=fieldset),
+                **cursor_meta(properties)
+            }
+        else:
+            # Get paginated results
+            properties = query.paginate(
+                page=page, per_page=per_page, error_out=False,
+                count=include_total(default=True)
+            )
+            result = {
+                'properties': serialize_properties(properties.items, fieldset=fieldset),
+                'total': properties.total,
+                'pages': properties.pages,
+                'current_page': page
+            }
+        
+        logger.debug("Returning %d properties", len(result['properties']))
         return jsonify(result), 200
         
+    except (InvalidCursor, InvalidFieldset) as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        print(f"ERROR in get_properties: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("get_properties failed")
         return jsonify({'error': str(e)}), 500
 
 @properties_bp.route('/test', methods=['GET'])
@@ -245,15 +262,24 @@ def debug_commit():
         return jsonify({'error': str(e)}), 500
     
 @properties_bp.route('/<int:property_id>', methods=['GET'])
+@response_cache.cached('property:{property_id}', tables=('property', 'property_image'))
+@conditional('property', 'property_image')
 def get_property(property_id):
     try:
-        property = Property.query.get_or_404(property_id)
+        fieldset = Fieldset.from_args(request.args)
+        property = Property.query.options(fieldset.load_only('approved')).filter(
+            Property.id == property_id
+        ).first_or_404()
         
         if not property.approved:
             return jsonify({'error': 'Property not found'}), 404
         
-        return jsonify({'property': property.to_dict()}), 200
+        return jsonify({
+            'property': serialize_properties([property], rendition='detail', fieldset=fieldset)[0]
+        }), 200
         
-    except Exception as e:
-        print(f"Error fetching property {property_id}: {e}")
+    except InvalidFieldset as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception:
+        logger.exception("get_property failed for property %s", property_id)
         return jsonify({'error': 'Property not found'}), 404
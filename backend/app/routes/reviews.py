@@ -1,13 +1,45 @@
+import logging
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy import or_
-from app import db
-from app.models import Review, Property, User
+from flask_jwt_extended import jwt_required, current_user
+from sqlalchemy.exc import IntegrityError
+from app import db, rate_limiter, response_cache
+from app.models import Review, Property, User, HelpfulVote
+from app.utils.conditional import conditional
+from app.utils.pagination import (
+    InvalidCursor, cursor_meta, cursor_requested, include_total, keyset_paginate
+)
+from app.utils.cache import property_tags
+from app.utils.search import search_reviews
 
 reviews_bp = Blueprint('reviews', __name__)
+logger = logging.getLogger(__name__)
+
+def _paginate_reviews(query, page, per_page):
+    """Page a (Review, ...) query by cursor when one is given, else by page number"""
+    if cursor_requested():
+        return keyset_paginate(
+            query, Review.created_at, Review.id,
+            cursor=request.args.get('cursor'), per_page=per_page,
+            with_total=include_total(), key=lambda row: (row[0].created_at, row[0].id)
+        )
+    return query.paginate(
+        page=page, per_page=per_page, error_out=False,
+        count=include_total(default=True)
+    )
+
+def _pagination_meta(results, page):
+    if cursor_requested():
+        return cursor_meta(results)
+    return {
+        'total': results.total,
+        'total_pages': results.pages,
+        'current_page': page
+    }
 
 @reviews_bp.route('', methods=['GET'])
 @reviews_bp.route('/', methods=['GET'])
+@response_cache.cached('reviews', tables=('review', 'property', 'user'))
+@conditional('review', 'property', 'user')
 def get_all_reviews():
     try:
         page = request.args.get('page', 1, type=int)
@@ -16,7 +48,8 @@ def get_all_reviews():
         min_rating = request.args.get('min_rating', type=int)
         search = request.args.get('search')
         
-        print(f"Debug: Fetching reviews with filters - university: {university}, min_rating: {min_rating}, search: {search}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Reviews requested", extra={'filters': request.args.to_dict()})
         
         # Base query - get all reviews with property and user info
         query = db.session.query(Review, Property, User).join(
@@ -36,23 +69,14 @@ def get_all_reviews():
             query = query.filter(Review.overall_rating >= min_rating)
         
         if search:
-            search_term = f"%{search}%"
-            query = query.filter(
-                or_(
-                    Property.name.ilike(search_term),  # Use 'name' not 'title'
-                    Review.review_text.ilike(search_term)
-                )
-            )
-        
-        # Order by newest first
-        query = query.order_by(Review.created_at.desc())
+            # Full-text match on the review and its property, most relevant first
+            query = search_reviews(query, search)
         
-        # Get total count before pagination
-        total_count = query.count()
-        print(f"Debug: Total reviews found: {total_count}")
+        # Order by newest first (after relevance when searching)
+        query = query.order_by(Review.created_at.desc(), Review.id.desc())
         
         # Paginate
-        results = query.paginate(page=page, per_page=per_page, error_out=False)
+        results = _paginate_reviews(query, page, per_page)
         
         # Format response
         reviews = []
@@ -76,8 +100,8 @@ def get_all_reviews():
                     'recommend': review.recommend,
                     'anonymous': review.anonymous,
                     'helpful_count': review.helpful_count or 0,
-                    'created_at': review.created_at.isoformat() if review.created_at else None,
-                    'updated_at': review.updated_at.isoformat() if review.updated_at else None
+                    'created_at': review.created_at,
+                    'updated_at': review.updated_at
                 }
                 
                 # Add property info
@@ -97,25 +121,25 @@ def get_all_reviews():
                 reviews.append(review_dict)
                 
             except Exception as e:
-                print(f"Error processing review {review.id}: {e}")
+                logger.warning("Skipping review %s: %s", review.id, e)
                 continue
         
-        print(f"Debug: Successfully processed {len(reviews)} reviews")
+        logger.debug("Returning %d reviews", len(reviews))
         
         return jsonify({
             'reviews': reviews,
-            'total': results.total,
-            'total_pages': results.pages,
-            'current_page': page
+            **_pagination_meta(results, page)
         }), 200
         
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        print(f"Error fetching all reviews: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("get_all_reviews failed")
         return jsonify({'error': 'Failed to fetch reviews', 'details': str(e)}), 500
 
 @reviews_bp.route('/property/<int:property_id>', methods=['GET'])
+@response_cache.cached('property_reviews:{property_id}', tables=('review', 'property', 'user'))
+@conditional('review', 'property', 'user')
 def get_property_reviews(property_id):
     """Get reviews for a specific property"""
     try:
@@ -123,7 +147,7 @@ def get_property_reviews(property_id):
         per_page = request.args.get('per_page', 12, type=int)
         
         # Check if property exists
-        property_obj = Property.query.get_or_404(property_id)
+        property_obj = db.get_or_404(Property, property_id)
         
         # Get reviews for this property
         query = db.session.query(Review, User).join(
@@ -131,10 +155,10 @@ def get_property_reviews(property_id):
         ).filter(Review.property_id == property_id)
         
         # Order by newest first
-        query = query.order_by(Review.created_at.desc())
+        query = query.order_by(Review.created_at.desc(), Review.id.desc())
         
         # Paginate
-        results = query.paginate(page=page, per_page=per_page, error_out=False)
+        results = _paginate_reviews(query, page, per_page)
         
         # Format response
         reviews = []
@@ -158,8 +182,8 @@ def get_property_reviews(property_id):
                     'recommend': review.recommend,
                     'anonymous': review.anonymous,
                     'helpful_count': review.helpful_count or 0,
-                    'created_at': review.created_at.isoformat() if review.created_at else None,
-                    'updated_at': review.updated_at.isoformat() if review.updated_at else None
+                    'created_at': review.created_at,
+                    'updated_at': review.updated_at
                 }
                 
                 # Add user info (respecting anonymity)
@@ -175,41 +199,41 @@ def get_property_reviews(property_id):
                 reviews.append(review_dict)
                 
             except Exception as e:
-                print(f"Error processing review {review.id}: {e}")
+                logger.warning("Skipping review %s: %s", review.id, e)
                 continue
         
         return jsonify({
             'reviews': reviews,
-            'total': results.total,
-            'total_pages': results.pages,
-            'current_page': page,
+            **_pagination_meta(results, page),
             'property': {
                 'id': property_obj.id,
                 'name': property_obj.name
             }
         }), 200
         
-    except Exception as e:
-        print(f"Error fetching property reviews: {e}")
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception:
+        logger.exception("get_property_reviews failed")
         return jsonify({'error': 'Failed to fetch property reviews'}), 500
 
 @reviews_bp.route('/property/<int:property_id>', methods=['POST'])
 @jwt_required()
+@rate_limiter.limit('create_review', per=('user', 'ip'))
 def create_review(property_id):
     try:
-        print("=== REVIEW REQUEST RECEIVED ===")
-        print(f"Property ID: {property_id}")
-        print(f"Request data: {request.get_json()}")
-        
-        user_id = get_jwt_identity()
+        user_id = current_user.id
         data = request.get_json()
         
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Review submitted", extra={'property_id': property_id, 'user_id': user_id, 'data': data})
+        
         # Validation
         if not data:
             return jsonify({'error': 'No data provided'}), 400
         
         # Check if property exists
-        property_obj = Property.query.get_or_404(property_id)
+        property_obj = db.get_or_404(Property, property_id)
         
         # Check if user already reviewed this property
         existing_review = Review.query.filter_by(
@@ -249,7 +273,9 @@ def create_review(property_id):
         )
         
         db.session.add(review)
+        Property.apply_review_ratings(review)
         db.session.commit()
+        response_cache.invalidate(*property_tags(property_id))
         
         # Return review dict manually
         review_dict = {
@@ -260,7 +286,7 @@ def create_review(property_id):
             'review_text': review.review_text,
             'recommend': review.recommend,
             'anonymous': review.anonymous,
-            'created_at': review.created_at.isoformat() if review.created_at else None
+            'created_at': review.created_at
         }
         
         return jsonify({
@@ -268,33 +294,86 @@ def create_review(property_id):
             'review': review_dict
         }), 201
         
-    except Exception as e:
-        print(f"Error creating review: {e}")
+    except Exception:
+        logger.exception("create_review failed for property %s", property_id)
         db.session.rollback()
         return jsonify({'error': 'Failed to create review'}), 500
 
 @reviews_bp.route('/<int:review_id>/helpful', methods=['POST'])
 @jwt_required()
+@rate_limiter.limit('mark_helpful', per=('user', 'ip'))
 def mark_helpful(review_id):
     try:
-        review = Review.query.get_or_404(review_id)
-        review.helpful_count = (review.helpful_count or 0) + 1
+        user_id = current_user.id
+        review = db.get_or_404(Review, review_id)
+        
+        # The unique (user_id, review_id) key rejects a second vote, even
+        # when two clicks race each other
+        db.session.add(HelpfulVote(user_id=user_id, review_id=review_id))
+        try:
+            db.session.flush()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({'error': 'You have already marked this review as helpful'}), 400
+        
+        # Increment in SQL so concurrent votes can't overwrite each other
+        Review.query.filter_by(id=review_id).update(
+            {Review.helpful_count: db.func.coalesce(Review.helpful_count, 0) + 1},
+            synchronize_session=False
+        )
         db.session.commit()
+        response_cache.invalidate('reviews', f'property_reviews:{review.property_id}')
         
         return jsonify({
             'message': 'Review marked as helpful',
             'helpful_count': review.helpful_count
         }), 200
         
-    except Exception as e:
-        print(f"Error marking review helpful: {e}")
+    except Exception:
+        logger.exception("mark_helpful failed")
+        db.session.rollback()
         return jsonify({'error': 'Failed to mark review as helpful'}), 500
+
+@reviews_bp.route('/helpful-status', methods=['POST'])
+@jwt_required()
+def get_helpful_status():
+    """Which of the given reviews the current user has marked as helpful"""
+    try:
+        user_id = current_user.id
+        data = request.get_json(silent=True) or {}
+        review_ids = data.get('review_ids')
+        
+        if not isinstance(review_ids, list):
+            return jsonify({'error': 'review_ids must be a list'}), 400
+        
+        try:
+            review_ids = {int(review_id) for review_id in review_ids}
+        except (TypeError, ValueError):
+            return jsonify({'error': 'review_ids must be integers'}), 400
+        
+        if len(review_ids) > 100:
+            return jsonify({'error': 'At most 100 review ids per request'}), 400
+        
+        marked = []
+        if review_ids:
+            # One lookup on the (user_id, review_id) unique index for the whole page
+            rows = db.session.query(HelpfulVote.review_id).filter(
+                HelpfulVote.user_id == user_id,
+                HelpfulVote.review_id.in_(review_ids)
+            ).all()
+            marked = sorted(row[0] for row in rows)
+        
+        return jsonify({'marked_reviews': marked}), 200
+        
+    except Exception:
+        logger.exception("get_helpful_status failed")
+        return jsonify({'error': 'Failed to fetch helpful status'}), 500
     
 @reviews_bp.route('/user/stats', methods=['GET'])
 @jwt_required()
 def get_user_review_stats():
     try:
-        user_id = get_jwt_identity()
+        user_id = current_user.id
         
         # Get user's reviews
         user_reviews = Review.query.filter_by(user_id=user_id).all()
@@ -315,14 +394,14 @@ def get_user_review_stats():
         # Get recent reviews with property info
         recent_reviews = []
         for review in user_reviews[-3:]:  # Get last 3 reviews
-            property_obj = Property.query.get(review.property_id)
+            property_obj = db.session.get(Property, review.property_id)
             recent_reviews.append({
                 'id': review.id,
                 'property_name': property_obj.name if property_obj else 'Unknown Property',
                 'property_id': review.property_id,
                 'overall_rating': review.overall_rating,
                 'review_text': review.review_text[:100] + '...' if len(review.review_text) > 100 else review.review_text,
-                'created_at': review.created_at.isoformat() if review.created_at else None,
+                'created_at': review.created_at,
                 'helpful_count': review.helpful_count or 0
             })
         
@@ -335,6 +414,6 @@ def get_user_review_stats():
             'recent_reviews': recent_reviews
         }), 200
         
-    except Exception as e:
-        print(f"Error fetching user review stats: {e}")
+    except Exception:
+        logger.exception("get_user_review_stats failed")
         return jsonify({'error': 'Failed to fetch review stats'}), 500
\ No newline at end of file
@@ -0,0 +1,239 @@
+"""In-process caching: a thread-safe LRU with TTL, and a response cache
+for public GET endpoints built on it.
+
+The response cache is per process. Writes invalidate the entries they
+affect by tag in the worker that handled them. Views that name the tables
+they read also key their entries on those tables' table_version markers,
+so a commit in any worker (or script) makes other workers' copies
+unreachable on their next request; views without tables can serve an
+older copy from another worker for up to the TTL.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import request, make_response
+
+
+class LRUCache:
+    """Thread-safe LRU mapping with a TTL and optional total size cap"""
+
+    def __init__(self, max_entries=1024, ttl=60, max_bytes=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, key, value, size=0):
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (time.monotonic() + self.ttl, size, value)
+            self._bytes += size
+            self.on_add(key, value)
+            while len(self._data) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._data):
+                self._remove(key)
+
+    def _remove(self, key):
+        # Caller holds the lock
+        _, size, value = self._data.pop(key)
+        self._bytes -= size
+        self.on_remove(key, value)
+
+    def on_add(self, key, value):
+        """Hook for subclasses; called with the lock held"""
+
+    def on_remove(self, key, value):
+        """Hook for subclasses; called with the lock held"""
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._data),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+class CachedResponse:
+    __slots__ = ('body', 'status', 'headers', 'tags', 'variants')
+
+    def __init__(self, body, status, headers, tags):
+        self.body = body
+        self.status = status
+        self.headers = headers
+        self.tags = tags
+        # encoding -> compressed body, filled in by app.utils.compression;
+        # not counted against max_bytes (they are a fraction of the body)
+        self.variants = {}
+
+
+class _ResponseStore(LRUCache):
+    """LRU of CachedResponse that keeps a tag -> keys index for invalidation"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._tags = {}
+        self.generation = 0
+
+    def put(self, key, value, size, generation):
+        # A write committed while this response was being built; it may
+        # already be stale, so don't keep it
+        with self._lock:
+            if generation == self.generation:
+                self.set(key, value, size)
+
+    def invalidate(self, tags):
+        with self._lock:
+            self.generation += 1
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    if key in self._data:
+                        self._remove(key)
+
+    def on_add(self, key, value):
+        for tag in value.tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+    def on_remove(self, key, value):
+        for tag in value.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+def property_tags(property_id):
+    """Every cache tag whose payload includes data about one property"""
+    return ('properties', f'property:{property_id}', 'reviews', f'property_reviews:{property_id}')
+
+
+class ResponseCache:
+    """Caches whole 200 responses of GET views, keyed on path and query args.
+
+    Views opt in with @response_cache.cached('tag', 'other:{kwarg}'); tags
+    may reference the view's URL arguments. Write paths call
+    invalidate(...) with the tags they affect once they have committed.
+    tables=('property', ...) adds those tables' change markers to the key
+    (one primary-key lookup per request, the same one @conditional does).
+    """
+
+    def __init__(self, app=None):
+        self._store = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('RESPONSE_CACHE_ENABLED', True)
+        app.config.setdefault('RESPONSE_CACHE_TTL', 60)
+        app.config.setdefault('RESPONSE_CACHE_MAX_ENTRIES', 2048)
+        app.config.setdefault('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024)
+
+        self.enabled = app.config['RESPONSE_CACHE_ENABLED']
+        self._store = _ResponseStore(
+            max_entries=app.config['RESPONSE_CACHE_MAX_ENTRIES'],
+            ttl=app.config['RESPONSE_CACHE_TTL'],
+            max_bytes=app.config['RESPONSE_CACHE_MAX_BYTES']
+        )
+        app.extensions['response_cache'] = self
+
+    @staticmethod
+    def make_key(tables=()):
+        # Normalize: ignore a trailing slash and the order of query args
+        path = request.path.rstrip('/') or '/'
+        args = sorted(request.args.items(multi=True))
+        key = path + '?' + '&'.join(f'{k}={v}' for k, v in args)
+        if tables:
+            from app.utils.conditional import current_versions
+            versions = current_versions(tables)
+            key += '|' + ','.join(f'{table}:{version}' for table, (version, _) in zip(tables, versions))
+        return key
+
+    def cached(self, *tags, tables=()):
+        def decorator(f):
+            @wraps(f)
+            def decorated_function(*args, **kwargs):
+                if not self.enabled or request.method != 'GET':
+                    return f(*args, **kwargs)
+
+                key = self.make_key(tables)
+                generation = self._store.generation
+                entry = self._store.get(key)
+                if entry is not None:
+                    response = make_response(entry.body, entry.status, entry.headers)
+                    response.headers['X-Cache'] = 'HIT'
+                    response.compressed_variants = entry.variants
+                    # A cached ETag can answer a revalidation directly
+                    return response.make_conditional(request)
+
+                response = make_response(f(*args, **kwargs))
+                if response.status_code == 200 and not response.is_streamed:
+                    body = response.get_data()
+                    headers = [
+                        (name, value) for name, value in response.headers.items()
+                        if name not in ('Content-Length', 'Set-Cookie')
+                    ]
+                    entry_tags = tuple(tag.format(**kwargs) for tag in tags)
+                    entry = CachedResponse(body, response.status_code, headers, entry_tags)
+                    self._store.put(key, entry, len(body), generation)
+                    response.compressed_variants = entry.variants
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return decorated_function
+        return decorator
+
+    def invalidate(self, *tags):
+        if self._store is not None:
+            self._store.invalidate(tags)
+
+    def clear(self):
+        if self._store is not None:
+            self._store.clear()
+
+    def stats(self):
+        if self._store is None:
+            return {}
+        return self._store.stats()
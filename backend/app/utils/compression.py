@@ -0,0 +1,100 @@
+"""gzip/brotli response compression with Accept-Encoding negotiation.
+
+Runs as an after_request hook on text-like responses of at least
+COMPRESSION_MIN_SIZE bytes. Brotli is preferred when the client accepts
+it and the brotli package is installed, gzip otherwise.
+
+Responses served from the response cache come with the cache entry's
+variants dict attached (response.compressed_variants). The first request
+for an encoding compresses the body and stores the result there, so every
+later hit for the same cached version is sent as stored bytes without
+compressing again.
+
+A compressed response's ETag is made weak: the bytes differ per encoding
+but the content is the same, and If-None-Match uses weak comparison.
+"""
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+DEFAULT_MIMETYPES = (
+    'application/json', 'text/html', 'text/plain', 'text/csv', 'text/css',
+    'application/javascript', 'image/svg+xml',
+)
+
+
+class Compression:
+    def __init__(self, app=None):
+        self.enabled = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESSION_ENABLED', True)
+        app.config.setdefault('COMPRESSION_MIN_SIZE', 1024)
+        app.config.setdefault('COMPRESSION_GZIP_LEVEL', 6)
+        app.config.setdefault('COMPRESSION_BROTLI_QUALITY', 5)
+        app.config.setdefault('COMPRESSION_MIMETYPES', DEFAULT_MIMETYPES)
+        app.extensions['compression'] = self
+
+        self.enabled = app.config['COMPRESSION_ENABLED']
+        self.min_size = app.config['COMPRESSION_MIN_SIZE']
+        self.gzip_level = app.config['COMPRESSION_GZIP_LEVEL']
+        self.brotli_quality = app.config['COMPRESSION_BROTLI_QUALITY']
+        self.mimetypes = frozenset(app.config['COMPRESSION_MIMETYPES'])
+        self.encodings = ('br', 'gzip') if brotli is not None else ('gzip',)
+        app.after_request(self._after_request)
+
+    def compress(self, body, encoding):
+        if encoding == 'br':
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def negotiate(self):
+        """The best encoding the client accepts, or None"""
+        accepted = request.accept_encodings
+        best, best_quality = None, 0
+        for encoding in self.encodings:
+            quality = accepted[encoding]
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def _after_request(self, response):
+        if not self.enabled or response.mimetype not in self.mimetypes:
+            return response
+        # Whether or not this one gets compressed, caches must key on it
+        response.vary.add('Accept-Encoding')
+
+        if (response.status_code < 200 or response.status_code in (204, 206, 304)
+                or response.direct_passthrough or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or 'no-transform' in response.headers.get('Cache-Control', '')):
+            return response
+
+        encoding = self.negotiate()
+        if encoding is None:
+            return response
+        body = response.get_data()
+        if len(body) < self.min_size:
+            return response
+
+        variants = getattr(response, 'compressed_variants', None)
+        compressed = variants.get(encoding) if variants is not None else None
+        if compressed is None:
+            compressed = self.compress(body, encoding)
+            if variants is not None:
+                variants[encoding] = compressed
+        if len(compressed) >= len(body):
+            return response
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
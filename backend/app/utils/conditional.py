@@ -0,0 +1,145 @@
+"""Conditional GET support driven by table-level change markers.
+
+Every insert/update/delete on a tracked table bumps its row in
+table_version (via triggers, so scripts and bulk statements count too).
+A view decorated with @conditional('property', ...) derives a strong ETag
+from those markers with one primary-key lookup and answers If-None-Match
+with 304 before doing any of its own work.
+
+There is no Last-Modified: HTTP dates have one-second resolution, so a
+client revalidating with If-Modified-Since would get a stale 304 after a
+write in the same second as its last fetch. The ETag changes with every
+write.
+"""
+import hashlib
+from functools import wraps
+from flask import request, make_response
+from sqlalchemy import event, text
+from app import db
+
+TRACKED_TABLES = ('property', 'property_image', 'review', 'user')
+
+
+def _sqlite_ddl():
+    statements = []
+    for table in TRACKED_TABLES:
+        statements.append(
+            f"INSERT OR IGNORE INTO table_version (table_name, version, updated_at) "
+            f"VALUES ('{table}', 0, CURRENT_TIMESTAMP)"
+        )
+        for action in ('INSERT', 'UPDATE', 'DELETE'):
+            statements.append(
+                f"""CREATE TRIGGER IF NOT EXISTS {table}_version_{action.lower()}
+                AFTER {action} ON "{table}" BEGIN
+                    UPDATE table_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+                    WHERE table_name = '{table}';
+                END"""
+            )
+    return statements
+
+
+def _postgres_ddl():
+    statements = [
+        """CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE table_version SET version = version + 1, updated_at = (now() AT TIME ZONE 'utc')
+            WHERE table_name = TG_TABLE_NAME;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql"""
+    ]
+    for table in TRACKED_TABLES:
+        statements.append(
+            f"INSERT INTO table_version (table_name, version, updated_at) "
+            f"VALUES ('{table}', 0, now() AT TIME ZONE 'utc') ON CONFLICT DO NOTHING"
+        )
+        statements.append(f'DROP TRIGGER IF EXISTS {table}_version ON "{table}"')
+        statements.append(
+            f'CREATE TRIGGER {table}_version AFTER INSERT OR UPDATE OR DELETE ON "{table}" '
+            f'FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()'
+        )
+    return statements
+
+
+def install_change_markers(connection):
+    """Seed table_version and create the triggers that bump it"""
+    dialect = connection.dialect.name
+
+    if dialect == 'sqlite':
+        statements = _sqlite_ddl()
+    elif dialect == 'postgresql':
+        statements = _postgres_ddl()
+    else:
+        return
+
+    for statement in statements:
+        connection.execute(text(statement))
+
+
+def drop_change_markers(connection):
+    dialect = connection.dialect.name
+
+    for table in TRACKED_TABLES:
+        if dialect == 'sqlite':
+            for action in ('insert', 'update', 'delete'):
+                connection.execute(text(f"DROP TRIGGER IF EXISTS {table}_version_{action}"))
+        elif dialect == 'postgresql':
+            connection.execute(text(f'DROP TRIGGER IF EXISTS {table}_version ON "{table}"'))
+
+    if dialect == 'postgresql':
+        connection.execute(text("DROP FUNCTION IF EXISTS bump_table_version()"))
+
+
+def _after_create(target, connection, **kw):
+    install_change_markers(connection)
+
+
+event.listen(db.metadata, 'after_create', _after_create)
+
+
+def current_versions(tables):
+    """(version, updated_at) for each table, in one query"""
+    from app.models import TableVersion
+
+    rows = TableVersion.query.filter(TableVersion.table_name.in_(tables)).all()
+    found = {row.table_name: (row.version, row.updated_at) for row in rows}
+    return [found.get(table, (0, None)) for table in tables]
+
+
+def _not_modified(etag):
+    # Weak comparison: a compressed copy carries W/"<etag>"
+    return bool(request.if_none_match) and request.if_none_match.contains_weak(etag)
+
+
+def conditional(*tables):
+    """Emit an ETag for a GET view and short-circuit with 304.
+
+    `tables` are every table the view's payload is built from; the ETag
+    is derived from their change markers plus the request path and args.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if request.method != 'GET':
+                return f(*args, **kwargs)
+
+            versions = current_versions(tables)
+            args_key = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+            fingerprint = f"{request.path.rstrip('/')}?{args_key}|" + ','.join(
+                f'{table}:{version}' for table, (version, _) in zip(tables, versions)
+            )
+            etag = hashlib.sha1(fingerprint.encode()).hexdigest()
+
+            if _not_modified(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            # Let browsers keep the payload but revalidate it every time
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return decorated_function
+    return decorator
@@ -0,0 +1,147 @@
+"""Full-table exports as CSV or NDJSON, streamed.
+
+Rows are read as plain tuples (no ORM objects) in primary-key order with
+yield_per, which on Postgres uses a server-side cursor, and encoded into
+text chunks of a few hundred rows. Only one chunk is ever held in memory,
+so an export of 5M reviews needs no more than one of 1k.
+
+Property exports use the importer's column names, so a CSV export can be
+edited and fed back through import_properties.
+"""
+import csv
+import io
+import json
+import logging
+import time
+from datetime import date, datetime
+from sqlalchemy import select
+from app import db
+from app.utils.importer import IMPORT_FIELDS
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class ExportError(ValueError):
+    pass
+
+
+def _properties():
+    from app.models import Property
+    names = ('id',) + IMPORT_FIELDS + ('rating_sum', 'rating_count', 'created_at')
+    return select(*(getattr(Property, name) for name in names)).order_by(Property.id)
+
+
+def _users():
+    # Never the password hash or reset token
+    from app.models import User
+    names = ('id', 'email', 'name', 'university', 'year_of_study', 'faculty',
+             'verified', 'is_admin', 'created_at')
+    return select(*(getattr(User, name) for name in names)).order_by(User.id)
+
+
+def _reviews():
+    from app.models import Property, Review, User
+    names = ('id', 'property_id', 'user_id', 'overall_rating', 'value_rating', 'location_rating',
+             'safety_rating', 'cleanliness_rating', 'management_rating', 'facilities_rating',
+             'review_text', 'pros', 'cons', 'recommend', 'anonymous', 'helpful_count',
+             'created_at', 'updated_at')
+    return select(
+        *(getattr(Review, name) for name in names),
+        Property.name.label('property_name'),
+        User.email.label('user_email'),
+    ).join(Property, Review.property_id == Property.id) \
+     .join(User, Review.user_id == User.id) \
+     .order_by(Review.id)
+
+
+EXPORTS = {
+    'properties': _properties,
+    'users': _users,
+    'reviews': _reviews,
+}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+class ExportStats:
+    def __init__(self, kind, fmt):
+        self.kind = kind
+        self.format = fmt
+        self.rows = 0
+        self.bytes = 0
+        self._started = time.perf_counter()
+        self.seconds = 0.0
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self._started
+
+    def to_dict(self):
+        return {
+            'kind': self.kind,
+            'format': self.format,
+            'rows': self.rows,
+            'bytes': self.bytes,
+            'seconds': round(self.seconds, 3),
+            'rows_per_second': round(self.rows / self.seconds) if self.seconds else 0,
+        }
+
+
+def export_chunks(kind, fmt='ndjson', chunk_rows=1000, stats=None):
+    """Yield the export of `kind` as text chunks of about `chunk_rows` rows.
+
+    Must be consumed inside an app context (stream_with_context for a
+    response). Pass an ExportStats to get the row count and timing once
+    the generator is exhausted; it is also logged.
+    """
+    if kind not in EXPORTS:
+        raise ExportError(f'unknown export {kind!r}; use one of {", ".join(EXPORTS)}')
+    if fmt not in FORMATS:
+        raise ExportError(f'unsupported format {fmt!r}; use csv or ndjson')
+    return _generate(kind, fmt, chunk_rows, stats or ExportStats(kind, fmt))
+
+
+def _generate(kind, fmt, chunk_rows, stats):
+    statement = EXPORTS[kind]().execution_options(yield_per=chunk_rows)
+    result = db.session.execute(statement)
+    columns = list(result.keys())
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == 'csv' else None
+    dumps = json.JSONEncoder(default=_json_default, ensure_ascii=False).encode
+
+    try:
+        if writer is not None:
+            writer.writerow(columns)
+        for partition in result.partitions():
+            if writer is not None:
+                writer.writerows(partition)
+            else:
+                for row in partition:
+                    buffer.write(dumps(dict(zip(columns, row))))
+                    buffer.write('\n')
+            stats.rows += len(partition)
+
+            chunk = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            stats.bytes += len(chunk)
+            yield chunk
+
+        chunk = buffer.getvalue()
+        if chunk:
+            stats.bytes += len(chunk)
+            yield chunk
+    finally:
+        result.close()
+        # End the read transaction rather than hold it until teardown
+        db.session.rollback()
+        stats.finish()
+        logger.info("Exported %s %s rows", stats.rows, kind, extra={'export': stats.to_dict()})
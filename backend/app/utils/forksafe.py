@@ -0,0 +1,48 @@
+"""Per-process resources that have to be recreated after fork.
+
+Threads don't survive fork. A gunicorn worker forked from a preloaded
+master inherits the master's objects, but not the threads behind them.
+It also inherits executors whose workers are gone and queue listeners
+that nothing drains. ProcessLocal holds such a resource for the process
+that made it. The first get() in any other process builds a fresh one.
+"""
+import os
+import threading
+
+
+class ProcessLocal:
+    def __init__(self, factory):
+        self.factory = factory
+        self._value = None
+        self._pid = None
+        self._lock = threading.Lock()
+        # A lock held by another thread at fork time would stay held in the child
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset_lock)
+
+    def _reset_lock(self):
+        self._lock = threading.Lock()
+
+    def get(self):
+        """This process's value, built by factory() on first use"""
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._value = self.factory()
+                    self._pid = os.getpid()
+        return self._value
+
+    def current(self):
+        """True if this process has built its value (and it wasn't reset)"""
+        return self._pid == os.getpid()
+
+    def peek(self):
+        """This process's value, or None without building it"""
+        return self._value if self.current() else None
+
+    def reset(self):
+        """Forget the value; the next get() builds a new one. Loops started
+        by the factory can poll current() to notice and stop."""
+        with self._lock:
+            self._value = None
+            self._pid = None
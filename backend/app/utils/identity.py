@@ -0,0 +1,165 @@
+"""Who the bearer of a JWT is, without a database round trip per request.
+
+Access tokens carry the user id as a string subject plus the claims that
+authorization needs (is_admin, university, verified), so a route can
+decide from the token alone. Because claims live as long as the token,
+checks that must see a revoked admin flag or a deleted account go through
+the identity cache instead: a per-process TTL/LRU of those same fields
+keyed by user id, filled from one narrow query on a miss and emptied for
+a user as soon as a commit creates, changes or deletes their row. Other
+workers see the change once their entry expires (IDENTITY_CACHE_TTL).
+"""
+from collections import namedtuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.utils.cache import LRUCache
+
+CLAIM_FIELDS = ('is_admin', 'university', 'verified')
+
+Identity = namedtuple('Identity', ('id',) + CLAIM_FIELDS)
+
+# Cached for ids with no user row, so a token for a deleted account
+# doesn't query on every request either
+_UNKNOWN = object()
+
+
+def identity_claims(user):
+    """The JWT claims for `user`"""
+    return {
+        'is_admin': bool(user.is_admin),
+        'university': user.university,
+        'verified': bool(user.verified),
+    }
+
+
+class _IdentityStore(LRUCache):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.generation = 0
+
+    def put(self, key, value, generation):
+        # A user row changed while this one was being loaded; the value
+        # may predate the change, so don't keep it
+        with self._lock:
+            if generation == self.generation:
+                self.set(key, value)
+
+    def invalidate(self, keys):
+        with self._lock:
+            self.generation += 1
+            for key in keys:
+                self.delete(key)
+
+
+class IdentityCache:
+    def __init__(self, app=None, jwt=None):
+        self._store = None
+        self.enabled = False
+        if app is not None:
+            self.init_app(app, jwt)
+
+    def init_app(self, app, jwt):
+        app.config.setdefault('IDENTITY_CACHE_ENABLED', True)
+        app.config.setdefault('IDENTITY_CACHE_TTL', 30)
+        app.config.setdefault('IDENTITY_CACHE_MAX_ENTRIES', 10000)
+
+        self.enabled = app.config['IDENTITY_CACHE_ENABLED']
+        self._store = _IdentityStore(
+            max_entries=app.config['IDENTITY_CACHE_MAX_ENTRIES'],
+            ttl=app.config['IDENTITY_CACHE_TTL']
+        )
+        app.extensions['identity_cache'] = self
+
+        # create_access_token(identity=user) stores str(user.id) as the
+        # subject and adds the claims; flask_jwt_extended.current_user is
+        # the cached Identity, and a token whose user is gone gets a 401
+        jwt.user_identity_loader(self._token_subject)
+        jwt.additional_claims_loader(self._token_claims)
+        jwt.user_lookup_loader(self._lookup)
+
+        if not event.contains(Session, 'after_flush', _collect_changed_users):
+            event.listen(Session, 'after_flush', _collect_changed_users)
+            event.listen(Session, 'after_commit', self._after_commit)
+            event.listen(Session, 'after_rollback', _forget_changed_users)
+
+    @staticmethod
+    def _token_subject(identity):
+        return str(getattr(identity, 'id', identity))
+
+    @staticmethod
+    def _token_claims(identity):
+        if hasattr(identity, 'is_admin'):
+            return identity_claims(identity)
+        return {}
+
+    def _lookup(self, jwt_header, jwt_data):
+        return self.get(jwt_data['sub'])
+
+    def get(self, user_id):
+        """Identity for `user_id` (int or token subject), or None"""
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            return None
+        if not self.enabled:
+            return _load(user_id)
+
+        generation = self._store.generation
+        identity = self._store.get(user_id)
+        if identity is None:
+            identity = _load(user_id) or _UNKNOWN
+            self._store.put(user_id, identity, generation)
+        return None if identity is _UNKNOWN else identity
+
+    def invalidate(self, *user_ids):
+        if self._store is not None:
+            self._store.invalidate(user_ids)
+
+    def clear(self):
+        if self._store is not None:
+            self._store.clear()
+
+    def stats(self):
+        if self._store is None:
+            return {}
+        return self._store.stats()
+
+    def _after_commit(self, session):
+        changed = session.info.pop('identity_changed', None)
+        if changed:
+            self.invalidate(*changed)
+
+
+def _load(user_id):
+    from app import db
+    from app.models import User
+
+    row = db.session.query(
+        User.id, *(getattr(User, field) for field in CLAIM_FIELDS)
+    ).filter(User.id == user_id).first()
+    if row is None:
+        return None
+    return Identity(row[0], bool(row[1]), row[2], bool(row[3]))
+
+
+def _collect_changed_users(session, flush_context):
+    # Still the pre-flush state here, attribute history included
+    from app.models import User
+
+    changed = session.info.setdefault('identity_changed', set())
+    # A new row can take an id cached as _UNKNOWN (SQLite reuses rowids)
+    for obj in session.new:
+        if isinstance(obj, User) and obj.id is not None:
+            changed.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, User) and obj.id is not None:
+            changed.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, User) and obj.id is not None:
+            attrs = inspect(obj).attrs
+            if any(getattr(attrs, field).history.has_changes() for field in CLAIM_FIELDS):
+                changed.add(obj.id)
+
+
+def _forget_changed_users(session):
+    session.info.pop('identity_changed', None)
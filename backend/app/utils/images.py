@@ -0,0 +1,241 @@
+"""Uploaded property photos: content-addressed storage and renditions.
+
+An upload is streamed to disk while it is hashed and stored once under
+its SHA-256 (<root>/<first two hex digits>/<hash>.<ext>), so the same
+photo uploaded twice is one file. A background thread pool then writes
+the renditions next to it, resized to fit IMAGE_RENDITIONS and re-encoded
+without metadata (so no EXIF GPS). Rendition file names contain the
+hash, which is what makes it safe to serve them as immutable.
+
+Resizing needs Pillow. Without it uploads are still stored and every
+rendition URL points at the original.
+
+IMAGE_WORKERS=0 generates renditions inline in the request (tests,
+scripts).
+"""
+import hashlib
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from flask import has_request_context, request
+from app.utils.forksafe import ProcessLocal
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - optional dependency
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RENDITIONS = {'listing': 480, 'detail': 1280, 'full': 2048}
+
+# Leading bytes of the formats accepted for upload
+_SIGNATURES = (
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+)
+
+
+class ImageUploadError(ValueError):
+    pass
+
+
+class ImageTooLarge(ImageUploadError):
+    pass
+
+
+def sniff_extension(head):
+    """File extension for the first bytes of an image, or None"""
+    for signature, extension in _SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+class ImageStore:
+    def __init__(self, app=None):
+        self.root = None
+        self.workers = 0
+        self._executor = ProcessLocal(self._new_pool)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('IMAGE_STORAGE_DIR', os.path.join(app.instance_path, 'images'))
+        app.config.setdefault('IMAGE_BASE_URL', None)
+        app.config.setdefault('IMAGE_MAX_BYTES', 10 * 1024 * 1024)
+        app.config.setdefault('IMAGE_RENDITIONS', DEFAULT_RENDITIONS)
+        app.config.setdefault('IMAGE_FORMAT', 'webp')
+        app.config.setdefault('IMAGE_QUALITY', 80)
+        app.config.setdefault('IMAGE_WORKERS', 2)
+        app.extensions['image_store'] = self
+
+        self.app = app
+        self.root = app.config['IMAGE_STORAGE_DIR']
+        self.base_url = app.config['IMAGE_BASE_URL']
+        self.max_bytes = app.config['IMAGE_MAX_BYTES']
+        self.renditions = dict(app.config['IMAGE_RENDITIONS'])
+        self.format = app.config['IMAGE_FORMAT'].lower()
+        self.quality = app.config['IMAGE_QUALITY']
+        self.workers = app.config['IMAGE_WORKERS']
+
+    @property
+    def can_resize(self):
+        return Image is not None
+
+    # Paths and URLs
+
+    def relative_path(self, content_hash, extension, rendition=None):
+        name = f'{content_hash}-{rendition}' if rendition else content_hash
+        return f'{content_hash[:2]}/{name}.{extension}'
+
+    def path(self, relative):
+        return os.path.join(self.root, *relative.split('/'))
+
+    def rendition_path(self, content_hash, original_extension, rendition):
+        """Relative path of a rendition, or of the original without Pillow"""
+        if not self.can_resize:
+            return self.relative_path(content_hash, original_extension)
+        return self.relative_path(content_hash, self.format, rendition)
+
+    def renditions_for(self, content_hash, extension):
+        """{rendition name: absolute URL}"""
+        return {
+            name: self.url(self.rendition_path(content_hash, extension, name))
+            for name in self.renditions
+        }
+
+    def url(self, relative):
+        base = self.base_url
+        if base is None:
+            base = request.host_url if has_request_context() else '/'
+        return base.rstrip('/') + '/api/images/' + relative
+
+    # Storing uploads
+
+    def save(self, stream):
+        """Store an uploaded file; returns (content_hash, extension).
+
+        Raises ImageTooLarge past IMAGE_MAX_BYTES and ImageUploadError for
+        anything that isn't a JPEG, PNG, GIF or WebP.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        head = b''
+        fd, temp_path = tempfile.mkstemp(dir=self.root, suffix='.upload')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                while True:
+                    block = stream.read(64 * 1024)
+                    if not block:
+                        break
+                    size += len(block)
+                    if size > self.max_bytes:
+                        raise ImageTooLarge(f'image is larger than {self.max_bytes // (1024 * 1024)} MB')
+                    if len(head) < 16:
+                        head += block[:16]
+                    digest.update(block)
+                    out.write(block)
+
+            extension = sniff_extension(head)
+            if extension is None:
+                raise ImageUploadError('expected a JPEG, PNG, GIF or WebP image')
+            if self.can_resize:
+                try:
+                    with Image.open(temp_path) as image:
+                        image.verify()
+                except Exception:
+                    raise ImageUploadError('the image file is damaged or truncated')
+
+            content_hash = digest.hexdigest()
+            final_path = self.path(self.relative_path(content_hash, extension))
+            if os.path.exists(final_path):
+                os.remove(temp_path)
+            else:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                os.replace(temp_path, final_path)
+            return content_hash, extension
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    # Renditions
+
+    def render(self, content_hash, extension):
+        """Write any missing renditions; returns the original's (width, height)"""
+        if not self.can_resize:
+            return None, None
+        source = self.path(self.relative_path(content_hash, extension))
+        with Image.open(source) as original:
+            image = ImageOps.exif_transpose(original)
+            size = image.size
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+            for name, edge in self.renditions.items():
+                target = self.path(self.relative_path(content_hash, self.format, name))
+                if os.path.exists(target):
+                    continue
+                rendition = image.copy()
+                rendition.thumbnail((edge, edge), Image.LANCZOS)
+                if self.format in ('jpg', 'jpeg') and rendition.mode != 'RGB':
+                    rendition = rendition.convert('RGB')
+                # Written under a temporary name so a half-written file is
+                # never served as the (immutable) rendition
+                partial = target + '.partial'
+                rendition.save(partial, format='JPEG' if self.format == 'jpg' else self.format.upper(),
+                               quality=self.quality)
+                os.replace(partial, target)
+        return size
+
+    def submit(self, image_id):
+        """Generate renditions for a PropertyImage row, in the pool or inline"""
+        if not self.workers:
+            self._process(image_id)
+            return
+        self._executor.get().submit(self._process_in_context, image_id)
+
+    def _new_pool(self):
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='image-renditions')
+
+    def _process_in_context(self, image_id):
+        with self.app.app_context():
+            try:
+                self._process(image_id)
+            except Exception:
+                logger.exception("Rendering image %s failed", image_id)
+
+    def _process(self, image_id):
+        from app import db, response_cache
+        from app.models import PropertyImage
+        from app.utils.cache import property_tags
+
+        image = db.session.get(PropertyImage, image_id)
+        if image is None or not image.content_hash:
+            return
+        try:
+            width, height = self.render(image.content_hash, image.extension)
+        except Exception:
+            logger.exception("Could not render image %s (%s)", image_id, image.content_hash)
+            image.status = 'failed'
+        else:
+            image.width, image.height = width, height
+            image.status = 'ready'
+        db.session.commit()
+        # Drops this worker's entries now; the commit bumped property_image's
+        # marker, which the cached property views key on, so other workers
+        # stop serving the 'processing' payload on their next request
+        response_cache.invalidate(*property_tags(image.property_id))
+
+    def shutdown(self):
+        executor = self._executor.peek()
+        if executor is not None:
+            executor.shutdown(wait=True)
+        self._executor.reset()
@@ -0,0 +1,291 @@
+"""Bulk property import/sync.
+
+Listings are read from CSV or JSON Lines as a stream and processed in
+chunks. Each row is validated, then matched to an existing property on
+its natural key, (name, address), compared exactly. New rows are
+inserted and changed rows updated with one executemany per chunk; rows
+whose content already matches the database are not written at all, so
+ids (and the reviews pointing at them) stay put.
+
+Only the columns present in a row are compared and written: a JSONL
+line with just name, address and price_min changes the price and
+nothing else.
+"""
+import csv
+import io
+import json
+import time
+from sqlalchemy import insert, update
+from app import db, response_cache
+from app.utils.cache import property_tags
+
+KEY_FIELDS = ('name', 'address')
+IMPORT_FIELDS = (
+    'name', 'address', 'property_type', 'price_min', 'price_max', 'description',
+    'amenities', 'contact_info', 'university', 'nsfas_accredited', 'approved',
+)
+INT_FIELDS = ('price_min', 'price_max')
+BOOL_FIELDS = ('nsfas_accredited', 'approved')
+MAX_REPORTED_ERRORS = 100
+
+_TRUE = {'1', 'true', 'yes', 'y', 'on'}
+_FALSE = {'0', 'false', 'no', 'n', 'off', ''}
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def read_rows(stream, fmt):
+    """Yield (line_number, dict) from a text stream of CSV or JSONL"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt in ('jsonl', 'ndjson'):
+        for line_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_number, ImportFormatError(f'invalid JSON: {e}')
+                continue
+            yield line_number, row if isinstance(row, dict) else ImportFormatError('expected a JSON object')
+    else:
+        raise ImportFormatError(f'unsupported format {fmt!r}; use csv or jsonl')
+
+
+def text_stream(binary, encoding='utf-8-sig'):
+    """Wrap an uploaded binary stream for read_rows() without reading it all"""
+    return io.TextIOWrapper(binary, encoding=encoding, newline='')
+
+
+def format_for(filename, default='csv'):
+    if filename and filename.lower().endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    if filename and filename.lower().endswith('.csv'):
+        return 'csv'
+    return default
+
+
+def _to_int(value):
+    if isinstance(value, bool):
+        raise ValueError
+    if isinstance(value, int):
+        return value
+    return int(float(str(value).replace(',', '').strip()))
+
+
+def _to_bool(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ValueError
+
+
+def _amenities(value):
+    # Stored as a JSON list string, like the admin API writes it
+    if isinstance(value, list):
+        return json.dumps(value)
+    text = str(value).strip()
+    if text.startswith('['):
+        items = json.loads(text)
+        if not isinstance(items, list):
+            raise ValueError
+        return json.dumps(items)
+    # CSV cells: "WiFi|Laundry|Gym"
+    return json.dumps([item.strip() for item in text.split('|') if item.strip()])
+
+
+def clean_row(raw):
+    """Validated column values from one input row, or raise ValueError
+    with every problem found"""
+    errors = []
+    row = {}
+
+    for field in IMPORT_FIELDS:
+        if field not in raw:
+            continue
+        value = raw[field]
+        if isinstance(value, str) and not value.strip():
+            value = None
+
+        try:
+            if value is None:
+                pass
+            elif field in INT_FIELDS:
+                value = _to_int(value)
+                if value < 0:
+                    raise ValueError
+            elif field in BOOL_FIELDS:
+                value = _to_bool(value)
+            elif field == 'amenities':
+                value = _amenities(value)
+            else:
+                value = str(value)
+        except (ValueError, TypeError):
+            errors.append(f'{field}: invalid value {raw[field]!r}')
+            continue
+        row[field] = value
+
+    for field in KEY_FIELDS:
+        if not row.get(field):
+            errors.append(f'{field} is required')
+
+    if row.get('price_min') is not None and row.get('price_max') is not None \
+            and row['price_min'] > row['price_max']:
+        errors.append('price_min is greater than price_max')
+
+    if errors:
+        raise ValueError('; '.join(errors))
+    return row
+
+
+class ImportSummary:
+    def __init__(self, dry_run):
+        self.dry_run = dry_run
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.rejected = 0
+        self.chunks = 0
+        self.errors = []
+        self.changed_ids = set()
+        self._started = time.perf_counter()
+
+    def reject(self, line_number, message):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line_number, 'error': message})
+
+    def to_dict(self):
+        return {
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'unchanged': self.unchanged,
+            'rejected': self.rejected,
+            'errors': self.errors,
+            'chunks': self.chunks,
+            'dry_run': self.dry_run,
+            'seconds': round(time.perf_counter() - self._started, 3),
+        }
+
+
+def _existing(Property, keys):
+    """{(name, address): {column: value}} for the properties in keys"""
+    columns = [getattr(Property, field) for field in IMPORT_FIELDS]
+    names = list({name for name, _ in keys})
+    rows = db.session.query(Property.id, *columns).filter(Property.name.in_(names))
+    existing = {}
+    for row in rows:
+        values = dict(zip(('id',) + IMPORT_FIELDS, row))
+        key = (values['name'], values['address'])
+        if key in keys:
+            existing[key] = values
+    return existing
+
+
+def _apply_chunk(chunk, summary, written=None):
+    """Upsert one chunk. `written` (dry runs) maps each key to the values
+    earlier chunks would have stored, since their changes were rolled back."""
+    from app.models import Property
+
+    # Last row wins when a key repeats inside one chunk
+    by_key = {}
+    for line_number, row in chunk:
+        key = (row['name'], row['address'])
+        if key in by_key:
+            summary.reject(by_key[key][0], f'superseded by line {line_number} with the same name and address')
+        by_key[key] = (line_number, row)
+
+    existing = _existing(Property, set(by_key))
+    if written:
+        for key in by_key.keys() & written.keys():
+            existing[key] = {**existing.get(key, {}), **written[key]}
+
+    inserts, updates = [], []
+    for key, (line_number, row) in by_key.items():
+        current = existing.get(key)
+        if current is None:
+            if not row.get('property_type'):
+                summary.reject(line_number, 'property_type is required for a new property')
+            else:
+                inserts.append(row)
+                if written is not None:
+                    written[key] = {'id': None, **row}
+            continue
+        changes = {field: value for field, value in row.items() if current.get(field) != value}
+        if changes:
+            updates.append({'id': current['id'], **changes})
+            if current['id'] is not None:
+                summary.changed_ids.add(current['id'])
+            if written is not None:
+                written[key] = {**current, **changes}
+        else:
+            summary.unchanged += 1
+
+    if inserts:
+        # Columns missing from a row get the model defaults
+        db.session.execute(insert(Property), inserts)
+    # A dry run's "updates" to rows it only pretended to insert have no id
+    stored = [row for row in updates if row['id'] is not None]
+    if stored:
+        # Bulk UPDATE by primary key; rows with the same changed columns
+        # share one executemany
+        db.session.execute(update(Property), stored)
+
+    summary.inserted += len(inserts)
+    summary.updated += len(updates)
+    summary.chunks += 1
+
+
+def import_properties(rows, chunk_size=500, dry_run=False):
+    """Upsert listings from `rows` and return an ImportSummary.
+
+    `rows` yields dicts or (line_number, dict) pairs (see read_rows()).
+    Each chunk is committed on its own; with dry_run nothing is kept but
+    the counts are the same as for a real run (the dry run remembers what
+    it would have written, so it holds every changed row in memory).
+    """
+    summary = ImportSummary(dry_run)
+    chunk = []
+    written = {} if dry_run else None
+
+    def flush():
+        try:
+            _apply_chunk(chunk, summary, written)
+            if dry_run:
+                db.session.rollback()
+            else:
+                db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        chunk.clear()
+
+    for index, item in enumerate(rows, 1):
+        line_number, raw = item if isinstance(item, tuple) else (index, item)
+        if isinstance(raw, Exception):
+            summary.reject(line_number, str(raw))
+            continue
+        try:
+            chunk.append((line_number, clean_row(raw)))
+        except ValueError as e:
+            summary.reject(line_number, str(e))
+            continue
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+
+    if not dry_run and (summary.inserted or summary.updated):
+        tags = {'properties'}
+        for property_id in summary.changed_ids:
+            tags.update(property_tags(property_id))
+        response_cache.invalidate(*tags)
+    return summary
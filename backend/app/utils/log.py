@@ -0,0 +1,185 @@
+"""Structured, non-blocking logging.
+
+Records from the app's loggers ("app" and every "app.*" module logger)
+go through a QueueHandler: the request thread only formats the message
+and puts the record on an in-memory queue, and a QueueListener thread
+does the actual writing to stderr. Each record carries the request id
+(taken from an incoming X-Request-ID header or generated, and echoed back
+on the response) and the milliseconds since the request started.
+
+LOG_FORMAT=json writes one JSON object per line; LOG_FORMAT=text keeps
+a human-readable line for local development.
+
+Values under keys that look like secrets (password, token, ...) in
+extra= fields are replaced with "[redacted]" before a record is queued,
+so a request body can be logged as it came in.
+"""
+import atexit
+import copy
+import json
+import logging
+import queue
+import time
+import uuid
+from logging.handlers import QueueHandler, QueueListener
+from flask import g, has_request_context, request
+from app.utils.forksafe import ProcessLocal
+
+# Attributes every LogRecord has; anything else came in through extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+SENSITIVE_KEYS = ('password', 'token', 'secret', 'authorization')
+
+
+def redact(value):
+    """Copy of value with anything under a sensitive-looking key masked"""
+    if isinstance(value, dict):
+        return {
+            key: '[redacted]' if any(word in str(key).lower() for word in SENSITIVE_KEYS) else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return value
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamps records with the current request's id, path and elapsed time.
+
+    Attached to the QueueHandler, so it runs in the thread that logged.
+    """
+
+    def filter(self, record):
+        if has_request_context():
+            record.request_id = g.get('request_id', '-')
+            started = g.get('request_started')
+            record.duration_ms = round((time.perf_counter() - started) * 1000, 2) if started else None
+            record.method = request.method
+            record.path = request.path
+        else:
+            record.request_id = '-'
+            record.duration_ms = None
+            record.method = None
+            record.path = None
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    converter = time.gmtime
+
+    def format(self, record):
+        entry = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S') + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', '-'),
+            'duration_ms': getattr(record, 'duration_ms', None),
+        }
+        if getattr(record, 'path', None):
+            entry['method'] = record.method
+            entry['path'] = record.path
+
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and key not in entry and key not in ('method', 'path'):
+                entry[key] = value
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('[%(asctime)s] %(levelname)s %(name)s %(context)s: %(message)s')
+
+    def format(self, record):
+        duration = getattr(record, 'duration_ms', None)
+        record.context = f"[{getattr(record, 'request_id', '-')}" + (f' +{duration}ms]' if duration is not None else ']')
+        return super().format(record)
+
+
+class _ContextQueueHandler(QueueHandler):
+    def prepare(self, record):
+        # Resolve the message and traceback here (args may be mutable or
+        # unsafe to touch from another thread) but keep the traceback apart
+        # from the message and keep every extra= field on the record
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and isinstance(value, (dict, list, tuple)):
+                setattr(record, key, redact(value))
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class StructuredLogging:
+    def __init__(self, app=None):
+        self.queue = queue.SimpleQueue()
+        self._listener = ProcessLocal(self._start_listener)
+        self._handler = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('LOG_LEVEL', 'INFO')
+        app.config.setdefault('LOG_FORMAT', 'json')
+        app.extensions['structured_logging'] = self
+
+        output = logging.StreamHandler()
+        if app.config['LOG_FORMAT'] == 'json':
+            output.setFormatter(JSONFormatter())
+        else:
+            output.setFormatter(TextFormatter())
+        self._output = output
+
+        if self._handler is None:
+            self._handler = _ContextQueueHandler(self.queue)
+            self._handler.addFilter(RequestContextFilter())
+
+        # app.logger is the "app" logger, parent of every app.* module logger
+        from flask.logging import default_handler
+        logger = app.logger
+        logger.removeHandler(default_handler)
+        if self._handler not in logger.handlers:
+            logger.addHandler(self._handler)
+        logger.setLevel(app.config['LOG_LEVEL'])
+        logger.propagate = False
+
+        self._restart_listener()
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    def _restart_listener(self):
+        # The output handler may have changed; start over with it
+        self._stop_listener()
+        self._listener.get()
+
+    def _start_listener(self):
+        listener = QueueListener(self.queue, self._output, respect_handler_level=True)
+        listener.start()
+        atexit.register(self._stop_listener)
+        return listener
+
+    def _stop_listener(self):
+        # Flush whatever is still queued (at exit, or before a restart)
+        listener = self._listener.peek()
+        if listener is not None:
+            listener.stop()
+            self._listener.reset()
+
+    def _start_request(self):
+        # Each worker starts its own listener on its first request
+        self._listener.get()
+        g.request_started = time.perf_counter()
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+
+    def _finish_request(self, response):
+        if 'request_id' in g:
+            response.headers['X-Request-ID'] = g.request_id
+        return response
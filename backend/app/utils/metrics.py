@@ -0,0 +1,392 @@
+"""Request and connection pool metrics in Prometheus text format.
+
+Every thread records into its own shard (plain dicts and lists that only
+that thread writes), so the request path takes no locks; a scrape sums
+the shards, folding those of threads that have exited into one set of
+retired totals, so a server that keeps replacing its threads (the dev
+server starts one per request) doesn't keep a shard for every thread it
+ever ran. Each worker also writes its totals to METRICS_DIR/<pid>.json
+every METRICS_FLUSH_INTERVAL seconds. A scrape flushes the answering
+worker first and reads every file, so any worker can answer for the
+whole server. Counters of workers that exit are folded into archive.json
+(see gunicorn.conf.py).
+
+The Prometheus output has one series per worker (worker="<pid>", or
+"archive"). Each one only ever grows, so rate() and sum() in Prometheus
+give correct numbers. Their sum at a single moment does not: another
+worker's file can be up to METRICS_FLUSH_INTERVAL seconds old, and a
+worker being archived can be counted twice for a moment. The JSON
+summary is summed over workers and is approximate for the same reason.
+
+Latency is exported as histograms; p50/p95/p99 come from
+histogram_quantile() in Prometheus, or from /api/metrics?format=json,
+which estimates them from the same buckets.
+"""
+import json
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from flask import g, request
+from app.utils.forksafe import ProcessLocal
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+ARCHIVE_FILE = 'archive.json'
+
+
+def _new_histogram(buckets):
+    # One count per bucket plus +Inf, then sum and count
+    return [0] * (len(buckets) + 1) + [0.0, 0]
+
+
+def _observe(histogram, buckets, value):
+    histogram[bisect_left(buckets, value)] += 1
+    histogram[-2] += value
+    histogram[-1] += 1
+
+
+def _merge_histogram(into, other):
+    for i, value in enumerate(other):
+        into[i] += value
+
+
+def estimate_quantile(histogram, buckets, q):
+    """Linear interpolation inside the bucket holding the q-th quantile"""
+    total = histogram[-1]
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for i, count in enumerate(histogram[:len(buckets) + 1]):
+        if seen + count >= rank and count:
+            lower = buckets[i - 1] if i > 0 else 0.0
+            if i == len(buckets):
+                return lower
+            return lower + (buckets[i] - lower) * (rank - seen) / count
+        seen += count
+    return buckets[-1]
+
+
+class _Shard:
+    __slots__ = ('latency', 'statuses', 'pool_wait', 'in_flight', 'thread')
+
+    def __init__(self, thread):
+        self.latency = {}      # "endpoint\tmethod" -> histogram
+        self.statuses = {}     # "endpoint\tmethod\tstatus" -> count
+        self.pool_wait = _new_histogram(POOL_WAIT_BUCKETS)
+        self.in_flight = 0
+        self.thread = weakref.ref(thread)
+
+    def alive(self):
+        thread = self.thread()
+        return thread is not None and thread.is_alive()
+
+    def snapshot(self):
+        # Copy first: the owning thread may add keys while we read
+        return {
+            'latency': dict(self.latency),
+            'statuses': dict(self.statuses),
+            'pool_wait': list(self.pool_wait),
+            'in_flight': self.in_flight,
+        }
+
+
+def _empty_totals():
+    return {'latency': {}, 'statuses': {}, 'pool_wait': _new_histogram(POOL_WAIT_BUCKETS),
+            'in_flight': 0, 'pool': {}}
+
+
+def _merge_totals(into, other):
+    for key, histogram in other['latency'].items():
+        _merge_histogram(into['latency'].setdefault(key, _new_histogram(LATENCY_BUCKETS)), histogram)
+    for key, count in other['statuses'].items():
+        into['statuses'][key] = into['statuses'].get(key, 0) + count
+    _merge_histogram(into['pool_wait'], other['pool_wait'])
+    into['in_flight'] += other.get('in_flight', 0)
+    for key, value in other.get('pool', {}).items():
+        into['pool'][key] = into['pool'].get(key, 0) + value
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    # Write then rename so readers never see a half-written file
+    tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def archive_process(directory, pid):
+    """Fold an exited worker's counters into archive.json and drop its file.
+
+    Called from the gunicorn master only, so there is a single writer.
+    """
+    path = os.path.join(directory, f'{pid}.json')
+    snapshot = _read_json(path)
+    if snapshot is None:
+        return
+
+    archive = _read_json(os.path.join(directory, ARCHIVE_FILE)) or _empty_totals()
+    # Gauges describe live processes only
+    snapshot['in_flight'] = 0
+    snapshot['pool'] = {}
+    _merge_totals(archive, snapshot)
+    archive['pool'] = {}
+    _write_json(os.path.join(directory, ARCHIVE_FILE), archive)
+    os.remove(path)
+
+
+class Metrics:
+    def __init__(self, app=None, engine=None):
+        self.enabled = False
+        self.directory = None
+        self._local = threading.local()
+        self._shards = []
+        self._retired = _empty_totals()  # counts of exited threads
+        self._shards_lock = threading.Lock()
+        self._engine = None
+        self._flusher = ProcessLocal(self._start_flusher)
+        if app is not None:
+            self.init_app(app, engine)
+
+    def init_app(self, app, engine):
+        app.config.setdefault('METRICS_ENABLED', True)
+        app.config.setdefault('METRICS_DIR', None)
+        app.config.setdefault('METRICS_FLUSH_INTERVAL', 5)
+        app.config.setdefault('METRICS_TOKEN', None)
+        app.extensions['metrics'] = self
+
+        self.enabled = app.config['METRICS_ENABLED']
+        if not self.enabled:
+            return
+
+        self.directory = app.config['METRICS_DIR']
+        self.flush_interval = app.config['METRICS_FLUSH_INTERVAL']
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+        self._engine = engine
+        self._wrap_raw_connection(engine)
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.teardown_request(self._teardown_request)
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = _Shard(threading.current_thread())
+            # Only taken the first time a thread records anything
+            with self._shards_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def _wrap_raw_connection(self, engine):
+        # Every Connection gets its DBAPI connection from raw_connection(),
+        # so timing it measures how long requests wait on the pool.
+        # Wrapping the engine (not the pool) survives engine.dispose().
+        raw_connection = engine.raw_connection
+
+        def timed_raw_connection(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return raw_connection(*args, **kwargs)
+            finally:
+                _observe(self._shard().pool_wait, POOL_WAIT_BUCKETS, time.perf_counter() - started)
+
+        engine.raw_connection = timed_raw_connection
+
+    def _start_request(self):
+        if self.directory:
+            self._flusher.get()
+        g._metrics_started = time.perf_counter()
+        self._shard().in_flight += 1
+
+    def _finish_request(self, response):
+        started = g.get('_metrics_started')
+        if started is None:
+            return response
+
+        shard = self._shard()
+        endpoint = request.endpoint or 'unmatched'
+        key = f'{endpoint}\t{request.method}'
+        histogram = shard.latency.get(key)
+        if histogram is None:
+            histogram = shard.latency[key] = _new_histogram(LATENCY_BUCKETS)
+        _observe(histogram, LATENCY_BUCKETS, time.perf_counter() - started)
+
+        status_key = f'{key}\t{response.status_code}'
+        shard.statuses[status_key] = shard.statuses.get(status_key, 0) + 1
+        return response
+
+    def _teardown_request(self, exc):
+        if g.pop('_metrics_started', None) is not None:
+            self._shard().in_flight -= 1
+
+    def _start_flusher(self):
+        thread = threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True)
+        thread.start()
+        return thread
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            if not self._flusher.current():
+                return
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+    def flush(self):
+        """Write this process's totals to METRICS_DIR/<pid>.json"""
+        if self.directory:
+            _write_json(os.path.join(self.directory, f'{os.getpid()}.json'), self.local_totals())
+
+    def pool_stats(self):
+        pool = self._engine.pool if self._engine is not None else None
+        stats = {}
+        for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+            method = getattr(pool, name, None)
+            if method is not None:
+                # QueuePool reports unused overflow capacity as negative
+                stats[name] = max(method(), 0)
+        return stats
+
+    def _retire_dead_shards(self):
+        # Caller holds _shards_lock; nothing writes a dead thread's shard
+        live = []
+        for shard in self._shards:
+            if shard.alive():
+                live.append(shard)
+            else:
+                snapshot = shard.snapshot()
+                # in_flight is a gauge of running requests, not a counter
+                snapshot['in_flight'] = 0
+                _merge_totals(self._retired, snapshot)
+        self._shards = live
+
+    def local_totals(self):
+        totals = _empty_totals()
+        with self._shards_lock:
+            self._retire_dead_shards()
+            _merge_totals(totals, self._retired)
+            shards = list(self._shards)
+        for shard in shards:
+            _merge_totals(totals, shard.snapshot())
+        totals['pool'] = self.pool_stats()
+        return totals
+
+    def worker_totals(self):
+        """{worker: totals}: a snapshot per worker file (this process's
+        flushed first) and the archive of exited workers"""
+        if not self.directory:
+            return {str(os.getpid()): self.local_totals()}
+
+        self.flush()
+        workers = {}
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith('.json'):
+                continue
+            snapshot = _read_json(os.path.join(self.directory, name))
+            if snapshot is not None:
+                worker = 'archive' if name == ARCHIVE_FILE else name[:-len('.json')]
+                workers[worker] = snapshot
+        return workers
+
+    def totals(self):
+        """Every worker's numbers summed (approximate, see the module docstring)"""
+        totals = _empty_totals()
+        for snapshot in self.worker_totals().values():
+            _merge_totals(totals, snapshot)
+        return totals
+
+    def render_prometheus(self):
+        workers = self.worker_totals()
+        lines = []
+
+        lines.append('# HELP http_request_duration_seconds Request latency by endpoint')
+        lines.append('# TYPE http_request_duration_seconds histogram')
+        for worker, totals in workers.items():
+            for key in sorted(totals['latency']):
+                endpoint, method = key.split('\t')
+                labels = f'endpoint="{endpoint}",method="{method}",worker="{worker}"'
+                lines.extend(_histogram_lines('http_request_duration_seconds', labels,
+                                              totals['latency'][key], LATENCY_BUCKETS))
+
+        lines.append('# HELP http_requests_total Responses by endpoint and status code')
+        lines.append('# TYPE http_requests_total counter')
+        for worker, totals in workers.items():
+            for key in sorted(totals['statuses']):
+                endpoint, method, status = key.split('\t')
+                lines.append(f'http_requests_total{{endpoint="{endpoint}",method="{method}",'
+                             f'status="{status}",worker="{worker}"}} {totals["statuses"][key]}')
+
+        # Gauges describe live workers; the archive has none
+        live = {worker: totals for worker, totals in workers.items() if worker != 'archive'}
+
+        lines.append('# HELP http_requests_in_flight Requests currently being handled')
+        lines.append('# TYPE http_requests_in_flight gauge')
+        for worker, totals in live.items():
+            lines.append(f'http_requests_in_flight{{worker="{worker}"}} {totals["in_flight"]}')
+
+        lines.append('# HELP db_pool_checkout_seconds Time spent waiting for a pooled connection')
+        lines.append('# TYPE db_pool_checkout_seconds histogram')
+        for worker, totals in workers.items():
+            lines.extend(_histogram_lines('db_pool_checkout_seconds', f'worker="{worker}"',
+                                          totals['pool_wait'], POOL_WAIT_BUCKETS))
+
+        lines.append('# HELP db_pool_connections Pool connections by state')
+        lines.append('# TYPE db_pool_connections gauge')
+        for worker, totals in live.items():
+            for state in sorted(totals['pool']):
+                lines.append(f'db_pool_connections{{state="{state}",worker="{worker}"}} {totals["pool"][state]}')
+
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """Estimated latency percentiles (ms) and status counts per endpoint"""
+        totals = self.totals()
+        endpoints = {}
+        for key, histogram in totals['latency'].items():
+            entry = {'count': histogram[-1]}
+            for name, q in (('p50_ms', 0.5), ('p95_ms', 0.95), ('p99_ms', 0.99)):
+                value = estimate_quantile(histogram, LATENCY_BUCKETS, q)
+                entry[name] = round(value * 1000, 1) if value is not None else None
+            entry['statuses'] = {}
+            endpoints[key.replace('\t', ' ')] = entry
+
+        for key, count in totals['statuses'].items():
+            endpoint, method, status = key.split('\t')
+            endpoints[f'{endpoint} {method}']['statuses'][status] = count
+
+        wait_p99 = estimate_quantile(totals['pool_wait'], POOL_WAIT_BUCKETS, 0.99)
+        return {
+            'endpoints': endpoints,
+            'in_flight': totals['in_flight'],
+            'pool': totals['pool'],
+            'pool_checkout_p99_ms': round(wait_p99 * 1000, 2) if wait_p99 is not None else None,
+        }
+
+
+def _histogram_lines(name, labels, histogram, buckets):
+    prefix = labels + ',' if labels else ''
+    lines = []
+    cumulative = 0
+    for bound, count in zip(buckets + ('+Inf',), histogram):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+    suffix = f'{{{labels}}}' if labels else ''
+    lines.append(f'{name}_sum{suffix} {histogram[-2]}')
+    lines.append(f'{name}_count{suffix} {histogram[-1]}')
+    return lines
@@ -0,0 +1,110 @@
+"""Keyset (cursor) pagination on (created_at, id).
+
+Instead of OFFSET, each page seeks past the last row of the previous one,
+so page N costs the same as page 1. Cursors are opaque to clients: a
+urlsafe base64 of the last row's sort key.
+
+Rows without a created_at come after all the others, newest id first;
+their cursors carry only the id. A cursor's timestamp is decoded back to
+a datetime and bound through the column's own type, so it is compared in
+the same format the rows were written in.
+"""
+import base64
+import json
+from datetime import datetime
+from flask import request
+from sqlalchemy import tuple_
+
+MAX_PER_PAGE = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at, row_id):
+    if created_at is not None:
+        created_at = created_at.isoformat(timespec='microseconds')
+    payload = json.dumps([created_at, row_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if created_at is not None:
+            created_at = datetime.fromisoformat(created_at)
+        return created_at, int(row_id)
+    except (ValueError, TypeError, json.JSONDecodeError):
+        raise InvalidCursor('Invalid cursor')
+
+
+def cursor_requested():
+    """True when the client asked for cursor pagination (an empty cursor is page 1)"""
+    return 'cursor' in request.args
+
+
+def include_total(default=False):
+    value = request.args.get('include_total')
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes')
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor, total=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.has_more = next_cursor is not None
+        self.total = total
+
+
+def keyset_paginate(query, created_column, id_column, cursor=None, per_page=12,
+                    with_total=False, key=None):
+    """Return one page of query, newest first, seeking past cursor.
+
+    Any ordering already on the query (e.g. search relevance) is replaced,
+    since the cursor only makes sense for a (created_at, id) ordering.
+    `key` pulls (created_at, id) out of a result row; by default the row
+    itself is assumed to be the model instance. per_page is clamped to
+    1..MAX_PER_PAGE.
+    """
+    per_page = max(1, min(per_page, MAX_PER_PAGE))
+    if key is None:
+        key = lambda row: (row.created_at, row.id)
+
+    total = query.order_by(None).count() if with_total else None
+    created_at, row_id = decode_cursor(cursor) if cursor else (None, None)
+
+    def newest_first(q, limit):
+        return q.order_by(None).order_by(created_column.desc(), id_column.desc()).limit(limit).all()
+
+    # Fetch one extra row to find out whether there is another page
+    rows = []
+    if created_at is not None or not cursor:
+        dated = query.filter(created_column.isnot(None))
+        if cursor:
+            dated = dated.filter(tuple_(created_column, id_column) < tuple_(created_at, row_id))
+        rows = newest_first(dated, per_page + 1)
+    if len(rows) <= per_page:
+        # Past the last dated row: the undated ones, by id
+        undated = query.filter(created_column.is_(None))
+        if cursor and created_at is None:
+            undated = undated.filter(id_column < row_id)
+        rows += newest_first(undated, per_page + 1 - len(rows))
+
+    items = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        next_cursor = encode_cursor(*key(items[-1]))
+
+    return KeysetPage(items, next_cursor, total)
+
+
+def cursor_meta(page):
+    """Response fields describing a KeysetPage"""
+    meta = {'next_cursor': page.next_cursor, 'has_more': page.has_more}
+    if page.total is not None:
+        meta['total'] = page.total
+    return meta
@@ -0,0 +1,125 @@
+"""Password hashing off the request threads.
+
+Hashing and verification run in a small process pool, so a burst of
+logins costs a bounded number of cores instead of stalling every request
+thread in the worker. The algorithm and cost come from
+PASSWORD_HASH_METHOD (any werkzeug method string, e.g. "scrypt:32768:8:1"
+or "pbkdf2:sha256:600000"); a successful verify against a hash made with
+other parameters also returns a fresh hash so the caller can store it.
+
+PASSWORD_HASH_WORKERS=0 hashes inline in the calling thread (tests,
+one-off scripts).
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from werkzeug.security import (
+    DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+)
+from app.utils.forksafe import ProcessLocal
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+
+
+class PasswordHasherBusy(RuntimeError):
+    """More hashing requests are queued than PASSWORD_HASH_MAX_PENDING allows"""
+
+
+def canonical_method(method):
+    """Spell out werkzeug's defaults so hashes can be compared by prefix"""
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        defaults = ['32768', '8', '1']
+    elif name == 'pbkdf2':
+        defaults = ['sha256', str(DEFAULT_PBKDF2_ITERATIONS)]
+    else:
+        return method
+    return ':'.join([name] + args + defaults[len(args):])
+
+
+def needs_rehash(pwhash, method):
+    return pwhash.split('$', 1)[0] != method
+
+
+# Module-level so the pool can pickle them by reference
+
+def _hash(password, method):
+    return generate_password_hash(password, method=method)
+
+
+def _verify(password, pwhash, method):
+    if not pwhash or not check_password_hash(pwhash, password):
+        return False, None
+    if needs_rehash(pwhash, method):
+        return True, generate_password_hash(password, method=method)
+    return True, None
+
+
+def _pool_context():
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    # Pool processes fork from a clean single-threaded server instead of
+    # from a worker full of request threads and held locks. The server
+    # imports this module (and so the app package) once up front rather
+    # than the default __main__. Like any spawn/forkserver child, the pool
+    # processes still import the main script as __mp_main__, so scripts
+    # that hash through the pool need an if __name__ == '__main__' guard.
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload([__name__])
+    return context
+
+
+class PasswordHasher:
+    def __init__(self, app=None):
+        self.method = DEFAULT_METHOD
+        self.workers = 0
+        self._executor = ProcessLocal(self._new_pool)
+        self._pending = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+        app.config.setdefault('PASSWORD_HASH_WORKERS', min(os.cpu_count() or 1, 4))
+        app.config.setdefault('PASSWORD_HASH_MAX_PENDING', 64)
+        app.config.setdefault('PASSWORD_HASH_TIMEOUT', 10)
+        app.extensions['password_hasher'] = self
+
+        self.method = canonical_method(app.config['PASSWORD_HASH_METHOD'])
+        self.workers = app.config['PASSWORD_HASH_WORKERS']
+        self.max_pending = app.config['PASSWORD_HASH_MAX_PENDING']
+        self.timeout = app.config['PASSWORD_HASH_TIMEOUT']
+        self._pending = threading.BoundedSemaphore(self.max_pending)
+        self.shutdown()
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=_pool_context())
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+
+        if not self._pending.acquire(timeout=self.timeout):
+            raise PasswordHasherBusy('password hashing queue is full')
+        try:
+            future = self._executor.get().submit(fn, *args)
+        except Exception:
+            self._pending.release()
+            raise
+        future.add_done_callback(lambda _: self._pending.release())
+        return future.result(timeout=self.timeout)
+
+    def hash(self, password):
+        return self._run(_hash, password, self.method)
+
+    def verify(self, password, pwhash):
+        """(matches, new_hash); new_hash is set when the stored hash used
+        other parameters than PASSWORD_HASH_METHOD and should be replaced"""
+        return self._run(_verify, password, pwhash, self.method)
+
+    def shutdown(self):
+        executor = self._executor.peek()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._executor.reset()
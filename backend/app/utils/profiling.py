@@ -0,0 +1,147 @@
+"""Per-request SQL profiling.
+
+Counts the statements each request runs and the time spent in the
+database (via SQLAlchemy's before/after_cursor_execute events), times
+JSON serialization, and reports both with the total in a Server-Timing
+header, which browser dev tools show under the request's Timing tab:
+
+    Server-Timing: db;dur=4.1;desc="6 queries", serialize;dur=0.8, app;dur=2.3, total;dur=7.2
+
+A statement shape that runs more than SQL_REPEAT_WARN_THRESHOLD times in
+one request is logged as a likely N+1.
+"""
+import re
+import time
+from collections import Counter
+from flask import current_app, g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from app.utils.jsonprovider import FastJSONProvider
+
+_WHITESPACE_RE = re.compile(r'\s+')
+# "IN (?, ?, ?)" / "IN (%(id_1)s, %(id_2)s)" differ only by list length
+_PLACEHOLDER_LIST_RE = re.compile(r'\(\s*(?:\?|%\(\w+\)s)(?:\s*,\s*(?:\?|%\(\w+\)s))*\s*\)')
+
+
+def statement_shape(statement):
+    statement = _WHITESPACE_RE.sub(' ', statement).strip()
+    return _PLACEHOLDER_LIST_RE.sub('(?)', statement)
+
+
+class RequestProfile:
+    __slots__ = ('started', 'queries', 'db_time', 'serialize_time', 'shapes')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.shapes = Counter()
+
+
+def current_profile():
+    """The running request's RequestProfile, or None outside a profiled request"""
+    if not has_request_context():
+        return None
+    return g.get('_request_profile')
+
+
+class TimedDumps:
+    """JSON provider mixin that adds dumps() time to the request profile"""
+
+    def dumps(self, obj, **kwargs):
+        profile = current_profile()
+        if profile is None:
+            return super().dumps(obj, **kwargs)
+
+        started = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            profile.serialize_time += time.perf_counter() - started
+
+
+class TimedJSONProvider(TimedDumps, DefaultJSONProvider):
+    pass
+
+
+class TimedFastJSONProvider(TimedDumps, FastJSONProvider):
+    pass
+
+
+def timed_provider(app):
+    """A timing version of app.json, or None if it is already timed or of
+    a kind this doesn't know"""
+    if isinstance(app.json, TimedDumps):
+        return None
+    if isinstance(app.json, FastJSONProvider):
+        return TimedFastJSONProvider(app)
+    if isinstance(app.json, DefaultJSONProvider):
+        return TimedJSONProvider(app)
+    return None
+
+
+class SQLProfiler:
+    def __init__(self, app=None, engine=None):
+        self.enabled = False
+        if app is not None:
+            self.init_app(app, engine)
+
+    def init_app(self, app, engine):
+        app.config.setdefault('SQL_PROFILING_ENABLED', False)
+        app.config.setdefault('SQL_REPEAT_WARN_THRESHOLD', 10)
+        app.extensions['sql_profiler'] = self
+
+        self.enabled = app.config['SQL_PROFILING_ENABLED']
+        self.repeat_threshold = app.config['SQL_REPEAT_WARN_THRESHOLD']
+        if not self.enabled:
+            return
+
+        timed = timed_provider(app)
+        if timed is not None:
+            app.json = timed
+
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    def _start_request(self):
+        g._request_profile = RequestProfile()
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._profile_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        profile = current_profile()
+        if profile is None or context is None:
+            return
+        started = getattr(context, '_profile_started', None)
+        if started is not None:
+            profile.db_time += time.perf_counter() - started
+        profile.queries += 1
+        profile.shapes[statement_shape(statement)] += 1
+
+    def _finish_request(self, response):
+        profile = g.pop('_request_profile', None)
+        if profile is None:
+            return response
+
+        total = time.perf_counter() - profile.started
+        app_time = max(total - profile.db_time - profile.serialize_time, 0.0)
+        response.headers['Server-Timing'] = ', '.join([
+            f'db;dur={profile.db_time * 1000:.1f};desc="{profile.queries} queries"',
+            f'serialize;dur={profile.serialize_time * 1000:.1f}',
+            f'app;dur={app_time * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+        if self.repeat_threshold:
+            for shape, count in profile.shapes.items():
+                if count > self.repeat_threshold:
+                    current_app.logger.warning(
+                        'Possible N+1: %s %s ran the same statement %d times: %s',
+                        request.method, request.path, count, shape
+                    )
+        return response
@@ -0,0 +1,181 @@
+"""Per-process rate limiting with token buckets.
+
+Each limited endpoint has a limit like "10/minute": a bucket holds up to
+10 tokens and refills at 10 per minute, so a burst of 10 goes through and
+after that one request per 6 seconds. Buckets are keyed by client IP and,
+on authenticated routes, by user id; every key a route is limited by must
+have a token left. A rejected request gets a 429 with Retry-After.
+
+Buckets live in a fixed number of shards, each a dict behind its own
+lock, so a check is one hash, one lock and a little arithmetic. A bucket
+that has been idle long enough to refill completely is the same as no
+bucket, and shards drop those on a periodic sweep.
+
+Limits are per worker process, like the response cache: with N gunicorn
+workers a client can get up to N times the configured rate.
+"""
+import math
+import re
+import threading
+import time
+from functools import wraps
+from flask import jsonify, request
+from flask_jwt_extended import get_jwt_identity
+
+_PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+_LIMIT_RE = re.compile(r'^\s*(\d+)\s*/\s*(\d*)\s*(second|minute|hour|day)s?\s*$')
+
+
+def parse_limit(spec):
+    """'10/minute' or '100/15minutes' -> (capacity, tokens per second)"""
+    match = _LIMIT_RE.match(spec or '')
+    if not match:
+        raise ValueError(f'invalid rate limit {spec!r}; expected e.g. "10/minute"')
+    count, multiplier, unit = match.groups()
+    period = int(multiplier or 1) * _PERIODS[unit]
+    return int(count), int(count) / period
+
+
+class _Shard:
+    __slots__ = ('lock', 'buckets', 'next_sweep')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = {}  # key -> [tokens, last refill (monotonic)]
+        self.next_sweep = 0.0
+
+
+class TokenBuckets:
+    """Token buckets for one limit, sharded by key"""
+
+    def __init__(self, capacity, rate, shards=16, max_keys=100000, sweep_interval=60):
+        self.capacity = capacity
+        self.rate = rate
+        # After this long without a request a bucket is full again
+        self.idle_after = capacity / rate
+        self.max_keys_per_shard = max(1, max_keys // shards)
+        self.sweep_interval = sweep_interval
+        self._shards = [_Shard() for _ in range(shards)]
+
+    def take(self, key, now=None):
+        """0.0 if a token was taken, else seconds until one is available"""
+        return self.take_all((key,), now)
+
+    def take_all(self, keys, now=None):
+        """Take a token from every key, or from none of them: 0.0 if each
+        had one, else seconds until the emptiest has one again"""
+        now = time.monotonic() if now is None else now
+        shards = [self._shards[hash(key) % len(self._shards)] for key in keys]
+        # Same order for every caller, so two checks can't deadlock
+        locked = sorted({id(shard): shard for shard in shards}.values(), key=self._shards.index)
+        for shard in locked:
+            shard.lock.acquire()
+        try:
+            for shard in locked:
+                if now >= shard.next_sweep:
+                    self._sweep(shard, now)
+
+            levels = []
+            wait = 0.0
+            for key, shard in zip(keys, shards):
+                bucket = shard.buckets.get(key)
+                tokens = self.capacity if bucket is None else \
+                    min(self.capacity, bucket[0] + (now - bucket[1]) * self.rate)
+                if tokens < 1:
+                    wait = max(wait, (1 - tokens) / self.rate)
+                levels.append((shard, key, bucket, tokens))
+
+            for shard, key, bucket, tokens in levels:
+                if not wait:
+                    shard.buckets[key] = [tokens - 1, now]
+                elif bucket is not None:
+                    bucket[:] = [tokens, now]
+            return wait
+        finally:
+            for shard in reversed(locked):
+                shard.lock.release()
+
+    def _sweep(self, shard, now):
+        # Caller holds the shard lock
+        shard.next_sweep = now + self.sweep_interval
+        idle = [key for key, (_, last) in shard.buckets.items() if now - last >= self.idle_after]
+        for key in idle:
+            del shard.buckets[key]
+        # Still too many keys (e.g. a flood of spoofed addresses): drop the
+        # oldest buckets, which only lets those clients start over
+        overflow = len(shard.buckets) - self.max_keys_per_shard
+        for key in list(shard.buckets)[:max(overflow, 0)]:
+            del shard.buckets[key]
+
+    def __len__(self):
+        return sum(len(shard.buckets) for shard in self._shards)
+
+
+class RateLimiter:
+    """Views opt in with @rate_limiter.limit('login'), or
+    @rate_limiter.limit('create_review', per=('user', 'ip')) below
+    @jwt_required(). Limits come from the RATELIMITS config dict."""
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.limits = {}
+        self.proxy_hops = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('RATELIMIT_ENABLED', True)
+        app.config.setdefault('RATELIMITS', {})
+        app.config.setdefault('RATELIMIT_PROXY_HOPS', 0)
+        app.config.setdefault('RATELIMIT_MAX_KEYS', 100000)
+        app.extensions['rate_limiter'] = self
+
+        self.enabled = app.config['RATELIMIT_ENABLED']
+        self.proxy_hops = app.config['RATELIMIT_PROXY_HOPS']
+        self.limits = {
+            name: TokenBuckets(*parse_limit(spec), max_keys=app.config['RATELIMIT_MAX_KEYS'])
+            for name, spec in app.config['RATELIMITS'].items() if spec
+        }
+
+    def client_ip(self):
+        # Behind N proxies the client is the Nth address from the right of
+        # X-Forwarded-For; anything further left is whatever the client sent
+        if self.proxy_hops:
+            route = request.access_route
+            return route[-self.proxy_hops] if len(route) >= self.proxy_hops else route[0]
+        return request.remote_addr
+
+    def _keys(self, per):
+        for kind in per:
+            if kind == 'user':
+                identity = get_jwt_identity()
+                if identity is not None:
+                    yield f'user:{identity}'
+            elif kind == 'ip':
+                yield f'ip:{self.client_ip()}'
+
+    def check(self, name, per=('ip',)):
+        """Seconds to wait before retrying, or 0.0 if the request may go on"""
+        buckets = self.limits.get(name)
+        if not self.enabled or buckets is None:
+            return 0.0
+        keys = list(self._keys(per))
+        return buckets.take_all(keys) if keys else 0.0
+
+    def limit(self, name, per=('ip',)):
+        def decorator(f):
+            @wraps(f)
+            def decorated_function(*args, **kwargs):
+                if request.method != 'OPTIONS':
+                    wait = self.check(name, per)
+                    if wait:
+                        response = jsonify({'error': 'Too many requests, please try again later'})
+                        response.status_code = 429
+                        response.headers['Retry-After'] = str(math.ceil(wait))
+                        return response
+                return f(*args, **kwargs)
+            return decorated_function
+        return decorator
+
+    def stats(self):
+        return {name: {'buckets': len(buckets)} for name, buckets in self.limits.items()}
@@ -0,0 +1,290 @@
+"""Full-text search over properties and reviews.
+
+SQLite gets FTS5 external-content tables kept in sync by triggers;
+Postgres gets a generated tsvector column with a GIN index. Both are
+installed whenever the schema is created (create_all or the migration)
+and queried through search_properties() / search_reviews(), which join
+the matches onto an existing query and order it by relevance.
+"""
+import re
+from sqlalchemy import event, text
+from app import db
+
+PROPERTY_SEARCH_COLUMNS = ('name', 'address', 'description')
+REVIEW_SEARCH_COLUMNS = ('review_text', 'pros', 'cons')
+
+# bm25 column weights, in the same order as the columns above
+PROPERTY_WEIGHTS = '10.0, 5.0, 1.0'
+REVIEW_WEIGHTS = '5.0, 1.0, 1.0'
+
+# How far a property match fans out into review search results
+MATCHED_PROPERTIES = 10
+REVIEWS_PER_MATCHED_PROPERTY = 50
+
+SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS property_fts USING fts5(
+        name, address, description,
+        content='property', content_rowid='id', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS property_fts_ai AFTER INSERT ON property BEGIN
+        INSERT INTO property_fts(rowid, name, address, description)
+        VALUES (new.id, new.name, new.address, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS property_fts_ad AFTER DELETE ON property BEGIN
+        INSERT INTO property_fts(property_fts, rowid, name, address, description)
+        VALUES ('delete', old.id, old.name, old.address, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS property_fts_au AFTER UPDATE OF name, address, description ON property BEGIN
+        INSERT INTO property_fts(property_fts, rowid, name, address, description)
+        VALUES ('delete', old.id, old.name, old.address, old.description);
+        INSERT INTO property_fts(rowid, name, address, description)
+        VALUES (new.id, new.name, new.address, new.description);
+    END""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS review_fts USING fts5(
+        review_text, pros, cons,
+        content='review', content_rowid='id', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS review_fts_ai AFTER INSERT ON review BEGIN
+        INSERT INTO review_fts(rowid, review_text, pros, cons)
+        VALUES (new.id, new.review_text, new.pros, new.cons);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS review_fts_ad AFTER DELETE ON review BEGIN
+        INSERT INTO review_fts(review_fts, rowid, review_text, pros, cons)
+        VALUES ('delete', old.id, old.review_text, old.pros, old.cons);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS review_fts_au AFTER UPDATE OF review_text, pros, cons ON review BEGIN
+        INSERT INTO review_fts(review_fts, rowid, review_text, pros, cons)
+        VALUES ('delete', old.id, old.review_text, old.pros, old.cons);
+        INSERT INTO review_fts(rowid, review_text, pros, cons)
+        VALUES (new.id, new.review_text, new.pros, new.cons);
+    END""",
+]
+
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS property_fts_ai",
+    "DROP TRIGGER IF EXISTS property_fts_ad",
+    "DROP TRIGGER IF EXISTS property_fts_au",
+    "DROP TABLE IF EXISTS property_fts",
+    "DROP TRIGGER IF EXISTS review_fts_ai",
+    "DROP TRIGGER IF EXISTS review_fts_ad",
+    "DROP TRIGGER IF EXISTS review_fts_au",
+    "DROP TABLE IF EXISTS review_fts",
+]
+
+POSTGRES_DDL = [
+    """ALTER TABLE property ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(address, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'D')
+        ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_property_search_vector ON property USING GIN (search_vector)",
+    """ALTER TABLE review ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(review_text, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(pros, '')), 'C') ||
+            setweight(to_tsvector('english', coalesce(cons, '')), 'C')
+        ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_review_search_vector ON review USING GIN (search_vector)",
+]
+
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS ix_property_search_vector",
+    "ALTER TABLE property DROP COLUMN IF EXISTS search_vector",
+    "DROP INDEX IF EXISTS ix_review_search_vector",
+    "ALTER TABLE review DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def install_search_index(connection):
+    """Create the search tables/columns and their sync triggers if missing"""
+    dialect = connection.dialect.name
+
+    if dialect == 'sqlite':
+        existing = {
+            row[0] for row in connection.execute(text(
+                "SELECT name FROM sqlite_master WHERE name IN ('property_fts', 'review_fts')"
+            ))
+        }
+        for statement in SQLITE_DDL:
+            connection.execute(text(statement))
+        # Index rows that were written before the triggers existed
+        if 'property_fts' not in existing:
+            connection.execute(text("INSERT INTO property_fts(property_fts) VALUES ('rebuild')"))
+        if 'review_fts' not in existing:
+            connection.execute(text("INSERT INTO review_fts(review_fts) VALUES ('rebuild')"))
+    elif dialect == 'postgresql':
+        for statement in POSTGRES_DDL:
+            connection.execute(text(statement))
+
+
+def drop_search_index(connection):
+    dialect = connection.dialect.name
+
+    if dialect == 'sqlite':
+        statements = SQLITE_DROP
+    elif dialect == 'postgresql':
+        statements = POSTGRES_DROP
+    else:
+        return
+
+    for statement in statements:
+        connection.execute(text(statement))
+
+
+def _after_create(target, connection, **kw):
+    install_search_index(connection)
+
+
+def _after_drop(target, connection, **kw):
+    drop_search_index(connection)
+
+
+# Keep the index in step with db.create_all() / db.drop_all()
+event.listen(db.metadata, 'after_create', _after_create)
+event.listen(db.metadata, 'after_drop', _after_drop)
+
+
+def _search_terms(term):
+    return re.findall(r'\w+', (term or '').lower())
+
+
+def _match_query(terms, dialect):
+    # Every term must match, each one as a prefix so partial words still hit
+    if dialect == 'postgresql':
+        return ' & '.join(f"{t}:*" for t in terms)
+    return ' '.join(f'"{t}"*' for t in terms)
+
+
+def _dialect():
+    return db.engine.dialect.name
+
+
+def property_matches(term):
+    """Subquery of (id, rank) for properties matching term, best rank lowest.
+
+    Returns None when the term has nothing searchable in it or the database
+    has no search index.
+    """
+    terms = _search_terms(term)
+    dialect = _dialect()
+    if not terms or dialect not in ('sqlite', 'postgresql'):
+        return None
+
+    if dialect == 'postgresql':
+        sql = """
+            SELECT property.id AS id, -ts_rank_cd(property.search_vector, q) AS rank
+            FROM property, to_tsquery('english', :q) AS q
+            WHERE property.search_vector @@ q
+        """
+    else:
+        sql = f"""
+            SELECT rowid AS id, bm25(property_fts, {PROPERTY_WEIGHTS}) AS rank
+            FROM property_fts
+            WHERE property_fts MATCH :q
+        """
+
+    return text(sql).bindparams(q=_match_query(terms, dialect)).columns(
+        id=db.Integer, rank=db.Float
+    ).subquery('property_matches')
+
+
+def review_matches(term):
+    """Subquery of (id, rank) for reviews matching term, best rank lowest.
+
+    A review matches on its own text/pros/cons, or by being one of the
+    newest REVIEWS_PER_MATCHED_PROPERTY reviews of one of the
+    MATCHED_PROPERTIES best property matches on name, address or
+    description. The caps keep a popular property's review count out of
+    the cost of every search that names it.
+    """
+    terms = _search_terms(term)
+    dialect = _dialect()
+    if not terms or dialect not in ('sqlite', 'postgresql'):
+        return None
+
+    if dialect == 'postgresql':
+        sql = """
+            SELECT id, MIN(rank) AS rank FROM (
+                SELECT review.id AS id, -ts_rank_cd(review.search_vector, q) AS rank
+                FROM review, to_tsquery('english', :q) AS q
+                WHERE review.search_vector @@ q
+                UNION ALL
+                SELECT recent.id AS id, best.rank AS rank
+                FROM (
+                    SELECT property.id AS id, -ts_rank_cd(property.search_vector, q) AS rank
+                    FROM property, to_tsquery('english', :q) AS q
+                    WHERE property.search_vector @@ q
+                    ORDER BY rank LIMIT :properties
+                ) AS best
+                CROSS JOIN LATERAL (
+                    SELECT review.id FROM review
+                    WHERE review.property_id = best.id
+                    ORDER BY review.created_at DESC, review.id DESC LIMIT :per_property
+                ) AS recent
+            ) AS matches
+            GROUP BY id
+        """
+    else:
+        sql = f"""
+            SELECT id, MIN(rank) AS rank FROM (
+                SELECT rowid AS id, bm25(review_fts, {REVIEW_WEIGHTS}) AS rank
+                FROM review_fts
+                WHERE review_fts MATCH :q
+                UNION ALL
+                SELECT review.id AS id, best.rank AS rank
+                FROM (
+                    SELECT rowid AS id, bm25(property_fts, {PROPERTY_WEIGHTS}) AS rank
+                    FROM property_fts
+                    WHERE property_fts MATCH :q
+                    ORDER BY rank LIMIT :properties
+                ) AS best
+                JOIN review ON review.id IN (
+                    SELECT recent.id FROM review AS recent
+                    WHERE recent.property_id = best.id
+                    ORDER BY recent.created_at DESC, recent.id DESC LIMIT :per_property
+                )
+            )
+            GROUP BY id
+        """
+
+    return text(sql).bindparams(
+        q=_match_query(terms, dialect),
+        properties=MATCHED_PROPERTIES,
+        per_property=REVIEWS_PER_MATCHED_PROPERTY,
+    ).columns(id=db.Integer, rank=db.Float).subquery('review_matches')
+
+
+def search_properties(query, term):
+    """Restrict a Property query to search matches, most relevant first"""
+    from app.models import Property
+
+    matches = property_matches(term)
+    if matches is None:
+        if not _search_terms(term):
+            return query
+        # No index on this database; fall back to a plain substring filter
+        search_term = f"%{term}%"
+        return query.filter(
+            (Property.name.ilike(search_term)) |
+            (Property.address.ilike(search_term))
+        )
+
+    return query.join(matches, matches.c.id == Property.id).order_by(matches.c.rank)
+
+
+def search_reviews(query, term):
+    """Restrict a Review query to search matches, most relevant first"""
+    from app.models import Review, Property
+
+    matches = review_matches(term)
+    if matches is None:
+        if not _search_terms(term):
+            return query
+        search_term = f"%{term}%"
+        return query.filter(
+            (Property.name.ilike(search_term)) |
+            (Review.review_text.ilike(search_term))
+        )
+
+    return query.join(matches, matches.c.id == Review.id).order_by(matches.c.rank)
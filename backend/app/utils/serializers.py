@@ -0,0 +1,145 @@
+from sqlalchemy.orm import load_only
+from app import db
+from app.models import Property, PropertyImage
+from app.models.property import RATING_CATEGORIES
+
+# Relations a client can ask for with ?include=
+PROPERTY_INCLUDES = ('images', 'rating_summary')
+
+
+class InvalidFieldset(ValueError):
+    pass
+
+
+class Fieldset:
+    """What a property response should contain, from ?fields= and ?include=.
+
+    fields=id,name limits each property to those keys (primary_image
+    counts as a field); without it every field is returned, as before.
+    include=images adds every image of the property and
+    include=rating_summary the per-category averages.
+    """
+
+    def __init__(self, fields=None, include=()):
+        self.fields = fields
+        self.include = frozenset(include)
+
+    @classmethod
+    def from_args(cls, args):
+        fields = _split(args.get('fields'))
+        include = _split(args.get('include')) or ()
+
+        allowed = set(Property.FIELD_COLUMNS) | {'primary_image'}
+        if fields is not None:
+            unknown = [field for field in fields if field not in allowed]
+            if unknown:
+                raise InvalidFieldset(f"unknown field(s) {', '.join(unknown)}; "
+                                      f"choose from {', '.join(sorted(allowed))}")
+            # id is always returned; clients key on it
+            fields = ['id'] + [field for field in dict.fromkeys(fields) if field != 'id']
+        unknown = [name for name in include if name not in PROPERTY_INCLUDES]
+        if unknown:
+            raise InvalidFieldset(f"unknown include(s) {', '.join(unknown)}; "
+                                  f"choose from {', '.join(PROPERTY_INCLUDES)}")
+        return cls(fields, include)
+
+    @property
+    def model_fields(self):
+        if self.fields is None:
+            return None
+        return [field for field in self.fields if field in Property.FIELD_COLUMNS]
+
+    @property
+    def primary_image(self):
+        return self.fields is None or 'primary_image' in self.fields
+
+    def load_only(self, *extra):
+        """Query option loading only the columns this fieldset reads, plus
+        `extra` column names (e.g. what pagination or filtering needs)"""
+        names = set(extra)
+        for field in self.model_fields or Property.FIELD_COLUMNS:
+            names.update(Property.FIELD_COLUMNS[field])
+        if 'rating_summary' in self.include:
+            names.update(('rating_sum', 'rating_count'))
+            for category in RATING_CATEGORIES:
+                names.update((f'{category}_rating_sum', f'{category}_rating_count'))
+        return load_only(*(getattr(Property, name) for name in sorted(names)))
+
+
+def _split(value):
+    if value is None:
+        return None
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+
+def _images_query(property_ids):
+    return PropertyImage.query.filter(
+        PropertyImage.property_id.in_(property_ids)
+    ).order_by(
+        PropertyImage.property_id,
+        db.case((PropertyImage.is_primary == True, 0), else_=1),
+        PropertyImage.id
+    )
+
+
+def primary_images_for(property_ids, rendition='listing'):
+    """Map property id -> primary image dict for a batch of properties.
+
+    One query for the whole batch. Properties without an image flagged as
+    primary fall back to their oldest image. Uploaded images link to the
+    given rendition.
+    """
+    if not property_ids:
+        return {}
+
+    primary = {}
+    for image in _images_query(property_ids):
+        # Rows are ordered so the first one seen per property wins
+        if image.property_id not in primary:
+            primary[image.property_id] = image.to_dict(rendition)
+    return primary
+
+
+def images_for(property_ids, rendition='listing'):
+    """Map property id -> every image dict, primary first; one query"""
+    images = {property_id: [] for property_id in property_ids}
+    if property_ids:
+        for image in _images_query(property_ids):
+            images[image.property_id].append(image.to_dict(rendition))
+    return images
+
+
+def serialize_properties(properties, rendition='listing', fieldset=None):
+    """Serialize a page of Property rows with a fixed number of queries.
+
+    Ratings and review counts come from the aggregate columns on the rows
+    themselves; primary images are fetched for the whole page at once, so
+    the query count doesn't grow with the page size. Listings get the
+    small image rendition; pass rendition='detail' for a single property.
+    A Fieldset narrows the output (load the rows with fieldset.load_only()
+    so the skipped columns aren't read either).
+    """
+    fieldset = fieldset or Fieldset()
+    properties = list(properties)
+    property_ids = [prop.id for prop in properties]
+
+    # Every image already includes the primary one; don't query twice
+    all_images = images_for(property_ids, rendition) if 'images' in fieldset.include else None
+    if not fieldset.primary_image:
+        primary = {}
+    elif all_images is not None:
+        primary = {pid: images[0] for pid, images in all_images.items() if images}
+    else:
+        primary = primary_images_for(property_ids, rendition)
+
+    result = []
+    for prop in properties:
+        prop_dict = prop.to_dict(fieldset.model_fields)
+        if fieldset.primary_image:
+            prop_dict['primary_image'] = primary.get(prop.id)
+        if all_images is not None:
+            prop_dict['images'] = all_images[prop.id]
+        if 'rating_summary' in fieldset.include:
+            prop_dict['rating_summary'] = prop.rating_summary()
+        result.append(prop_dict)
+    return result
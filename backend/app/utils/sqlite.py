@@ -0,0 +1,127 @@
+"""SQLite concurrency profile.
+
+Applies a set of PRAGMAs to every new SQLite connection so readers don't
+block behind writers (WAL) and writers wait for a lock instead of failing
+with "database is locked" (busy_timeout), and runs a periodic WAL
+checkpoint in each worker process. Does nothing on other databases.
+"""
+import threading
+import time
+from sqlalchemy import event
+from app.utils.forksafe import ProcessLocal
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'busy_timeout': 5000,          # ms to wait on a locked database
+    'synchronous': 'NORMAL',       # safe with WAL, far fewer fsyncs
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64000,          # negative = KiB, so ~64MB of page cache
+    'temp_store': 'MEMORY',
+}
+
+
+def sqlite_engine_options(app):
+    """Driver options that have to be set when connections are created"""
+    return {
+        'connect_args': {
+            'cached_statements': app.config.get('SQLITE_STATEMENT_CACHE_SIZE', 512),
+            'timeout': app.config.get('SQLITE_PRAGMAS', {}).get(
+                'busy_timeout', DEFAULT_PRAGMAS['busy_timeout']
+            ) / 1000,
+        }
+    }
+
+
+class SQLiteProfile:
+    def __init__(self, app=None, engine=None):
+        self.pragmas = {}
+        self.checkpoint_interval = 0
+        self.last_checkpoint = None
+        self._engine = None
+        self._checkpointer = ProcessLocal(self._start_checkpointer)
+        if app is not None:
+            self.init_app(app, engine)
+
+    def init_app(self, app, engine):
+        app.config.setdefault('SQLITE_PRAGMAS', {})
+        app.config.setdefault('SQLITE_STATEMENT_CACHE_SIZE', 512)
+        app.config.setdefault('SQLITE_WAL_CHECKPOINT_INTERVAL', 300)
+        app.config.setdefault('SQLITE_WAL_CHECKPOINT_MODE', 'PASSIVE')
+        app.extensions['sqlite_profile'] = self
+
+        if engine.dialect.name != 'sqlite':
+            return
+
+        self._engine = engine
+        self.pragmas = {**DEFAULT_PRAGMAS, **app.config['SQLITE_PRAGMAS']}
+        self.checkpoint_interval = app.config['SQLITE_WAL_CHECKPOINT_INTERVAL']
+        self.checkpoint_mode = app.config['SQLITE_WAL_CHECKPOINT_MODE']
+
+        event.listen(engine, 'connect', self._on_connect)
+
+        if self.checkpoint_interval:
+            # Started by each worker on its first request (see forksafe)
+            app.before_request(self._ensure_checkpointer)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in self.pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+    def _ensure_checkpointer(self):
+        self._checkpointer.get()
+
+    def _start_checkpointer(self):
+        thread = threading.Thread(target=self._checkpoint_loop, name='wal-checkpoint', daemon=True)
+        thread.start()
+        return thread
+
+    def _checkpoint_loop(self):
+        while True:
+            time.sleep(self.checkpoint_interval)
+            if not self._checkpointer.current():
+                return
+            try:
+                self.checkpoint()
+            except Exception as e:
+                self.last_checkpoint = {'error': str(e), 'at': time.time()}
+
+    def checkpoint(self, mode=None):
+        """Run a WAL checkpoint; returns (busy, wal_pages, checkpointed_pages)"""
+        with self._engine.connect() as conn:
+            row = conn.exec_driver_sql(
+                f'PRAGMA wal_checkpoint({mode or self.checkpoint_mode})'
+            ).fetchone()
+        self.last_checkpoint = {
+            'busy': bool(row[0]),
+            'wal_pages': row[1],
+            'checkpointed_pages': row[2],
+            'at': time.time(),
+        }
+        return tuple(row)
+
+    def diagnostics(self):
+        """Configured profile next to what the connection actually reports"""
+        if self._engine is None:
+            return {'enabled': False}
+
+        with self._engine.connect() as conn:
+            current = {
+                name: conn.exec_driver_sql(f'PRAGMA {name}').scalar()
+                for name in self.pragmas
+            }
+            sqlite_version = conn.exec_driver_sql('SELECT sqlite_version()').scalar()
+
+        return {
+            'enabled': True,
+            'sqlite_version': sqlite_version,
+            'configured': self.pragmas,
+            'current': current,
+            'checkpoint_interval_seconds': self.checkpoint_interval,
+            'checkpoint_mode': self.checkpoint_mode,
+            'last_checkpoint': self.last_checkpoint,
+            'checkpointer_running': bool(self._checkpointer.peek() and self._checkpointer.peek().is_alive()),
+        }
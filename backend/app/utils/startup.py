@@ -0,0 +1,119 @@
+"""Schema and cold-start helpers for create_app.
+
+A database with an alembic_version table belongs to the migrations:
+create_app leaves its schema alone, since create_all would add tables
+ahead of the revisions that create them and `flask db upgrade` would
+then stop on "table already exists". An empty database gets create_all
+and is stamped at the migration head (read straight from the revision
+files, so no migration module is imported) so later upgrades start from
+the right place. A database that create_all built before any of that
+(baseline tables, no alembic_version, no rating aggregates) is stamped
+at BASELINE_REVISION instead, which its schema matches, so `flask db
+upgrade` (run before gunicorn in railway.json) brings it to the head.
+
+LazyBlueprints wraps the WSGI app and imports/registers the route
+blueprints on the first request instead of inside create_app.
+"""
+import ast
+import os
+import re
+import threading
+from sqlalchemy import inspect, text
+
+# The revision a create_all database from before the migrations matches
+BASELINE_REVISION = 'ee4317c6fa13'
+
+_REVISION_RE = re.compile(r'^(revision|down_revision)\s*(?::[^=]+)?=\s*(.+?)\s*$', re.MULTILINE)
+
+
+def migrations_directory(app):
+    migrate = app.extensions.get('migrate')
+    directory = migrate.directory if migrate is not None else 'migrations'
+    if not os.path.isabs(directory):
+        # Relative to the backend folder, not wherever the process started
+        directory = os.path.join(os.path.dirname(app.root_path), directory)
+    return directory
+
+
+def migration_heads(directory):
+    """Revisions in directory/versions that no other revision builds on"""
+    versions_dir = os.path.join(directory, 'versions')
+    revisions, parents = set(), set()
+
+    for name in os.listdir(versions_dir):
+        if not name.endswith('.py'):
+            continue
+        with open(os.path.join(versions_dir, name)) as f:
+            fields = dict(_REVISION_RE.findall(f.read()))
+        if 'revision' not in fields:
+            continue
+
+        revisions.add(ast.literal_eval(fields['revision']))
+        down = ast.literal_eval(fields.get('down_revision', 'None'))
+        if isinstance(down, (tuple, list)):
+            parents.update(down)
+        elif down:
+            parents.add(down)
+
+    return revisions - parents
+
+
+def database_revisions(engine):
+    """Revisions stamped in alembic_version (empty if it doesn't exist)"""
+    try:
+        with engine.connect() as conn:
+            return {row[0] for row in conn.execute(text('SELECT version_num FROM alembic_version'))}
+    except Exception:
+        return set()
+
+
+def predates_migrations(engine):
+    """True for a database create_all built at the baseline: it has the
+    property table but not the columns the first later revision adds"""
+    inspector = inspect(engine)
+    if not inspector.has_table('property'):
+        return False
+    return 'rating_sum' not in {column['name'] for column in inspector.get_columns('property')}
+
+
+def stamp_heads(app, engine):
+    """Record the migration head(s) in alembic_version, as `flask db stamp` does"""
+    heads = migration_heads(migrations_directory(app))
+    stamp(engine, heads)
+    return heads
+
+
+def stamp(engine, revisions):
+    """Replace whatever alembic_version holds with `revisions`"""
+    with engine.begin() as conn:
+        conn.execute(text(
+            'CREATE TABLE IF NOT EXISTS alembic_version ('
+            'version_num VARCHAR(32) NOT NULL, '
+            'CONSTRAINT alembic_version_pkc PRIMARY KEY (version_num))'
+        ))
+        conn.execute(text('DELETE FROM alembic_version'))
+        for revision in sorted(revisions):
+            conn.execute(text('INSERT INTO alembic_version (version_num) VALUES (:revision)'),
+                         {'revision': revision})
+
+
+class LazyBlueprints:
+    """WSGI middleware that registers blueprints before the first request"""
+
+    def __init__(self, app, register):
+        self.app = app
+        self.wsgi_app = app.wsgi_app
+        self.register = register
+        self.loaded = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            if not self.loaded:
+                self.register(self.app)
+                self.loaded = True
+
+    def __call__(self, environ, start_response):
+        if not self.loaded:
+            self.load()
+        return self.wsgi_app(environ, start_response)
@@ -0,0 +1,19 @@
+from app import create_app, db
+from app.models import Property
+
+def backfill_ratings():
+    app = create_app()
+    
+    with app.app_context():
+        # Recompute every property's rating aggregates from its reviews
+        updated = Property.recalculate_ratings()
+        db.session.commit()
+        print(f"✅ Recalculated rating aggregates for {updated} properties")
+        
+        # Show a sample so the numbers can be eyeballed
+        sample_props = Property.query.filter(Property.rating_count > 0).limit(5).all()
+        for prop in sample_props:
+            print(f"- {prop.name}: {round(prop.average_rating(), 1)} from {prop.review_count()} reviews")
+
+if __name__ == '__main__':
+    backfill_ratings()
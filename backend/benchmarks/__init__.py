@@ -0,0 +1,7 @@
+"""Performance benchmarks for the backend.
+
+Run the modules from the backend directory, e.g.:
+
+    python -m benchmarks.serving
+    python -m benchmarks.dataset && python -m benchmarks.load --json results.json
+"""
@@ -0,0 +1,109 @@
+"""Cold-start cost of the app with and without FAST_STARTUP.
+
+Each run is a fresh interpreter that imports the app package, calls
+create_app() and serves one request through the test client, so module
+imports and lazy blueprint registration show up. The database is a
+throwaway SQLite file built once and stamped at the migration head, so
+neither mode runs create_all.
+
+    python -m benchmarks.cold_start --runs 5 --path /api/properties
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import write_json
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PREPARE = '''
+import flask_migrate
+from app import create_app
+app = create_app()
+with app.app_context():
+    flask_migrate.stamp()
+'''
+
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+response = app.test_client().get(sys.argv[1])
+served = time.perf_counter()
+print(json.dumps({
+    'status': response.status_code,
+    'import_ms': (imported - start) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_request_ms': (served - created) * 1000,
+}))
+'''
+
+MODES = {
+    'default': {'FAST_STARTUP': '0'},
+    'fast': {'FAST_STARTUP': '1'},
+}
+
+
+def run_probe(path, env):
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE, path], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result['process_ms'] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def measure(path, runs, env):
+    samples = [run_probe(path, env) for _ in range(runs)]
+    statuses = {sample['status'] for sample in samples}
+    summary = {
+        key: round(statistics.median(sample[key] for sample in samples), 1)
+        for key in ('import_ms', 'create_app_ms', 'first_request_ms', 'process_ms')
+    }
+    summary['statuses'] = sorted(statuses)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--path', default='/api/properties', help='first request to serve')
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters per mode (median is reported)')
+    parser.add_argument('--database-url', help='use this database instead of a stamped temporary one')
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or 'sqlite:///' + os.path.join(tmp, 'cold_start.db')
+        env = dict(os.environ, DATABASE_URL=database_url)
+        if not args.database_url:
+            subprocess.run([sys.executable, '-c', PREPARE], cwd=BACKEND_DIR, env=env,
+                           capture_output=True, check=True)
+
+        results = {}
+        for mode, overrides in MODES.items():
+            results[mode] = measure(args.path, args.runs, dict(env, **overrides))
+            r = results[mode]
+            print(f"{mode:>8}: import {r['import_ms']}ms  create_app {r['create_app_ms']}ms  "
+                  f"first request {r['first_request_ms']}ms  process {r['process_ms']}ms  "
+                  f"status {r['statuses']}")
+
+    saved = (results['default']['import_ms'] + results['default']['create_app_ms']) - \
+        (results['fast']['import_ms'] + results['fast']['create_app_ms'])
+    print(f"fast startup saves {saved:.1f}ms before the app can accept requests")
+
+    if args.json:
+        write_json(args.json, {'path': args.path, 'runs': args.runs, 'results': results})
+
+
+if __name__ == '__main__':
+    main()
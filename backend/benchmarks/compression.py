@@ -0,0 +1,91 @@
+"""Bytes per response and time per request with gzip/brotli compression.
+
+Requests each endpoint through the test client with Accept-Encoding set
+to identity, gzip and br. Each one runs twice: with the response cache,
+where compressed copies are kept and reused, and without it, where every
+request compresses again. Reported: bytes on the wire per request, the
+saving over identity and mean time per request.
+
+    python -m benchmarks.dataset --scale 0.1
+    python -m benchmarks.compression --requests 200
+"""
+import argparse
+import os
+import time
+
+from benchmarks.common import write_json
+from benchmarks.dataset import DEFAULT_DATABASE
+from benchmarks.load import default_endpoints
+
+ENCODINGS = ('identity', 'gzip', 'br')
+
+
+def make_app(database, cache):
+    from app import create_app
+    from config import Config
+
+    class CompressionConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.abspath(database)
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+        RESPONSE_CACHE_ENABLED = cache
+        FAST_STARTUP = True
+        LOG_LEVEL = 'WARNING'
+
+    return create_app(CompressionConfig)
+
+
+def measure(client, path, encoding, requests):
+    headers = {'Accept-Encoding': encoding}
+    client.get(path, headers=headers).get_data()
+    total_bytes = 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(path, headers=headers)
+        total_bytes += len(response.get_data())
+    elapsed = time.perf_counter() - started
+    return {
+        'bytes_per_request': total_bytes // requests,
+        'content_encoding': response.headers.get('Content-Encoding', 'identity'),
+        'ms_per_request': round(elapsed / requests * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', default=DEFAULT_DATABASE, help='dataset built by benchmarks.dataset')
+    parser.add_argument('--path', action='append', dest='paths', help='endpoint to run (repeatable)')
+    parser.add_argument('--requests', type=int, default=100, help='requests per endpoint and encoding')
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.database):
+        parser.error(f'{args.database} does not exist; build it with python -m benchmarks.dataset')
+
+    paths = args.paths or [path for path in default_endpoints(args.database) if 'search' not in path]
+    results = {}
+    for cache in (True, False):
+        mode = 'cached' if cache else 'uncached'
+        client = make_app(args.database, cache).test_client()
+        results[mode] = {}
+        for path in paths:
+            runs = {encoding: measure(client, path, encoding, args.requests) for encoding in ENCODINGS}
+            results[mode][path] = runs
+            identity = runs['identity']['bytes_per_request']
+            print(f"{mode:>8} {path:<55} " + '  '.join(
+                f"{encoding} {r['bytes_per_request']:>7}B "
+                f"({100 - r['bytes_per_request'] * 100 // max(identity, 1):>2}% less, {r['ms_per_request']}ms)"
+                for encoding, r in runs.items() if encoding != 'identity'
+            ) + f"  identity {identity}B {runs['identity']['ms_per_request']}ms")
+
+    for encoding in ENCODINGS[1:]:
+        before = sum(r['identity']['bytes_per_request'] for r in results['cached'].values())
+        after = sum(r[encoding]['bytes_per_request'] for r in results['cached'].values())
+        print(f"{encoding}: {before} -> {after} bytes per round of requests "
+              f"({100 - after * 100 // max(before, 1)}% less)")
+
+    if args.json:
+        write_json(args.json, {'requests': args.requests, 'results': results})
+
+
+if __name__ == '__main__':
+    main()
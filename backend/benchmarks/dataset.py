@@ -0,0 +1,246 @@
+"""Synthetic dataset for benchmarks.
+
+Fills a fresh SQLite file with properties, students and reviews shaped
+like application season: a few popular residences collect most of the
+reviews (Zipf-distributed), the rest get a handful each. Rows go in with
+executemany in large batches with the search and change-marker triggers
+dropped; the full-text index, triggers and rating aggregates are rebuilt
+afterwards and the database is stamped at the migration head so the app
+can also start against it with FAST_STARTUP.
+
+    python -m benchmarks.dataset                      # 10k / 100k / 1M
+    python -m benchmarks.dataset --scale 0.01 --database /tmp/small.db
+"""
+import argparse
+import itertools
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DATABASE = os.path.join(BACKEND_DIR, 'instance', 'bench.db')
+BATCH_SIZE = 20000
+
+UNIVERSITIES = ['wits', 'uj', 'both']
+PROPERTY_TYPES = ['residence', 'apartment', 'house']
+SUBURBS = ['Braamfontein', 'Parktown', 'Auckland Park', 'Melville', 'Hillbrow',
+           'Westdene', 'Richmond', 'Brixton', 'Milpark', 'Doornfontein']
+STREETS = ['Jorissen', 'Bertha', 'Smit', 'De Korte', 'Juta', 'Stiemens', 'Kingsway',
+           'Empire', 'Jan Smuts', 'Queens']
+NAME_PREFIXES = ['Campus', 'South Point', 'Varsity', 'Urban', 'Unilofts', 'The Richmond',
+                 'Studentdigz', 'Mill', 'Junction', 'Park']
+NAME_SUFFIXES = ['Lodge', 'Residence', 'Court', 'Place', 'House', 'Heights', 'Village', 'Towers']
+AMENITIES = ['WiFi', '24/7 Security', 'Study Areas', 'Laundry', 'Gym', 'Shuttle', 'Parking',
+             'Common Room', 'Backup Power', 'Cleaning']
+PHRASES = [
+    'The wifi is reliable even during exams.', 'Security is strict about visitors.',
+    'Rooms are spacious and get plenty of sun.', 'Management takes ages to fix anything.',
+    'It is a short walk to campus.', 'The shuttle is always on time.',
+    'Load shedding is handled with a generator.', 'The kitchen gets crowded at night.',
+    'Cleaning staff come twice a week.', 'Noise from the street can be a problem.',
+    'NSFAS payments were processed without any hassle.', 'The study rooms are quiet and open late.',
+    'Water pressure in the showers is weak.', 'Great value for the price compared to nearby places.',
+]
+FIRST_NAMES = ['Thabo', 'Lerato', 'Sipho', 'Naledi', 'Kagiso', 'Ayanda', 'Zanele', 'Mpho',
+               'Karabo', 'Lindiwe', 'Tshepo', 'Nomsa', 'Bongani', 'Palesa', 'Sizwe', 'Refilwe']
+LAST_NAMES = ['Mokoena', 'Nkosi', 'Dlamini', 'Khumalo', 'Ndlovu', 'Mahlangu', 'Molefe',
+              'Naidoo', 'van der Merwe', 'Botha', 'Pillay', 'Sithole']
+
+
+def zipf_weights(n, skew):
+    """Cumulative weights for ranks 1..n with P(rank) ~ 1 / rank ** skew"""
+    return list(itertools.accumulate(1 / rank ** skew for rank in range(1, n + 1)))
+
+
+def batched(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def property_rows(count, rng, now):
+    for i in range(count):
+        price_min = rng.randrange(3000, 9000, 100)
+        yield {
+            'name': f'{rng.choice(NAME_PREFIXES)} {rng.choice(NAME_SUFFIXES)} {i}',
+            'address': f'{rng.randint(1, 200)} {rng.choice(STREETS)} Street, {rng.choice(SUBURBS)}, Johannesburg',
+            'property_type': rng.choice(PROPERTY_TYPES),
+            'price_min': price_min,
+            'price_max': price_min + rng.randrange(500, 5000, 100),
+            'description': ' '.join(rng.sample(PHRASES, 3)),
+            'amenities': '["' + '", "'.join(rng.sample(AMENITIES, 4)) + '"]',
+            'contact_info': f'011-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}',
+            'university': rng.choice(UNIVERSITIES),
+            'approved': rng.random() < 0.9,
+            'nsfas_accredited': rng.random() < 0.5,
+            'created_at': now - timedelta(minutes=rng.randint(0, 3 * 365 * 24 * 60)),
+        }
+
+
+def user_rows(count, rng, now, password_hash):
+    for i in range(count):
+        university = 'wits' if i % 2 else 'uj'
+        domain = 'students.wits.ac.za' if university == 'wits' else 'student.uj.ac.za'
+        yield {
+            'email': f'{2000000 + i}@{domain}',
+            'password_hash': password_hash,
+            'name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+            'university': university,
+            'year_of_study': f'{rng.randint(1, 4)} Year',
+            'verified': True,
+            'is_admin': False,
+            'created_at': now - timedelta(minutes=rng.randint(0, 3 * 365 * 24 * 60)),
+        }
+
+
+def review_rows(count, rng, now, property_ids, user_ids, skew):
+    # Popularity rank is independent of id so hot properties are spread out
+    ranked = list(property_ids)
+    rng.shuffle(ranked)
+    cumulative = zipf_weights(len(ranked), skew)
+    seen = set()
+    stride = max(property_ids) + 1
+    produced = 0
+
+    while produced < count:
+        chunk = rng.choices(ranked, cum_weights=cumulative, k=min(BATCH_SIZE, count - produced))
+        for property_id in chunk:
+            user_id = rng.choice(user_ids)
+            pair = user_id * stride + property_id
+            # One review per student per property, like the API enforces
+            if pair in seen:
+                continue
+            seen.add(pair)
+            produced += 1
+
+            overall = min(5, max(1, round(rng.gauss(3.6, 1.1))))
+            row = {
+                'user_id': user_id,
+                'property_id': property_id,
+                'overall_rating': overall,
+                'review_text': ' '.join(rng.sample(PHRASES, 4)),
+                'pros': rng.choice(PHRASES) if rng.random() < 0.6 else None,
+                'cons': rng.choice(PHRASES) if rng.random() < 0.6 else None,
+                'recommend': overall >= 3,
+                'anonymous': rng.random() < 0.2,
+                'helpful_count': 0,
+                'created_at': now - timedelta(minutes=rng.randint(0, 2 * 365 * 24 * 60)),
+            }
+            for category in ('value', 'location', 'safety', 'cleanliness', 'management', 'facilities'):
+                row[f'{category}_rating'] = (
+                    min(5, max(1, overall + rng.randint(-1, 1))) if rng.random() < 0.8 else None
+                )
+            row['updated_at'] = row['created_at']
+            yield row
+
+
+def generate(database, properties=10000, users=100000, reviews=1000000, skew=1.1, seed=42, log=print):
+    """Build the dataset into `database` (an SQLite file path, replaced if it exists)"""
+    import flask_migrate
+    from app import create_app, db
+    from app.models import Property, PropertyImage, Review, User
+    from app.utils.conditional import drop_change_markers, install_change_markers
+    from app.utils.search import drop_search_index, install_search_index
+    from config import Config
+
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(database + suffix):
+            os.remove(database + suffix)
+    os.makedirs(os.path.dirname(os.path.abspath(database)), exist_ok=True)
+
+    class DatasetConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.abspath(database)
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+        RESPONSE_CACHE_ENABLED = False
+        SQLITE_WAL_CHECKPOINT_INTERVAL = 0
+        LOG_LEVEL = 'WARNING'
+
+    app = create_app(DatasetConfig)
+    rng = random.Random(seed)
+    now = datetime(2026, 2, 1)
+    started = time.perf_counter()
+
+    with app.app_context():
+        with db.engine.begin() as conn:
+            # Per-row trigger work would dominate the load; rebuilt below
+            drop_search_index(conn)
+            drop_change_markers(conn)
+            conn.exec_driver_sql('PRAGMA synchronous=OFF')
+
+            def load(table, rows, label):
+                inserted = 0
+                for batch in batched(rows):
+                    conn.execute(table.insert(), batch)
+                    inserted += len(batch)
+                log(f'  {label}: {inserted} rows ({time.perf_counter() - started:.1f}s)')
+
+            load(Property.__table__, property_rows(properties, rng, now), 'properties')
+            property_ids = [row[0] for row in conn.exec_driver_sql('SELECT id FROM property')]
+            load(PropertyImage.__table__, (
+                {'property_id': pid, 'image_url': f'https://images.example.com/properties/{pid}.jpg',
+                 'caption': 'Front entrance', 'is_primary': True}
+                for pid in property_ids
+            ), 'property images')
+
+            # Hashing once is enough; every student gets the same password
+            password_hash = generate_password_hash('benchmark-password')
+            load(User.__table__, user_rows(users, rng, now, password_hash), 'users')
+            user_ids = [row[0] for row in conn.exec_driver_sql('SELECT id FROM user')]
+
+            load(Review.__table__, review_rows(reviews, rng, now, property_ids, user_ids, skew), 'reviews')
+
+            install_search_index(conn)
+            install_change_markers(conn)
+            log(f'  search index and change markers rebuilt ({time.perf_counter() - started:.1f}s)')
+
+        updated = Property.recalculate_ratings()
+        db.session.commit()
+        log(f'  rating aggregates for {updated} properties ({time.perf_counter() - started:.1f}s)')
+
+        flask_migrate.stamp(directory=os.path.join(BACKEND_DIR, 'migrations'))
+        with db.engine.connect() as conn:
+            conn.exec_driver_sql('PRAGMA wal_checkpoint(TRUNCATE)')
+            conn.exec_driver_sql('ANALYZE')
+        db.engine.dispose()
+
+    return {
+        'database': os.path.abspath(database),
+        'properties': properties,
+        'users': users,
+        'reviews': reviews,
+        'skew': skew,
+        'seconds': round(time.perf_counter() - started, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', default=DEFAULT_DATABASE, help='SQLite file to (re)create')
+    parser.add_argument('--properties', type=int, default=10000)
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--reviews', type=int, default=1000000)
+    parser.add_argument('--scale', type=float, default=1.0, help='multiply every row count by this')
+    parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent for review popularity')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    counts = {name: max(1, int(getattr(args, name) * args.scale)) for name in ('properties', 'users', 'reviews')}
+    # Can't have more unique (student, property) pairs than exist
+    counts['reviews'] = min(counts['reviews'], counts['properties'] * counts['users'])
+
+    print(f"Generating {counts['properties']} properties, {counts['users']} users, "
+          f"{counts['reviews']} reviews into {args.database}")
+    summary = generate(args.database, skew=args.skew, seed=args.seed, **counts)
+    print(f"Done in {summary['seconds']}s")
+
+
+if __name__ == '__main__':
+    main()
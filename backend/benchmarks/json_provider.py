@@ -0,0 +1,123 @@
+"""JSON encoding time for real listing payloads, per provider.
+
+Loads a page of properties (as /api/properties serializes them) and a
+page of reviews from a dataset and times turning each into a response:
+
+- flask:  Flask's DefaultJSONProvider as the app used it before, with
+          sorted keys and timestamps converted with isoformat() first
+- json:   FastJSONProvider on the stdlib encoder (orjson not installed)
+- orjson: FastJSONProvider with orjson
+
+    python -m benchmarks.dataset --scale 0.1
+    python -m benchmarks.json_provider --per-page 50
+"""
+import argparse
+import os
+import time
+from datetime import datetime
+
+from benchmarks.common import percentile, write_json
+from benchmarks.dataset import DEFAULT_DATABASE
+
+
+def make_app(database):
+    from app import create_app
+    from config import Config
+
+    class JSONBenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.abspath(database)
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+        SQL_PROFILING_ENABLED = False
+        FAST_STARTUP = True
+        LOG_LEVEL = 'WARNING'
+
+    return create_app(JSONBenchConfig)
+
+
+def payloads(per_page):
+    from app.models import Property, Review
+    from app.utils.serializers import serialize_properties
+
+    properties = Property.query.filter_by(approved=True).order_by(Property.id).limit(per_page).all()
+    reviews = Review.query.order_by(Review.created_at.desc()).limit(per_page).all()
+    return {
+        'properties': {'properties': serialize_properties(properties), 'total': len(properties)},
+        'reviews': {'reviews': [review.to_dict() for review in reviews], 'total': len(reviews)},
+    }
+
+
+def isoformat_dates(value):
+    """What the models' to_dict() used to do before the provider took dates"""
+    if isinstance(value, dict):
+        return {key: isoformat_dates(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [isoformat_dates(item) for item in value]
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def providers(app):
+    from flask.json.provider import DefaultJSONProvider
+    from app.utils.jsonprovider import FastJSONProvider, orjson
+
+    stdlib = FastJSONProvider(app)
+    stdlib.use_orjson = False
+    runs = {
+        'flask': (DefaultJSONProvider(app), isoformat_dates),
+        'json': (stdlib, None),
+    }
+    if orjson is not None:
+        fast = FastJSONProvider(app)
+        fast.use_orjson = True
+        runs['orjson'] = (fast, None)
+    return runs
+
+
+def measure(provider, prepare, payload, iterations):
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        obj = prepare(payload) if prepare else payload
+        body = provider.response(obj).get_data()
+        timings.append(time.perf_counter() - started)
+    return {
+        'bytes': len(body),
+        'mean_ms': round(sum(timings) / len(timings) * 1000, 3),
+        'p95_ms': round(percentile(timings, 95) * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', default=DEFAULT_DATABASE, help='dataset built by benchmarks.dataset')
+    parser.add_argument('--per-page', type=int, default=50, help='rows per payload')
+    parser.add_argument('--iterations', type=int, default=500, help='encodes per provider and payload')
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.database):
+        parser.error(f'{args.database} does not exist; build it with python -m benchmarks.dataset')
+
+    app = make_app(args.database)
+    results = {}
+    with app.test_request_context():
+        data = payloads(args.per_page)
+        runs = providers(app)
+        for name, payload in data.items():
+            results[name] = {
+                provider_name: measure(provider, prepare, payload, args.iterations)
+                for provider_name, (provider, prepare) in runs.items()
+            }
+            baseline = results[name]['flask']['mean_ms']
+            for provider_name, result in results[name].items():
+                print(f"{name:<11} {provider_name:<7} {result['mean_ms']:>8.3f}ms mean "
+                      f"{result['p95_ms']:>8.3f}ms p95 {result['bytes']:>8}B "
+                      f"({baseline / result['mean_ms']:.1f}x)")
+
+    if args.json:
+        write_json(args.json, {'per_page': args.per_page, 'iterations': args.iterations, 'results': results})
+
+
+if __name__ == '__main__':
+    main()
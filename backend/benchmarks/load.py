@@ -0,0 +1,207 @@
+"""Per-endpoint throughput and latency against a benchmark dataset.
+
+Drives the real app two ways: in-process through Flask's test client
+(no network, shows the cost of the Python code) and over HTTP against
+gunicorn started on the same database. Each endpoint is hammered on its
+own for --duration seconds and reported with requests/second and
+p50/p95/p99 latency. Results can be written to JSON and compared with an
+earlier run:
+
+    python -m benchmarks.dataset
+    python -m benchmarks.load --json results.json
+    python -m benchmarks.load --baseline results.json --fail-on-regression
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from benchmarks.common import hammer_http, running_server, summarize, write_json
+from benchmarks.dataset import DEFAULT_DATABASE
+
+GUNICORN = [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', 'run:app']
+
+
+def default_endpoints(database):
+    """Hot paths, with ids picked from the dataset: the most reviewed
+    property (worst case for its review list) and a typical one"""
+    conn = sqlite3.connect(database)
+    try:
+        hot = conn.execute(
+            'SELECT id FROM property WHERE approved = 1 ORDER BY rating_count DESC LIMIT 1'
+        ).fetchone()[0]
+        typical = conn.execute(
+            'SELECT id FROM property WHERE approved = 1 ORDER BY rating_count LIMIT 1 '
+            'OFFSET (SELECT COUNT(*) / 2 FROM property WHERE approved = 1)'
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+    return [
+        '/api/properties',
+        '/api/properties?university=wits&type=residence',
+        '/api/properties?min_price=4000&max_price=8000&page=5',
+        '/api/properties?cursor=',
+        '/api/properties?search=shuttle',
+        f'/api/properties/{typical}',
+        '/api/reviews',
+        '/api/reviews?cursor=',
+        '/api/reviews?university=uj&min_rating=4',
+        '/api/reviews?search=wifi',
+        f'/api/reviews/property/{hot}',
+        f'/api/reviews/property/{typical}',
+    ]
+
+
+def hammer_client(app, paths, duration, concurrency):
+    """hammer_http() for the in-process test client"""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client(offset):
+        test_client = app.test_client()
+        local, local_errors, i = [], 0, offset
+        while time.monotonic() < stop_at:
+            path = paths[i % len(paths)]
+            i += 1
+            start = time.perf_counter()
+            response = test_client.get(path)
+            response.get_data()
+            if response.status_code >= 500:
+                local_errors += 1
+            else:
+                local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, time.monotonic() - started, errors[0])
+
+
+def run_client(database, paths, duration, concurrency, cache):
+    from app import create_app
+    from config import Config
+
+    class LoadConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.abspath(database)
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+        RESPONSE_CACHE_ENABLED = cache
+        FAST_STARTUP = True
+        LOG_LEVEL = 'WARNING'
+
+    app = create_app(LoadConfig)
+    results = {}
+    for path in paths:
+        hammer_client(app, [path], min(duration, 1), concurrency)
+        results[path] = hammer_client(app, [path], duration, concurrency)
+        report('client', path, results[path])
+    return results
+
+
+def run_http(database, paths, duration, concurrency, cache, workers):
+    env = {
+        'DATABASE_URL': 'sqlite:///' + os.path.abspath(database),
+        'RESPONSE_CACHE_ENABLED': '1' if cache else '0',
+        'FAST_STARTUP': '1',
+        'LOG_LEVEL': 'WARNING',
+        'GUNICORN_LOG_LEVEL': 'warning',
+        # Worker recycling would show up as connection resets mid-run
+        'GUNICORN_MAX_REQUESTS': '0',
+    }
+    if workers:
+        env['WEB_CONCURRENCY'] = str(workers)
+
+    results = {}
+    with running_server(GUNICORN, env) as port:
+        for path in paths:
+            hammer_http(port, [path], min(duration, 1), concurrency)
+            results[path] = hammer_http(port, [path], duration, concurrency)
+            report('http', path, results[path])
+    return results
+
+
+def report(mode, path, r):
+    print(f"{mode:>6} {path:<55} {r['requests_per_second']:>8} req/s  p50 {r['p50_ms']:>7}ms  "
+          f"p95 {r['p95_ms']:>7}ms  p99 {r['p99_ms']:>7}ms  errors {r['errors']}")
+
+
+def compare(results, baseline, tolerance):
+    """Lines describing every endpoint that got slower than the baseline
+    by more than `tolerance` (a fraction) in throughput or p95"""
+    regressions = []
+    for mode, endpoints in results.items():
+        for path, current in endpoints.items():
+            before = baseline.get(mode, {}).get(path)
+            if before is None:
+                continue
+            if current['requests_per_second'] < before['requests_per_second'] * (1 - tolerance):
+                regressions.append(f"{mode} {path}: {before['requests_per_second']} -> "
+                                   f"{current['requests_per_second']} req/s")
+            if current['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+                regressions.append(f"{mode} {path}: p95 {before['p95_ms']} -> {current['p95_ms']}ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', default=DEFAULT_DATABASE, help='dataset built by benchmarks.dataset')
+    parser.add_argument('--mode', choices=['client', 'http', 'both'], default='both')
+    parser.add_argument('--path', action='append', dest='paths', help='endpoint to run (repeatable)')
+    parser.add_argument('--duration', type=float, default=5, help='seconds per endpoint')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--workers', type=int, help='gunicorn workers for --mode http')
+    parser.add_argument('--no-cache', action='store_true', help='disable the response cache')
+    parser.add_argument('--json', help='write results to this file')
+    parser.add_argument('--baseline', help='earlier --json output to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='allowed slowdown vs the baseline before it counts as a regression')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.database):
+        parser.error(f'{args.database} does not exist; build it with python -m benchmarks.dataset')
+
+    paths = args.paths or default_endpoints(args.database)
+    cache = not args.no_cache
+    results = {}
+    if args.mode in ('client', 'both'):
+        results['client'] = run_client(args.database, paths, args.duration, args.concurrency, cache)
+    if args.mode in ('http', 'both'):
+        results['http'] = run_http(args.database, paths, args.duration, args.concurrency, cache, args.workers)
+
+    if args.json:
+        write_json(args.json, {
+            'database': os.path.abspath(args.database),
+            'duration': args.duration,
+            'concurrency': args.concurrency,
+            'response_cache': cache,
+            'results': results,
+        })
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f'{len(regressions)} regression(s) beyond {args.tolerance:.0%}:')
+            for line in regressions:
+                print(f'  {line}')
+            if args.fail_on_regression:
+                sys.exit(1)
+        else:
+            print(f'No regressions beyond {args.tolerance:.0%} against {args.baseline}')
+
+
+if __name__ == '__main__':
+    main()
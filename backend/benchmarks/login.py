@@ -0,0 +1,157 @@
+"""Login throughput with password hashing inline vs in the process pool.
+
+Registers a few hundred students in a throwaway SQLite database, then
+drives POST /api/auth/login through the test client from --concurrency
+threads, once per mode. Alongside the logins one thread keeps fetching
+/api/properties, so the report also shows what a burst of logins does to
+the latency of everything else the worker serves.
+
+    python -m benchmarks.login --duration 10 --concurrency 8
+    python -m benchmarks.login --method pbkdf2:sha256:600000 --workers 2
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks.common import summarize, write_json
+from werkzeug.security import generate_password_hash
+
+PASSWORD = 'benchmark-password'
+
+
+def make_app(database, method, workers):
+    from app import create_app
+    from config import Config
+
+    class LoginConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + database
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+        RESPONSE_CACHE_ENABLED = False
+        FAST_STARTUP = False
+        LOG_LEVEL = 'WARNING'
+        PASSWORD_HASH_METHOD = method
+        PASSWORD_HASH_WORKERS = workers
+
+    return create_app(LoginConfig)
+
+
+def seed_users(app, count, method):
+    from app import db
+    from app.models import User
+
+    # Hashed with the configured method up front so no login pays for a rehash
+    password_hash = generate_password_hash(PASSWORD, method=method)
+    emails = [f'{3000000 + i}@students.wits.ac.za' for i in range(count)]
+    with app.app_context():
+        db.session.add_all(
+            User(email=email, name='Bench Student', university='wits', verified=True,
+                 password_hash=password_hash)
+            for email in emails
+        )
+        db.session.commit()
+    return emails
+
+
+def hammer_logins(app, emails, duration, concurrency):
+    latencies, background = [], []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client(offset):
+        test_client = app.test_client()
+        local, local_errors, i = [], 0, offset
+        while time.monotonic() < stop_at:
+            email = emails[i % len(emails)]
+            i += concurrency
+            start = time.perf_counter()
+            response = test_client.post('/api/auth/login', json={'email': email, 'password': PASSWORD})
+            if response.status_code != 200:
+                local_errors += 1
+            else:
+                local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    def bystander():
+        test_client = app.test_client()
+        while time.monotonic() < stop_at:
+            start = time.perf_counter()
+            test_client.get('/api/properties').get_data()
+            background.append(time.perf_counter() - start)
+
+    started = time.monotonic()
+    cpu_started = time.process_time()
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    threads.append(threading.Thread(target=bystander))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    result = summarize(latencies, elapsed, errors[0])
+    # CPU of this process only: with the pool the hashing happens elsewhere
+    result['worker_cpu_seconds'] = round(time.process_time() - cpu_started, 2)
+    other = summarize(background, elapsed)
+    result['other_requests'] = {key: other[key] for key in ('requests_per_second', 'p50_ms', 'p95_ms')}
+    return result
+
+
+def run_mode(method, workers, users, duration, concurrency):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(os.path.join(tmp, 'login.db'), method, workers)
+        emails = seed_users(app, users, method)
+        try:
+            hammer_logins(app, emails, min(duration, 1), concurrency)
+            result = hammer_logins(app, emails, duration, concurrency)
+        finally:
+            app.extensions['password_hasher'].shutdown()
+            with app.app_context():
+                from app import db
+                db.engine.dispose()
+
+    # Hashing is CPU bound: it can't use more cores than there are threads
+    # (inline) or pool processes, nor more than the machine has
+    cores = min(workers or concurrency, os.cpu_count() or 1)
+    result['cores'] = cores
+    result['logins_per_second_per_core'] = round(result['requests_per_second'] / cores, 1)
+    return result
+
+
+def main():
+    from app.utils.passwords import DEFAULT_METHOD
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--method', default=DEFAULT_METHOD, help='werkzeug hash method, e.g. scrypt:32768:8:1')
+    parser.add_argument('--workers', type=int, default=min(os.cpu_count() or 1, 4),
+                        help='pool processes for the pool mode')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=5, help='seconds per mode')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    results = {}
+    for mode, workers in (('inline', 0), ('pool', args.workers)):
+        results[mode] = r = run_mode(args.method, workers, args.users, args.duration, args.concurrency)
+        print(f"{mode:>6}: {r['requests_per_second']:>7} logins/s  {r['logins_per_second_per_core']:>7} /s/core "
+              f"({r['cores']} cores)  p50 {r['p50_ms']}ms  p95 {r['p95_ms']}ms  errors {r['errors']}  "
+              f"worker cpu {r['worker_cpu_seconds']}s  "
+              f"other requests p95 {r['other_requests']['p95_ms']}ms")
+
+    if args.json:
+        write_json(args.json, {
+            'method': args.method,
+            'workers': args.workers,
+            'duration': args.duration,
+            'concurrency': args.concurrency,
+            'results': results,
+        })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Throughput of Flask's development server vs gunicorn on the same app.
+
+Starts `python run.py` and `gunicorn --config gunicorn.conf.py run:app`
+in turn against the current database, drives each with concurrent
+keep-alive clients and prints requests/second and latency percentiles.
+
+    python -m benchmarks.serving --path /api/properties --duration 10 --concurrency 16
+"""
+import argparse
+import sys
+
+from benchmarks.common import hammer_http, running_server, write_json
+
+SERVERS = {
+    'dev': [sys.executable, 'run.py'],
+    'gunicorn': [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', 'run:app'],
+}
+
+
+def run_server(kind, paths, duration, concurrency, env_overrides):
+    with running_server(SERVERS[kind], env_overrides) as port:
+        # Warm up caches and connections before measuring
+        hammer_http(port, paths, 1, concurrency)
+        return hammer_http(port, paths, duration, concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--path', action='append', dest='paths',
+                        help='endpoint to request (repeatable, default /api/properties)')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--workers', help='WEB_CONCURRENCY for gunicorn')
+    parser.add_argument('--threads', help='GUNICORN_THREADS for gunicorn')
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    paths = args.paths or ['/api/properties']
+    # Worker recycling would show up as connection resets mid-run
+    env = {'GUNICORN_MAX_REQUESTS': '0'}
+    if args.workers:
+        env['WEB_CONCURRENCY'] = args.workers
+    if args.threads:
+        env['GUNICORN_THREADS'] = args.threads
+
+    results = {}
+    for kind in SERVERS:
+        results[kind] = run_server(kind, paths, args.duration, args.concurrency, env)
+        r = results[kind]
+        print(f"{kind:>9}: {r['requests_per_second']:>8} req/s  "
+              f"p50 {r['p50_ms']}ms  p95 {r['p95_ms']}ms  p99 {r['p99_ms']}ms  errors {r['errors']}")
+
+    speedup = results['gunicorn']['requests_per_second'] / max(results['dev']['requests_per_second'], 0.1)
+    print(f"gunicorn/dev throughput: {speedup:.2f}x")
+
+    if args.json:
+        write_json(args.json, {'paths': paths, 'concurrency': args.concurrency, 'results': results})
+
+
+if __name__ == '__main__':
+    main()
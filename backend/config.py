@@ -4,29 +4,177 @@ from datetime import timedelta
 # Get the absolute path to the backend directory
 basedir = os.path.abspath(os.path.dirname(__file__))
 
+def _env_int(name, default):
+    return int(os.environ.get(name) or default)
+
+def _env_bool(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.lower() in ['true', 'on', '1']
+
+def database_url():
+    # Use PostgreSQL when DATABASE_URL is set, SQLite otherwise
+    url = os.environ.get('DATABASE_URL')
+    if url:
+        # Fix for Railway PostgreSQL URL format
+        if url.startswith('postgres://'):
+            url = url.replace('postgres://', 'postgresql://', 1)
+        return url
+
+    if os.environ.get('RAILWAY_ENVIRONMENT'):
+        # Railway production - use persistent path
+        return 'sqlite:///' + os.path.join('/app', 'studentstay.db')
+
+    # Local development (Flask-SQLAlchemy keeps relative SQLite paths in instance/)
+    return 'sqlite:///studentstay.db'
+
+def engine_options(database_uri):
+    """SQLALCHEMY_ENGINE_OPTIONS for the given database.
+
+    Postgres gets a bounded connection pool that checks connections before
+    use and recycles them before the server or a proxy drops them, plus a
+    per-statement timeout so one slow query can't hold a worker forever.
+    SQLite options are filled in by create_app (see app.utils.sqlite).
+    """
+    if not database_uri.startswith('postgresql'):
+        return {}
+
+    return {
+        'pool_size': _env_int('DB_POOL_SIZE', 5),
+        'max_overflow': _env_int('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': _env_int('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', True),
+        'connect_args': {
+            'connect_timeout': _env_int('DB_CONNECT_TIMEOUT', 10),
+            'options': f"-c statement_timeout={_env_int('DB_STATEMENT_TIMEOUT_MS', 5000)}",
+        },
+    }
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
-    
-    # Use PostgreSQL for production, SQLite for development
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
-        'sqlite:///' + os.path.join(basedir, 'studentstay.db')
-    
-    # Fix for Railway PostgreSQL URL format
-    if SQLALCHEMY_DATABASE_URI and SQLALCHEMY_DATABASE_URI.startswith('postgres://'):
-        SQLALCHEMY_DATABASE_URI = SQLALCHEMY_DATABASE_URI.replace('postgres://', 'postgresql://', 1)
-    
+
+    SQLALCHEMY_DATABASE_URI = database_url()
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-string'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
-    
+
     # Mail configuration
     MAIL_SERVER = os.environ.get('MAIL_SERVER')
     MAIL_PORT = int(os.environ.get('MAIL_PORT') or 587)
     MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS', 'true').lower() in ['true', 'on', '1']
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
-    
+
+    # Response cache for public GET endpoints
+    RESPONSE_CACHE_ENABLED = _env_bool('RESPONSE_CACHE_ENABLED', True)
+    RESPONSE_CACHE_TTL = _env_int('RESPONSE_CACHE_TTL', 60)
+
+    # Per-process cache of the user fields protected routes check
+    # (is_admin, university, verified); a commit that changes a user
+    # drops their entry, other workers catch up within the TTL
+    IDENTITY_CACHE_ENABLED = _env_bool('IDENTITY_CACHE_ENABLED', True)
+    IDENTITY_CACHE_TTL = _env_int('IDENTITY_CACHE_TTL', 30)
+
+    # gzip/brotli for JSON and text responses of at least MIN_SIZE bytes;
+    # cached responses keep their compressed copies
+    COMPRESSION_ENABLED = _env_bool('COMPRESSION_ENABLED', True)
+    COMPRESSION_MIN_SIZE = _env_int('COMPRESSION_MIN_SIZE', 1024)
+    COMPRESSION_GZIP_LEVEL = _env_int('COMPRESSION_GZIP_LEVEL', 6)
+    COMPRESSION_BROTLI_QUALITY = _env_int('COMPRESSION_BROTLI_QUALITY', 5)
+
+    # JSON responses use orjson when it is installed; keys are not sorted
+    JSON_FAST_ENCODER = _env_bool('JSON_FAST_ENCODER', True)
+    JSON_SORT_KEYS = _env_bool('JSON_SORT_KEYS', False)
+
+    # SQLite tuning (ignored on Postgres)
+    SQLITE_WAL_CHECKPOINT_INTERVAL = _env_int('SQLITE_WAL_CHECKPOINT_INTERVAL', 300)
+
+    # Password hashing runs in a pool of this many processes (0 = inline);
+    # stored hashes made with another method are upgraded on login
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_WORKERS = _env_int('PASSWORD_HASH_WORKERS', min(os.cpu_count() or 1, 4))
+    PASSWORD_HASH_MAX_PENDING = _env_int('PASSWORD_HASH_MAX_PENDING', 64)
+
+    # Token-bucket limits per worker process, e.g. "10/minute" or
+    # "100/15minutes"; an empty value turns that limit off. Behind a proxy
+    # set RATELIMIT_PROXY_HOPS so clients are told apart by X-Forwarded-For
+    RATELIMIT_ENABLED = _env_bool('RATELIMIT_ENABLED', True)
+    RATELIMIT_PROXY_HOPS = _env_int('RATELIMIT_PROXY_HOPS', 1 if os.environ.get('RAILWAY_ENVIRONMENT') else 0)
+    RATELIMITS = {
+        'login': os.environ.get('RATELIMIT_LOGIN', '10/minute'),
+        'register': os.environ.get('RATELIMIT_REGISTER', '5/minute'),
+        'create_review': os.environ.get('RATELIMIT_CREATE_REVIEW', '10/hour'),
+        'mark_helpful': os.environ.get('RATELIMIT_MARK_HELPFUL', '60/minute'),
+    }
+
+    # Uploaded property photos, stored by content hash; renditions (longest
+    # edge in pixels) are made by IMAGE_WORKERS background threads.
+    # IMAGE_BASE_URL is the public origin of /api/images/... links
+    # (default: the host the request came in on)
+    IMAGE_STORAGE_DIR = os.environ.get('IMAGE_STORAGE_DIR') or os.path.join(basedir, 'instance', 'images')
+    IMAGE_BASE_URL = os.environ.get('IMAGE_BASE_URL')
+    IMAGE_MAX_BYTES = _env_int('IMAGE_MAX_BYTES', 10 * 1024 * 1024)
+    IMAGE_RENDITIONS = {'listing': 480, 'detail': 1280, 'full': 2048}
+    IMAGE_WORKERS = _env_int('IMAGE_WORKERS', 2)
+
+    # Structured logging: LOG_FORMAT=json for one JSON object per line,
+    # text for something readable in a local terminal
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')
+
+    # Server-Timing header with query count and DB time on every response;
+    # warn when one statement runs more than this many times in a request.
+    # The header shows clients the app's internals and every query pays for
+    # the timing, so production leaves it off unless SQL_PROFILING_ENABLED is set
+    SQL_PROFILING_ENABLED = _env_bool('SQL_PROFILING_ENABLED', not os.environ.get('RAILWAY_ENVIRONMENT'))
+    SQL_REPEAT_WARN_THRESHOLD = _env_int('SQL_REPEAT_WARN_THRESHOLD', 10)
+
+    # /api/metrics; with METRICS_DIR set, each worker writes its numbers
+    # there so one scrape covers every gunicorn worker. Without
+    # METRICS_TOKEN anyone can read it, so production leaves it off unless
+    # METRICS_ENABLED is set
+    METRICS_ENABLED = _env_bool('METRICS_ENABLED', not os.environ.get('RAILWAY_ENVIRONMENT'))
+    METRICS_DIR = os.environ.get('METRICS_DIR')
+    METRICS_FLUSH_INTERVAL = _env_int('METRICS_FLUSH_INTERVAL', 5)
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+    # Import the route modules on the first request instead of at startup
+    # (create_all is skipped for any migrated database either way)
+    FAST_STARTUP = _env_bool('FAST_STARTUP', False)
+
     # Production settings
     if os.environ.get('RAILWAY_ENVIRONMENT'):
         # Force HTTPS in production
-        PREFERRED_URL_SCHEME = 'https'
\ No newline at end of file
+        PREFERRED_URL_SCHEME = 'https'
+
+class DevelopmentConfig(Config):
+    DEBUG = True
+    SQL_PROFILING_ENABLED = _env_bool('SQL_PROFILING_ENABLED', True)
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'DEBUG').upper()
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text')
+
+class ProductionConfig(Config):
+    PREFERRED_URL_SCHEME = 'https'
+    METRICS_ENABLED = _env_bool('METRICS_ENABLED', False)
+    SQL_PROFILING_ENABLED = _env_bool('SQL_PROFILING_ENABLED', False)
+
+class FastStartupConfig(Config):
+    FAST_STARTUP = True
+    # One-off scripts hash a password or two; starting a pool costs more
+    PASSWORD_HASH_WORKERS = 0
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    RESPONSE_CACHE_ENABLED = False
+    SQLITE_WAL_CHECKPOINT_INTERVAL = 0
+    METRICS_DIR = None
+    PASSWORD_HASH_WORKERS = 0
+    RATELIMIT_ENABLED = False
+    IMAGE_WORKERS = 0
+    SQL_PROFILING_ENABLED = True
@@ -0,0 +1,113 @@
+"""Shared fixtures for the backend test modules.
+
+`app` is a TestingConfig app on an in-memory SQLite database seeded with
+an admin, 20 students, 30 properties (10 with an image) and their
+reviews; each test module gets its own. The helpers below are imported
+by the modules that need them.
+"""
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from app import create_app, db
+from app.models import User, Property, PropertyImage, Review
+from config import TestingConfig
+
+
+SCAN_RE = re.compile(r'^SCAN (\w+)(.*)$')
+
+
+@pytest.fixture(scope='module')
+def app():
+    app = create_app(TestingConfig)
+
+    with app.app_context():
+        seed(app)
+        yield app
+
+
+def seed(app):
+    base = datetime(2025, 1, 1)
+
+    admin = User(email='admin@oneapplyhub.co.za', name='Admin', university='admin',
+                 verified=True, is_admin=True)
+    admin.set_password('admin-password')
+    db.session.add(admin)
+
+    students = []
+    for i in range(20):
+        student = User(email=f'23000{i:02d}@students.wits.ac.za', name=f'Student {i}',
+                       university='wits' if i % 2 else 'uj', verified=True,
+                       created_at=base + timedelta(days=i))
+        student.set_password('student-password')
+        students.append(student)
+        db.session.add(student)
+
+    properties = []
+    for i in range(30):
+        prop = Property(name=f'Lodge {i}', address=f'{i} Jorissen Street, Braamfontein',
+                        property_type='residence' if i % 3 else 'apartment',
+                        price_min=4000 + i * 100, price_max=6000 + i * 100,
+                        description='Walking distance to campus with free wifi',
+                        university='wits' if i % 2 else 'uj', approved=i % 5 != 0,
+                        created_at=base + timedelta(hours=i))
+        properties.append(prop)
+        db.session.add(prop)
+    db.session.flush()
+
+    for prop in properties[:10]:
+        db.session.add(PropertyImage(property_id=prop.id, image_url=f'https://img.example/{prop.id}.jpg',
+                                     is_primary=True))
+
+    for i, student in enumerate(students):
+        for prop in properties[i % 7:i % 7 + 3]:
+            review = Review(user_id=student.id, property_id=prop.id, overall_rating=1 + (i % 5),
+                            review_text='Quiet building, the wifi is reliable and security is good.',
+                            recommend=True, created_at=base + timedelta(days=i, hours=prop.id))
+            db.session.add(review)
+            Property.apply_review_ratings(review)
+    db.session.commit()
+
+    app.config['TEST_ADMIN_TOKEN'] = create_access_token(identity=admin)
+    app.config['TEST_STUDENT_TOKEN'] = create_access_token(identity=students[0])
+
+
+def capture_selects(app, method, path, **kwargs):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = app.test_client().open(path, method=method, **kwargs)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    assert response.status_code < 500, response.get_data(as_text=True)
+    return statements
+
+
+def full_scans(statement, parameters):
+    real_tables = set(db.metadata.tables)
+    with db.engine.connect() as conn:
+        plan = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+
+    scans = []
+    for row in plan:
+        detail = row[-1]
+        match = SCAN_RE.match(detail)
+        if not match or match.group(1) not in real_tables:
+            continue
+        if 'USING INDEX' in detail or 'USING COVERING INDEX' in detail:
+            continue
+        scans.append(detail)
+    return scans
+
+
+def auth(app, token):
+    return {'Authorization': f"Bearer {app.config[token]}"}
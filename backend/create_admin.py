@@ -1,13 +1,11 @@
 from app import create_app, db
+from config import FastStartupConfig
 from app.models import User
 
 def create_admin_user():
-    app = create_app()
+    app = create_app(FastStartupConfig)
     
     with app.app_context():
-        # Update database schema to include is_admin column
-        db.create_all()
-        
         admin_email = input("Enter admin email: ")
         admin_name = input("Enter admin name: ")
         admin_password = input("Enter admin password: ")
@@ -0,0 +1,33 @@
+import argparse
+import sys
+from app import create_app
+from config import FastStartupConfig
+from app.utils.exporter import EXPORTS, FORMATS, ExportStats, export_chunks
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream every property, user or review to CSV or NDJSON")
+    parser.add_argument('kind', choices=sorted(EXPORTS))
+    parser.add_argument('--format', choices=sorted(FORMATS), default='ndjson')
+    parser.add_argument('-o', '--output', default='-', help="file to write ('-' for stdout)")
+    parser.add_argument('--chunk-rows', type=int, default=1000, help="rows fetched and written per chunk")
+    args = parser.parse_args()
+
+    app = create_app(FastStartupConfig)
+    stats = ExportStats(args.kind, args.format)
+
+    with app.app_context():
+        output = sys.stdout if args.output == '-' else open(args.output, 'w', newline='', encoding='utf-8')
+        try:
+            for chunk in export_chunks(args.kind, args.format, chunk_rows=args.chunk_rows, stats=stats):
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+
+    # Progress goes to stderr so stdout can be piped
+    result = stats.to_dict()
+    print(f"✅ {result['rows']} {args.kind} in {result['seconds']}s "
+          f"({result['rows_per_second']} rows/s, {result['bytes'] / 1e6:.1f} MB)", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
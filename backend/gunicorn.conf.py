@@ -0,0 +1,65 @@
+# Gunicorn settings for production (Railway runs: gunicorn --config gunicorn.conf.py run:app)
+#
+# Everything can be tuned through environment variables:
+#   WEB_CONCURRENCY            worker processes (default: 2 * CPUs + 1, at most 8)
+#   GUNICORN_THREADS           threads per worker (default: 4)
+#   GUNICORN_TIMEOUT           seconds before a stuck worker is killed and replaced
+#   GUNICORN_GRACEFUL_TIMEOUT  seconds workers get to finish requests on reload/shutdown
+#   GUNICORN_MAX_REQUESTS      recycle a worker after this many requests (0 = never)
+#   METRICS_DIR                where workers share /api/metrics numbers
+#                              (default: a per-server temp directory)
+#
+# Send SIGHUP to the master for a graceful reload: new workers are started
+# and old ones finish their in-flight requests before exiting.
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# Containers often report the host's CPU count, so cap the default
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Import the app once in the master so workers share its memory copy-on-write
+preload_app = True
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+# Must be set before the app (and config.py) is loaded
+os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), f'oneapplyhub-metrics-{os.getpid()}'))
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def post_fork(server, worker):
+    # Connections opened by the master while preloading (create_all etc.)
+    # must not be shared with the children; drop them without closing so
+    # each worker opens its own.
+    from app import db
+
+    app = worker.app.wsgi()
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+def on_starting(server):
+    # Start from zero rather than counting a previous server's requests
+    shutil.rmtree(os.environ['METRICS_DIR'], ignore_errors=True)
+    os.makedirs(os.environ['METRICS_DIR'], exist_ok=True)
+
+
+def child_exit(server, worker):
+    # Keep the exited worker's request counts in the totals
+    from app.utils.metrics import archive_process
+
+    archive_process(os.environ['METRICS_DIR'], worker.pid)
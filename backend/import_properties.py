@@ -0,0 +1,37 @@
+import argparse
+import json
+import sys
+from app import create_app
+from config import FastStartupConfig
+from app.utils.importer import ImportFormatError, format_for, import_properties, read_rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Upsert property listings from a CSV or JSONL file")
+    parser.add_argument('file', help="listings file ('-' for stdin)")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help="default: from the file extension")
+    parser.add_argument('--chunk-size', type=int, default=500)
+    parser.add_argument('--dry-run', action='store_true', help="report what would change without saving")
+    args = parser.parse_args()
+    
+    app = create_app(FastStartupConfig)
+    fmt = args.format or format_for(args.file)
+    
+    with app.app_context():
+        stream = sys.stdin if args.file == '-' else open(args.file, newline='', encoding='utf-8-sig')
+        try:
+            summary = import_properties(read_rows(stream, fmt), chunk_size=args.chunk_size, dry_run=args.dry_run)
+        except ImportFormatError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        finally:
+            stream.close()
+        
+        result = summary.to_dict()
+        prefix = "Dry run: " if args.dry_run else ""
+        print(f"✅ {prefix}{result['inserted']} inserted, {result['updated']} updated, "
+              f"{result['unchanged']} unchanged, {result['rejected']} rejected in {result['seconds']}s")
+        for error in result['errors']:
+            print(f"   line {error['line']}: {error['error']}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Add denormalized rating aggregates to Property
+
+Revision ID: 3b9c2f1d8a47
+Revises: ee4317c6fa13
+Create Date: 2026-10-18 09:12:41.305118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9c2f1d8a47'
+down_revision = 'ee4317c6fa13'
+branch_labels = None
+depends_on = None
+
+AGGREGATE_COLUMNS = [
+    'rating_sum',
+    'rating_count',
+    'value_rating_sum',
+    'value_rating_count',
+    'location_rating_sum',
+    'location_rating_count',
+    'safety_rating_sum',
+    'safety_rating_count',
+    'cleanliness_rating_sum',
+    'cleanliness_rating_count',
+    'management_rating_sum',
+    'management_rating_count',
+    'facilities_rating_sum',
+    'facilities_rating_count',
+]
+
+
+def upgrade():
+    with op.batch_alter_table('property', schema=None) as batch_op:
+        for column in AGGREGATE_COLUMNS:
+            batch_op.add_column(sa.Column(column, sa.Integer(), nullable=False, server_default='0'))
+
+    # Fold in the existing reviews, as Property.recalculate_ratings() does
+    assignments = []
+    for column in AGGREGATE_COLUMNS:
+        rating, kind = column.rsplit('_', 1)
+        rating = 'overall_rating' if rating == 'rating' else rating
+        aggregate = f'COALESCE(SUM({rating}), 0)' if kind == 'sum' else f'COUNT({rating})'
+        assignments.append(f'{column} = (SELECT {aggregate} FROM review WHERE review.property_id = property.id)')
+    op.execute('UPDATE property SET ' + ', '.join(assignments))
+
+
+def downgrade():
+    with op.batch_alter_table('property', schema=None) as batch_op:
+        for column in reversed(AGGREGATE_COLUMNS):
+            batch_op.drop_column(column)
@@ -0,0 +1,46 @@
+"""Add helpful_vote table
+
+Revision ID: 5e07a3d9c2b8
+Revises: f2d8b6c4a913
+Create Date: 2026-10-18 16:48:30.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e07a3d9c2b8'
+down_revision = 'f2d8b6c4a913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_all in older app versions may already have made the table
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('helpful_vote'):
+        op.create_table('helpful_vote',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('review_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['review_id'], ['review.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'review_id', name='uq_helpful_vote_user_review')
+        )
+        indexes = set()
+    else:
+        indexes = {index['name'] for index in inspector.get_indexes('helpful_vote')}
+
+    if 'ix_helpful_vote_review_id' not in indexes:
+        with op.batch_alter_table('helpful_vote', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_helpful_vote_review_id'), ['review_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('helpful_vote', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_helpful_vote_review_id'))
+
+    op.drop_table('helpful_vote')
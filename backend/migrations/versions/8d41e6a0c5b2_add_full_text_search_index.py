@@ -0,0 +1,27 @@
+"""Add full-text search index for properties and reviews
+
+Revision ID: 8d41e6a0c5b2
+Revises: 3b9c2f1d8a47
+Create Date: 2026-10-18 11:40:03.871624
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.search import install_search_index, drop_search_index
+
+
+# revision identifiers, used by Alembic.
+revision = '8d41e6a0c5b2'
+down_revision = '3b9c2f1d8a47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # FTS5 tables + triggers on SQLite, tsvector columns + GIN on Postgres
+    install_search_index(op.get_bind())
+
+
+def downgrade():
+    drop_search_index(op.get_bind())
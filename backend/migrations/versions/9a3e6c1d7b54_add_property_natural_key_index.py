@@ -0,0 +1,26 @@
+"""Add property name/address index for bulk import
+
+Revision ID: 9a3e6c1d7b54
+Revises: 5e07a3d9c2b8
+Create Date: 2026-10-18 17:22:04.519377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a3e6c1d7b54'
+down_revision = '5e07a3d9c2b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('property', schema=None) as batch_op:
+        batch_op.create_index('ix_property_name_address', ['name', 'address'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('property', schema=None) as batch_op:
+        batch_op.drop_index('ix_property_name_address')
@@ -0,0 +1,36 @@
+"""Add content hash, status and size columns for uploaded property images
+
+Revision ID: b4f19c7e2d60
+Revises: d61b8f2e0a7c
+Create Date: 2026-10-18 19:05:41.208316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4f19c7e2d60'
+down_revision = 'd61b8f2e0a7c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('property_image', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('extension', sa.String(length=8), nullable=True))
+        batch_op.add_column(sa.Column('status', sa.String(length=16), nullable=True))
+        batch_op.add_column(sa.Column('width', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('height', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_property_image_content_hash'), ['content_hash'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('property_image', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_property_image_content_hash'))
+        batch_op.drop_column('height')
+        batch_op.drop_column('width')
+        batch_op.drop_column('status')
+        batch_op.drop_column('extension')
+        batch_op.drop_column('content_hash')
@@ -0,0 +1,38 @@
+"""Add table_version change markers for conditional GET
+
+Revision ID: c7a5e92b1f30
+Revises: 8d41e6a0c5b2
+Create Date: 2026-10-18 14:02:57.410388
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.conditional import install_change_markers, drop_change_markers
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7a5e92b1f30'
+down_revision = '8d41e6a0c5b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_all in older app versions may already have made the table
+    if not sa.inspect(op.get_bind()).has_table('table_version'):
+        op.create_table('table_version',
+        sa.Column('table_name', sa.String(length=50), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('table_name')
+        )
+
+    # Seed one row per tracked table and add the triggers that bump it
+    # (INSERT OR IGNORE / IF NOT EXISTS, so existing ones are kept)
+    install_change_markers(op.get_bind())
+
+
+def downgrade():
+    drop_change_markers(op.get_bind())
+    op.drop_table('table_version')
@@ -0,0 +1,40 @@
+"""Widen user.password_hash for scrypt hashes
+
+Revision ID: d61b8f2e0a7c
+Revises: 9a3e6c1d7b54
+Create Date: 2026-10-18 18:05:41.207733
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.conditional import install_change_markers
+
+
+# revision identifiers, used by Alembic.
+revision = 'd61b8f2e0a7c'
+down_revision = '9a3e6c1d7b54'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password_hash',
+               existing_type=sa.String(length=128),
+               type_=sa.String(length=256),
+               existing_nullable=True)
+
+    # On SQLite the batch copies the table, which drops its change-marker
+    # triggers; put them back
+    install_change_markers(op.get_bind())
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password_hash',
+               existing_type=sa.String(length=256),
+               type_=sa.String(length=128),
+               existing_nullable=True)
+
+    install_change_markers(op.get_bind())
@@ -0,0 +1,58 @@
+"""Add indexes for listing, review and admin queries
+
+Revision ID: f2d8b6c4a913
+Revises: c7a5e92b1f30
+Create Date: 2026-10-18 15:27:12.662081
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2d8b6c4a913'
+down_revision = 'c7a5e92b1f30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('property', schema=None) as batch_op:
+        batch_op.create_index('ix_property_approved_created', ['approved', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_property_approved_university', ['approved', 'university'], unique=False)
+        batch_op.create_index('ix_property_approved_type', ['approved', 'property_type'], unique=False)
+        batch_op.create_index('ix_property_approved_price', ['approved', 'price_min', 'price_max'], unique=False)
+        batch_op.create_index('ix_property_created', ['created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('property_image', schema=None) as batch_op:
+        batch_op.create_index('ix_property_image_property_primary', ['property_id', 'is_primary'], unique=False)
+
+    with op.batch_alter_table('review', schema=None) as batch_op:
+        batch_op.create_index('ix_review_created', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_review_property_created', ['property_id', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_review_user_property', ['user_id', 'property_id'], unique=False)
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.create_index('ix_user_admin_created', ['is_admin', 'created_at', 'id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_user_reset_token'), ['reset_token'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_reset_token'))
+        batch_op.drop_index('ix_user_admin_created')
+
+    with op.batch_alter_table('review', schema=None) as batch_op:
+        batch_op.drop_index('ix_review_user_property')
+        batch_op.drop_index('ix_review_property_created')
+        batch_op.drop_index('ix_review_created')
+
+    with op.batch_alter_table('property_image', schema=None) as batch_op:
+        batch_op.drop_index('ix_property_image_property_primary')
+
+    with op.batch_alter_table('property', schema=None) as batch_op:
+        batch_op.drop_index('ix_property_created')
+        batch_op.drop_index('ix_property_approved_price')
+        batch_op.drop_index('ix_property_approved_type')
+        batch_op.drop_index('ix_property_approved_university')
+        batch_op.drop_index('ix_property_approved_created')
@@ -26,5 +26,7 @@ def setup_database():
         return {'error': str(e), 'status': 'failed'}, 500
 
 if __name__ == '__main__':
+    # Flask's development server: one process, no request timeouts. Production
+    # runs this same app under gunicorn: gunicorn --config gunicorn.conf.py run:app
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=False)
\ No newline at end of file
@@ -1,6 +1,7 @@
 import os
 import sys
 from app import create_app, db
+from config import FastStartupConfig
 from app.models import User, Property, Review
 
 def setup_database():
@@ -11,7 +12,7 @@ def setup_database():
     print(f"Backend directory: {backend_dir}")
     
     # Create the app
-    app = create_app()
+    app = create_app(FastStartupConfig)
     
     with app.app_context():
         # Show the database path
@@ -0,0 +1,24 @@
+"""Response cache keyed on the table_version change markers."""
+from sqlalchemy import update
+
+from app import db, response_cache
+from app.models import Property
+
+
+def test_cached_listing_follows_writes_from_other_workers(app):
+    enabled, response_cache.enabled = response_cache.enabled, True
+    try:
+        client = app.test_client()
+        client.get('/api/properties/2')
+        assert client.get('/api/properties/2').headers['X-Cache'] == 'HIT'
+
+        # Another worker (or a script) commits without touching this
+        # process's cache; the trigger-bumped marker still changes the key
+        db.session.execute(update(Property).where(Property.id == 2).values(price_min=4150))
+        db.session.commit()
+        response = client.get('/api/properties/2')
+        assert response.headers['X-Cache'] == 'MISS'
+        assert response.get_json()['property']['price_min'] == 4150
+    finally:
+        response_cache.enabled = enabled
+        response_cache.clear()
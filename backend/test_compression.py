@@ -0,0 +1,30 @@
+"""Response compression, and reuse of compressed bodies from the response cache."""
+import gzip
+
+from app import compression, response_cache
+
+
+def test_cached_responses_are_compressed_once(app):
+    calls = []
+    compress = compression.compress
+    compression.compress = lambda body, encoding: calls.append(encoding) or compress(body, encoding)
+    enabled, response_cache.enabled = response_cache.enabled, True
+    try:
+        client = app.test_client()
+        plain = client.get('/api/reviews?per_page=20', headers={'Accept-Encoding': 'identity'})
+        first = client.get('/api/reviews?per_page=20', headers={'Accept-Encoding': 'gzip'})
+        second = client.get('/api/reviews?per_page=20', headers={'Accept-Encoding': 'gzip'})
+        revalidated = client.get('/api/reviews?per_page=20', headers={
+            'Accept-Encoding': 'gzip', 'If-None-Match': second.headers['ETag']
+        })
+    finally:
+        compression.compress = compress
+        response_cache.enabled = enabled
+        response_cache.clear()
+
+    assert 'Content-Encoding' not in plain.headers
+    assert second.headers['X-Cache'] == 'HIT' and second.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(second.get_data()) == plain.get_data()
+    assert len(second.get_data()) < len(plain.get_data()) / 2
+    assert calls == ['gzip']
+    assert revalidated.status_code == 304
@@ -0,0 +1,25 @@
+"""Conditional GETs answered from the table_version change markers."""
+from sqlalchemy import update
+
+from app import db
+from app.models import Property
+
+
+def test_write_in_the_same_second_invalidates_the_etag(app):
+    client = app.test_client()
+    first = client.get('/api/properties/2')
+    etag = first.headers['ETag']
+    assert 'Last-Modified' not in first.headers
+    revalidate = {'If-None-Match': etag, 'If-Modified-Since': 'Wed, 01 Jan 2100 00:00:00 GMT'}
+    assert client.get('/api/properties/2', headers=revalidate).status_code == 304
+
+    db.session.execute(update(Property).where(Property.id == 2).values(price_max=6150))
+    db.session.commit()
+    changed = client.get('/api/properties/2', headers=revalidate)
+    assert changed.status_code == 200 and changed.headers['ETag'] != etag
+    assert changed.get_json()['property']['price_max'] == 6150
+
+    # If-Modified-Since on its own no longer answers with 304
+    assert client.get('/api/properties/2', headers={
+        'If-Modified-Since': 'Wed, 01 Jan 2100 00:00:00 GMT'
+    }).status_code == 200
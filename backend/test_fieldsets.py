@@ -0,0 +1,16 @@
+"""?fields= and ?include= on the property endpoints."""
+from conftest import capture_selects
+
+
+def test_property_fields_narrow_the_select(app):
+    statements = capture_selects(app, 'GET', '/api/properties?fields=name&per_page=5&include_total=0')
+    property_select = next(statement for statement, _ in statements if 'FROM property' in statement)
+    assert 'property.description' not in property_select
+    assert not any('FROM property_image' in statement for statement, _ in statements)
+
+    properties = app.test_client().get('/api/properties?fields=name&per_page=5').get_json()['properties']
+    assert properties and all(set(prop) == {'id', 'name'} for prop in properties)
+
+    detail = app.test_client().get('/api/properties/2?fields=name,primary_image&include=rating_summary')
+    assert set(detail.get_json()['property']) == {'id', 'name', 'primary_image', 'rating_summary'}
+    assert app.test_client().get('/api/properties?fields=password').status_code == 400
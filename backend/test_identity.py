@@ -0,0 +1,47 @@
+"""The per-process identity cache behind flask_jwt_extended.current_user."""
+from flask_jwt_extended import create_access_token
+
+from app import db
+from app.models import User
+from conftest import auth, capture_selects
+
+
+def test_admin_check_uses_cached_identity(app):
+    def identity_lookups(statements):
+        return [statement for statement, _ in statements
+                if 'user.is_admin' in statement and 'WHERE user.id' in statement]
+
+    headers = auth(app, 'TEST_ADMIN_TOKEN')
+    capture_selects(app, 'GET', '/api/admin/dashboard', headers=headers)
+    assert not identity_lookups(capture_selects(app, 'GET', '/api/admin/dashboard', headers=headers))
+
+    # Revoking the flag drops the cached identity at commit
+    admin = User.query.filter_by(email='admin@oneapplyhub.co.za').one()
+    admin.is_admin = False
+    db.session.commit()
+    try:
+        assert app.test_client().get('/api/admin/dashboard', headers=headers).status_code == 403
+    finally:
+        admin.is_admin = True
+        db.session.commit()
+    assert app.test_client().get('/api/admin/dashboard', headers=headers).status_code == 200
+
+
+def test_new_user_replaces_a_cached_unknown_id(app):
+    next_id = db.session.query(db.func.max(User.id)).scalar() + 1
+    headers = {'Authorization': f'Bearer {create_access_token(identity=str(next_id))}'}
+    client = app.test_client()
+    assert client.get('/api/auth/profile', headers=headers).status_code == 401
+
+    user = User(email='2300099@students.wits.ac.za', name='Student 99', university='wits', verified=True)
+    user.set_password('student-password')
+    db.session.add(user)
+    db.session.commit()
+    try:
+        assert user.id == next_id
+        response = client.get('/api/auth/profile', headers=headers)
+        assert response.status_code == 200
+        assert response.get_json()['user']['email'] == '2300099@students.wits.ac.za'
+    finally:
+        db.session.delete(user)
+        db.session.commit()
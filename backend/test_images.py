@@ -0,0 +1,38 @@
+"""Property image uploads and the renditions served for them."""
+import io
+
+import pytest
+
+from conftest import auth, capture_selects, full_scans
+
+
+def test_image_upload_serves_renditions(app, tmp_path):
+    PIL = pytest.importorskip('PIL.Image')
+    from app import image_store
+
+    photo = io.BytesIO()
+    PIL.new('RGB', (1600, 1200), (200, 120, 40)).save(photo, format='JPEG')
+    photo.seek(0)
+
+    root = image_store.root
+    image_store.root = str(tmp_path)
+    try:
+        statements = capture_selects(app, 'POST', '/api/admin/properties/12/images',
+                                     headers=auth(app, 'TEST_ADMIN_TOKEN'),
+                                     data={'file': (photo, 'front.jpg'), 'is_primary': '1'})
+        for statement, parameters in statements:
+            assert not full_scans(statement, parameters), statement
+
+        client = app.test_client()
+        listing = client.get('/api/properties?per_page=50').get_json()['properties']
+        image = next(prop for prop in listing if prop['id'] == 12)['primary_image']
+        assert image['status'] == 'ready' and image['width'] == 1600
+        assert image['image_url'].endswith('-listing.webp')
+        assert client.get('/api/properties/12').get_json()['property']['primary_image']['image_url'] \
+            .endswith('-detail.webp')
+
+        served = client.get(image['image_url'].replace('http://localhost', ''))
+        assert served.status_code == 200 and served.mimetype == 'image/webp'
+        assert 'immutable' in served.headers['Cache-Control']
+    finally:
+        image_store.root = root
@@ -0,0 +1,17 @@
+"""FastJSONProvider: orjson and the stdlib encoder write the same payloads."""
+from datetime import datetime
+
+
+def test_json_encoders_write_the_same_payload(app):
+    client = app.test_client()
+    fast = client.get('/api/reviews?per_page=20')
+    use_orjson, app.json.use_orjson = app.json.use_orjson, False
+    try:
+        stdlib = client.get('/api/reviews?per_page=20')
+    finally:
+        app.json.use_orjson = use_orjson
+
+    assert fast.get_json() == stdlib.get_json()
+    review = fast.get_json()['reviews'][0]
+    assert datetime.fromisoformat(review['created_at'])
+    assert 'serialize;dur=' in fast.headers['Server-Timing']
@@ -0,0 +1,21 @@
+"""Request metrics collected per thread."""
+import threading
+
+from app import metrics
+
+
+def test_shards_of_exited_threads_are_folded(app):
+    before = sum(metrics.local_totals()['statuses'].values())
+
+    def fetch():
+        app.test_client().get('/api/properties/2')
+
+    for _ in range(20):
+        thread = threading.Thread(target=fetch)
+        thread.start()
+        thread.join()
+
+    totals = metrics.local_totals()
+    assert sum(totals['statuses'].values()) == before + 20
+    assert all(shard.alive() for shard in metrics._shards)
+    assert len(metrics._shards) <= 1
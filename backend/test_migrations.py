@@ -0,0 +1,74 @@
+"""Upgrading existing databases through the migration chain."""
+import pytest
+from flask_migrate import downgrade, upgrade
+from sqlalchemy import text
+
+from app import create_app, db
+from app.utils.startup import BASELINE_REVISION, database_revisions, migration_heads, migrations_directory
+from config import TestingConfig
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    class FileConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'upgrade.db'}"
+
+    apps = []
+
+    def make():
+        app = create_app(FileConfig)
+        apps.append(app)
+        return app
+
+    yield make
+    for app in apps:
+        with app.app_context():
+            db.engine.dispose()
+
+
+def test_create_all_database_is_stamped_and_backfilled(make_app):
+    # A database as create_all built it at the baseline, with reviews
+    app = make_app()
+    with app.app_context():
+        downgrade(migrations_directory(app), revision=BASELINE_REVISION)
+        with db.engine.begin() as conn:
+            conn.execute(text('DROP TABLE alembic_version'))
+            conn.execute(text(
+                "INSERT INTO user (email, password_hash, name, university, verified, is_admin) "
+                "VALUES ('2300001@students.wits.ac.za', 'x', 'Student', 'wits', 1, 0)"
+            ))
+            conn.execute(text(
+                "INSERT INTO property (name, address, property_type, price_min, price_max, approved) "
+                "VALUES ('Lodge', '1 Jorissen Street', 'residence', 4000, 6000, 1)"
+            ))
+            for rating in (3, 5):
+                conn.execute(text(
+                    "INSERT INTO review (user_id, property_id, overall_rating, value_rating, review_text) "
+                    "VALUES (1, 1, :rating, 4, 'Quiet building with reliable wifi')"
+                ), {'rating': rating})
+
+    app = make_app()
+    with app.app_context():
+        assert database_revisions(db.engine) == {BASELINE_REVISION}
+        upgrade(migrations_directory(app))
+        assert database_revisions(db.engine) == migration_heads(migrations_directory(app))
+
+        prop = app.test_client().get('/api/properties/1').get_json()['property']
+        assert prop['review_count'] == 2 and prop['average_rating'] == 4.0
+
+
+def test_upgrade_keeps_the_change_marker_triggers(make_app):
+    def triggers():
+        with db.engine.connect() as conn:
+            return {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'"))}
+
+    app = make_app()
+    with app.app_context():
+        created = triggers()
+        assert {'user_version_insert', 'user_version_update', 'user_version_delete'} <= created
+
+        # Through the user table rebuild and back
+        downgrade(migrations_directory(app), revision='9a3e6c1d7b54')
+        assert triggers() == created
+        upgrade(migrations_directory(app))
+        assert triggers() == created
@@ -0,0 +1,48 @@
+"""Keyset (cursor) pagination on the listing endpoints."""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import update
+
+from app import db
+from app.models import Review
+
+
+@pytest.mark.parametrize('per_page', [0, -5])
+def test_cursor_page_size_is_at_least_one(app, per_page):
+    response = app.test_client().get(f'/api/reviews?cursor=&per_page={per_page}')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert len(body['reviews']) == 1 and body['next_cursor']
+
+
+def test_cursor_chain_covers_tied_and_missing_timestamps(app):
+    added = []
+    for i in range(7):
+        review = Review(user_id=1 + i, property_id=2, overall_rating=4,
+                        review_text='Added for the cursor walk, nothing else to say.')
+        db.session.add(review)
+        added.append(review)
+    db.session.flush()
+    tied, undated = [r.id for r in added[:4]], [r.id for r in added[4:]]
+    db.session.execute(update(Review).where(Review.id.in_(tied)).values(created_at=datetime(2025, 1, 5, 12)))
+    db.session.execute(update(Review).where(Review.id.in_(undated)).values(created_at=None))
+    db.session.commit()
+    try:
+        client = app.test_client()
+        expected = client.get('/api/reviews?per_page=100').get_json()['total']
+        seen, cursor = [], ''
+        while cursor is not None:
+            page = client.get(f'/api/reviews?cursor={cursor}&per_page=4')
+            assert page.status_code == 200
+            body = page.get_json()
+            seen += [review['id'] for review in body['reviews']]
+            cursor = body['next_cursor']
+
+        assert len(seen) == len(set(seen)) == expected
+        assert set(tied) | set(undated) <= set(seen)
+        assert seen[-len(undated):] == sorted(undated, reverse=True)
+    finally:
+        for review in added:
+            db.session.delete(review)
+        db.session.commit()
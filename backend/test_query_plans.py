@@ -0,0 +1,99 @@
+"""Query-plan regression suite.
+
+Drives each endpoint through the Flask test client against an in-memory
+SQLite database, captures every SELECT it issues and runs EXPLAIN QUERY
+PLAN on it. A test fails if any statement falls back to a full scan of
+a real table (a plain "SCAN <table>" with no index behind it).
+
+Run with: python -m pytest test_query_plans.py (fixtures in conftest.py)
+"""
+import pytest
+
+from conftest import auth, capture_selects, full_scans
+
+
+ENDPOINTS = [
+    ('GET', '/api/properties', None),
+    ('GET', '/api/properties?university=wits', None),
+    ('GET', '/api/properties?type=residence', None),
+    ('GET', '/api/properties?min_price=4500&max_price=9000', None),
+    ('GET', '/api/properties?cursor=', None),
+    ('GET', '/api/properties?cursor=&include_total=1&university=uj', None),
+    ('GET', '/api/properties?search=jorissen', None),
+    ('GET', '/api/properties/2', None),
+    ('GET', '/api/properties?fields=id,name&include=images,rating_summary', None),
+    ('GET', '/api/properties/2?include=images', None),
+    ('GET', '/api/reviews', None),
+    ('GET', '/api/reviews?university=wits&min_rating=3', None),
+    ('GET', '/api/reviews?cursor=', None),
+    ('GET', '/api/reviews?search=wifi', None),
+    ('GET', '/api/reviews/property/2', None),
+    ('GET', '/api/reviews/property/2?cursor=', None),
+    ('GET', '/api/reviews/user/stats', 'TEST_STUDENT_TOKEN'),
+    ('GET', '/api/auth/profile', 'TEST_STUDENT_TOKEN'),
+    ('GET', '/api/admin/dashboard', 'TEST_ADMIN_TOKEN'),
+    ('GET', '/api/admin/properties?status=approved', 'TEST_ADMIN_TOKEN'),
+    ('GET', '/api/admin/properties?cursor=', 'TEST_ADMIN_TOKEN'),
+    ('GET', '/api/admin/users', 'TEST_ADMIN_TOKEN'),
+    ('GET', '/api/admin/users?cursor=', 'TEST_ADMIN_TOKEN'),
+    ('GET', '/api/admin/reviews?cursor=', 'TEST_ADMIN_TOKEN'),
+]
+
+
+@pytest.mark.parametrize('method,path,token', ENDPOINTS)
+def test_endpoint_avoids_full_scans(app, method, path, token):
+    headers = auth(app, token) if token else {}
+    statements = capture_selects(app, method, path, headers=headers)
+    assert statements, f'{path} issued no SELECTs'
+
+    for statement, parameters in statements:
+        scans = full_scans(statement, parameters)
+        assert not scans, f'{method} {path} full scan {scans} in:\n{statement}'
+
+
+def test_cursor_second_page_avoids_full_scans(app):
+    first = app.test_client().get('/api/reviews?cursor=&per_page=5').get_json()
+    assert first['next_cursor']
+
+    statements = capture_selects(app, 'GET', f"/api/reviews?cursor={first['next_cursor']}&per_page=5")
+    for statement, parameters in statements:
+        assert not full_scans(statement, parameters), statement
+
+
+def test_login_avoids_full_scans(app):
+    statements = capture_selects(app, 'POST', '/api/auth/login', json={
+        'email': '2300001@students.wits.ac.za', 'password': 'student-password'
+    })
+    for statement, parameters in statements:
+        assert not full_scans(statement, parameters), statement
+
+
+def test_helpful_vote_and_status_avoid_full_scans(app):
+    headers = auth(app, 'TEST_STUDENT_TOKEN')
+    statements = capture_selects(app, 'POST', '/api/reviews/3/helpful', headers=headers)
+    statements += capture_selects(app, 'POST', '/api/reviews/helpful-status', headers=headers,
+                                  json={'review_ids': list(range(1, 25))})
+    for statement, parameters in statements:
+        assert not full_scans(statement, parameters), statement
+
+
+def test_create_review_avoids_full_scans(app):
+    statements = capture_selects(app, 'POST', '/api/reviews/property/25', headers=auth(app, 'TEST_STUDENT_TOKEN'), json={
+        'overall_rating': 4,
+        'review_text': 'Spacious rooms and the landlord fixes things quickly when asked.',
+        'recommend': True
+    })
+    for statement, parameters in statements:
+        assert not full_scans(statement, parameters), statement
+
+
+def test_property_import_avoids_full_scans(app):
+    listings = b'name,address,property_type,price_min,price_max\n' \
+               b'Lodge 3,3 Jorissen Street Braamfontein,residence,4300,6300\n' \
+               b'Lodge 3,"3 Jorissen Street, Braamfontein",residence,4300,6300\n'
+    statements = capture_selects(app, 'POST', '/api/admin/properties/import?dry_run=1',
+                                 headers={**auth(app, 'TEST_ADMIN_TOKEN'), 'Content-Type': 'text/csv'},
+                                 data=listings)
+    assert statements
+    for statement, parameters in statements:
+        assert not full_scans(statement, parameters), statement
@@ -0,0 +1,53 @@
+"""Token-bucket rate limits on the auth and review endpoints."""
+from flask_jwt_extended import create_access_token
+
+from app import rate_limiter
+from app.models import User
+from app.utils.ratelimit import TokenBuckets
+
+
+def limited(name, capacity, per_seconds):
+    """Swap in one small limit (and turn limiting on) for a test"""
+    saved = rate_limiter.limits, rate_limiter.enabled
+    rate_limiter.limits, rate_limiter.enabled = {name: TokenBuckets(capacity, capacity / per_seconds)}, True
+    return saved
+
+
+def test_login_rate_limit_returns_retry_after(app):
+    saved = limited('login', 2, 60)
+    try:
+        client = app.test_client()
+        statuses = [client.post('/api/auth/login', json={'email': 'x@students.wits.ac.za', 'password': 'x'})
+                    for _ in range(3)]
+    finally:
+        rate_limiter.limits, rate_limiter.enabled = saved
+    assert [response.status_code for response in statuses] == [401, 401, 429]
+    assert statuses[-1].headers['Retry-After'] == '30'
+
+
+def test_rejected_request_keeps_the_other_keys_tokens(app):
+    first, second = User.query.filter_by(is_admin=False).order_by(User.id).limit(2).all()
+    review = {'overall_rating': 4, 'review_text': 'Good value for money and close to the library.',
+              'recommend': True}
+
+    def post(user, ip):
+        return app.test_client().post(
+            '/api/reviews/property/26', json=review, environ_base={'REMOTE_ADDR': ip},
+            headers={'Authorization': f'Bearer {create_access_token(identity=user)}'},
+        ).status_code
+
+    saved = limited('create_review', 1, 3600)
+    try:
+        assert post(first, '10.0.0.1') != 429
+        # The address is spent, so this is refused without touching the user's bucket
+        assert post(second, '10.0.0.1') == 429
+        assert post(second, '10.0.0.2') != 429
+    finally:
+        rate_limiter.limits, rate_limiter.enabled = saved
+
+
+def test_take_all_is_all_or_nothing():
+    buckets = TokenBuckets(1, 1 / 60)
+    assert buckets.take_all(['ip:a', 'user:1'], now=0) == 0.0
+    assert buckets.take_all(['ip:a', 'user:2'], now=0) == 60.0
+    assert buckets.take_all(['ip:b', 'user:2'], now=0) == 0.0
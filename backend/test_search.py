@@ -0,0 +1,26 @@
+"""Full-text search over properties and reviews."""
+from app import db
+from app.utils import search
+from conftest import capture_selects, full_scans
+
+
+def test_property_matches_fan_out_to_a_bounded_number_of_reviews(app, monkeypatch):
+    # Every seeded property is a "Lodge", and most have several reviews
+    monkeypatch.setattr(search, 'MATCHED_PROPERTIES', 2)
+    monkeypatch.setattr(search, 'REVIEWS_PER_MATCHED_PROPERTY', 3)
+    matches = search.review_matches('lodge')
+    assert db.session.query(db.func.count()).select_from(matches).scalar() == 6
+
+    statements = capture_selects(app, 'GET', '/api/reviews?search=lodge&per_page=50')
+    for statement, parameters in statements:
+        assert not full_scans(statement, parameters), statement
+    reviews = app.test_client().get('/api/reviews?search=lodge&per_page=50').get_json()['reviews']
+    assert 0 < len(reviews) <= 6
+
+
+def test_review_text_matches_are_not_capped(app, monkeypatch):
+    monkeypatch.setattr(search, 'MATCHED_PROPERTIES', 0)
+    # Every seeded review mentions wifi
+    client = app.test_client()
+    assert client.get('/api/reviews?search=wifi').get_json()['total'] == \
+        client.get('/api/reviews').get_json()['total']
@@ -77,7 +77,7 @@ const StudentApplicationPage = () => {
 
   const fetchProperties = async () => {
     try {
-      const response = await fetch('http://localhost:5000/api/properties?per_page=50');
+      const response = await fetch('http://localhost:5000/api/properties?per_page=50&fields=id,name,address,price_min,price_max&include_total=0');
       const data = await response.json();
       setProperties(data.properties || []);
     } catch (error) {